@@ -0,0 +1,53 @@
+"""tasks table and pagination indexes
+
+Revision ID: 3c1d2a7b9e10
+Revises: f9a81f5729eb
+Create Date: 2026-10-18 09:12:40.118532
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1d2a7b9e10'
+down_revision: Union[str, None] = 'f9a81f5729eb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The tasks table was only ever created through metadata.create_all;
+    # add it to the migration history before indexing it.
+    op.create_table('tasks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(), nullable=True),
+    sa.Column('status', sa.Enum('todo', 'in_progress', 'done', name='taskstatus'), nullable=True),
+    sa.Column('priority', sa.Enum('low', 'medium', 'high', name='taskpriority'), nullable=True),
+    sa.Column('due_date', sa.Date(), nullable=True),
+    sa.Column('assignee_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['assignee_id'], ['members.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_tasks_id'), 'tasks', ['id'], unique=False)
+    op.create_index(op.f('ix_tasks_title'), 'tasks', ['title'], unique=False)
+    op.create_index('ix_tasks_due_date_id', 'tasks', ['due_date', 'id'], unique=False)
+    op.create_index('ix_tasks_status_due_date_id', 'tasks', ['status', 'due_date', 'id'], unique=False)
+    op.create_index('ix_tasks_assignee_id_due_date_id', 'tasks', ['assignee_id', 'due_date', 'id'], unique=False)
+    op.create_index('ix_tasks_priority_id', 'tasks', ['priority', 'id'], unique=False)
+    op.create_index('ix_members_name_id', 'members', ['name', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_members_name_id', table_name='members')
+    op.drop_index('ix_tasks_priority_id', table_name='tasks')
+    op.drop_index('ix_tasks_assignee_id_due_date_id', table_name='tasks')
+    op.drop_index('ix_tasks_status_due_date_id', table_name='tasks')
+    op.drop_index('ix_tasks_due_date_id', table_name='tasks')
+    op.drop_index(op.f('ix_tasks_title'), table_name='tasks')
+    op.drop_index(op.f('ix_tasks_id'), table_name='tasks')
+    op.drop_table('tasks')
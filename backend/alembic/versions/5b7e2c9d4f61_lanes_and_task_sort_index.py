@@ -0,0 +1,63 @@
+"""lanes and task sort_index
+
+Revision ID: 5b7e2c9d4f61
+Revises: 8d4e6f2a1b37
+Create Date: 2026-10-18 13:41:05.227190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e2c9d4f61'
+down_revision: Union[str, None] = '8d4e6f2a1b37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DEFAULT_LANES = ('Backlog', 'In Progress', 'Done')
+STEP = 1024.0
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    lanes = op.create_table('lanes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('sort_index', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_lanes_id'), 'lanes', ['id'], unique=False)
+    op.create_index(op.f('ix_lanes_name'), 'lanes', ['name'], unique=True)
+    op.create_index(op.f('ix_lanes_updated_at'), 'lanes', ['updated_at'], unique=False)
+    op.bulk_insert(lanes, [
+        {'name': name, 'sort_index': (position + 1) * STEP}
+        for position, name in enumerate(DEFAULT_LANES)
+    ])
+
+    with op.batch_alter_table('tasks') as batch_op:
+        batch_op.add_column(sa.Column('lane_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('sort_index', sa.Float(), nullable=True))
+        batch_op.create_foreign_key('fk_tasks_lane_id_lanes', 'lanes', ['lane_id'], ['id'], ondelete='SET NULL')
+    # Existing tasks start in the first lane, spaced out in id order.
+    op.execute(sa.text(
+        "UPDATE tasks SET lane_id = (SELECT min(id) FROM lanes), "
+        f"sort_index = id * {STEP}"
+    ))
+    op.create_index('ix_tasks_lane_id_sort_index_id', 'tasks', ['lane_id', 'sort_index', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tasks_lane_id_sort_index_id', table_name='tasks')
+    with op.batch_alter_table('tasks') as batch_op:
+        batch_op.drop_constraint('fk_tasks_lane_id_lanes', type_='foreignkey')
+        batch_op.drop_column('sort_index')
+        batch_op.drop_column('lane_id')
+    op.drop_index(op.f('ix_lanes_updated_at'), table_name='lanes')
+    op.drop_index(op.f('ix_lanes_name'), table_name='lanes')
+    op.drop_index(op.f('ix_lanes_id'), table_name='lanes')
+    op.drop_table('lanes')
@@ -0,0 +1,29 @@
+"""task reminded_at
+
+Revision ID: a4c8e1f03d92
+Revises: 5b7e2c9d4f61
+Create Date: 2026-10-18 14:20:48.915306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c8e1f03d92'
+down_revision: Union[str, None] = '5b7e2c9d4f61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tasks', sa.Column('reminded_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('tasks') as batch_op:
+        batch_op.drop_column('reminded_at')
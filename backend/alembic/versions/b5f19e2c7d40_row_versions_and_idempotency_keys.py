@@ -0,0 +1,45 @@
+"""row versions and idempotency keys
+
+Revision ID: b5f19e2c7d40
+Revises: e83c5d19a7f2
+Create Date: 2026-10-18 19:42:06.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5f19e2c7d40'
+down_revision: Union[str, None] = 'e83c5d19a7f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VERSIONED = ('units', 'members', 'tasks')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in VERSIONED:
+        op.add_column(table, sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.create_table('idempotency_keys',
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('fingerprint', sa.String(), nullable=False),
+    sa.Column('status_code', sa.Integer(), nullable=True),
+    sa.Column('headers', sa.Text(), nullable=True),
+    sa.Column('body', sa.LargeBinary(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_idempotency_keys_created_at'), 'idempotency_keys', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_idempotency_keys_created_at'), table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
+    for table in reversed(VERSIONED):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('version')
@@ -0,0 +1,152 @@
+"""cooperatives and tenant scoping
+
+Revision ID: c3e7a9d05b18
+Revises: b5f19e2c7d40
+Create Date: 2026-10-18 21:06:51.472930
+
+Existing rows go to the default cooperative (id 1). Downgrading fails if
+two cooperatives have a unit, lane or member email with the same name.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e7a9d05b18'
+down_revision: Union[str, None] = 'b5f19e2c7d40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SCOPED = ('units', 'members', 'lanes', 'tasks', 'proposals')
+SEARCHABLE = {'tasks': ('title',), 'members': ('name', 'email')}
+STATUS = postgresql.ENUM('todo', 'in_progress', 'done', name='taskstatus', create_type=False)
+PRIORITY = postgresql.ENUM('low', 'medium', 'high', name='taskpriority', create_type=False)
+
+# (name, table, columns, unique) before and after.
+OLD_INDEXES = (
+    ('ix_units_name', 'units', ['name'], True),
+    ('ix_units_updated_at', 'units', ['updated_at'], False),
+    ('ix_members_email', 'members', ['email'], True),
+    ('ix_members_name', 'members', ['name'], False),
+    ('ix_members_name_id', 'members', ['name', 'id'], False),
+    ('ix_members_updated_at', 'members', ['updated_at'], False),
+    ('ix_lanes_name', 'lanes', ['name'], True),
+    ('ix_tasks_due_date_id', 'tasks', ['due_date', 'id'], False),
+    ('ix_tasks_status_due_date_id', 'tasks', ['status', 'due_date', 'id'], False),
+    ('ix_tasks_assignee_id_due_date_id', 'tasks', ['assignee_id', 'due_date', 'id'], False),
+    ('ix_tasks_priority_id', 'tasks', ['priority', 'id'], False),
+    ('ix_tasks_updated_at', 'tasks', ['updated_at'], False),
+)
+NEW_INDEXES = (
+    ('ix_units_tenant_id_name', 'units', ['tenant_id', 'name'], True),
+    ('ix_units_tenant_id_id', 'units', ['tenant_id', 'id'], False),
+    ('ix_units_tenant_id_updated_at', 'units', ['tenant_id', 'updated_at'], False),
+    ('ix_members_tenant_id_email', 'members', ['tenant_id', 'email'], True),
+    ('ix_members_tenant_id_id', 'members', ['tenant_id', 'id'], False),
+    ('ix_members_tenant_id_name_id', 'members', ['tenant_id', 'name', 'id'], False),
+    ('ix_members_tenant_id_updated_at', 'members', ['tenant_id', 'updated_at'], False),
+    ('ix_lanes_tenant_id_name', 'lanes', ['tenant_id', 'name'], True),
+    ('ix_lanes_tenant_id_sort_index_id', 'lanes', ['tenant_id', 'sort_index', 'id'], False),
+    ('ix_tasks_tenant_id_id', 'tasks', ['tenant_id', 'id'], False),
+    ('ix_tasks_tenant_id_due_date_id', 'tasks', ['tenant_id', 'due_date', 'id'], False),
+    ('ix_tasks_tenant_id_status_due_date_id', 'tasks', ['tenant_id', 'status', 'due_date', 'id'], False),
+    ('ix_tasks_tenant_id_assignee_id_due_date_id', 'tasks', ['tenant_id', 'assignee_id', 'due_date', 'id'], False),
+    ('ix_tasks_tenant_id_priority_id', 'tasks', ['tenant_id', 'priority', 'id'], False),
+    ('ix_tasks_tenant_id_updated_at', 'tasks', ['tenant_id', 'updated_at'], False),
+    ('ix_proposals_tenant_id_id', 'proposals', ['tenant_id', 'id'], False),
+)
+
+
+def _create_aggregates(tenant: bool) -> None:
+    def key():
+        return [sa.Column('tenant_id', sa.Integer(), nullable=False)] if tenant else []
+
+    prefix = ['tenant_id'] if tenant else []
+    op.create_table('task_counts',
+    *key(),
+    sa.Column('assignee_id', sa.Integer(), nullable=False),
+    sa.Column('status', STATUS, nullable=False),
+    sa.Column('priority', PRIORITY, nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint(*prefix, 'assignee_id', 'status', 'priority')
+    )
+    op.create_table('task_due_counts',
+    *key(),
+    sa.Column('assignee_id', sa.Integer(), nullable=False),
+    sa.Column('due_date', sa.Date(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint(*prefix, 'assignee_id', 'due_date')
+    )
+    group = ', '.join([*prefix, 'coalesce(assignee_id, 0)'])
+    op.execute(
+        f"INSERT INTO task_counts ({', '.join([*prefix, 'assignee_id'])}, status, priority, count) "
+        f"SELECT {group}, status, priority, count(*) FROM tasks GROUP BY {group}, status, priority"
+    )
+    op.execute(
+        f"INSERT INTO task_due_counts ({', '.join([*prefix, 'assignee_id'])}, due_date, count) "
+        f"SELECT {group}, due_date, count(*) FROM tasks "
+        "WHERE status IN ('todo', 'in_progress') AND due_date IS NOT NULL "
+        f"GROUP BY {group}, due_date"
+    )
+
+
+def _rebuild_fts(tenant: bool) -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for table, columns in SEARCHABLE.items():
+        indexed = ['tenant', *columns] if tenant else list(columns)
+        selected = ["'t' || tenant_id", *columns] if tenant else list(columns)
+        op.execute(sa.text(f"DROP TABLE IF EXISTS {table}_fts"))
+        op.execute(sa.text(
+            f"CREATE VIRTUAL TABLE {table}_fts USING fts5({', '.join(indexed)}, "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        ))
+        op.execute(sa.text(
+            f"INSERT INTO {table}_fts (rowid, {', '.join(indexed)}) SELECT id, {', '.join(selected)} FROM {table}"
+        ))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    cooperatives = op.create_table('cooperatives',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.bulk_insert(cooperatives, [{'id': 1, 'name': 'Default cooperative'}])
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("SELECT setval(pg_get_serial_sequence('cooperatives', 'id'), 1)")
+    for name, table, _, _ in OLD_INDEXES:
+        op.drop_index(name, table_name=table)
+    for table in SCOPED:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column('tenant_id', sa.Integer(), server_default='1', nullable=False))
+            batch_op.create_foreign_key(f'fk_{table}_tenant_id_cooperatives', 'cooperatives', ['tenant_id'], ['id'])
+    for name, table, columns, unique in NEW_INDEXES:
+        op.create_index(name, table, columns, unique=unique)
+    op.drop_table('task_due_counts')
+    op.drop_table('task_counts')
+    _create_aggregates(tenant=True)
+    _rebuild_fts(tenant=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _rebuild_fts(tenant=False)
+    op.drop_table('task_due_counts')
+    op.drop_table('task_counts')
+    for name, table, _, _ in reversed(NEW_INDEXES):
+        op.drop_index(name, table_name=table)
+    for table in reversed(SCOPED):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_constraint(f'fk_{table}_tenant_id_cooperatives', type_='foreignkey')
+            batch_op.drop_column('tenant_id')
+    _create_aggregates(tenant=False)
+    for name, table, columns, unique in reversed(OLD_INDEXES):
+        op.create_index(name, table, columns, unique=unique)
+    op.drop_table('cooperatives')
@@ -0,0 +1,57 @@
+"""task aggregates
+
+Revision ID: c71f5a0b8e24
+Revises: a4c8e1f03d92
+Create Date: 2026-10-18 15:03:12.480317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c71f5a0b8e24'
+down_revision: Union[str, None] = 'a4c8e1f03d92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The enum types already exist on PostgreSQL (created with the tasks table).
+STATUS = postgresql.ENUM('todo', 'in_progress', 'done', name='taskstatus', create_type=False)
+PRIORITY = postgresql.ENUM('low', 'medium', 'high', name='taskpriority', create_type=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('task_counts',
+    sa.Column('assignee_id', sa.Integer(), nullable=False),
+    sa.Column('status', STATUS, nullable=False),
+    sa.Column('priority', PRIORITY, nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('assignee_id', 'status', 'priority')
+    )
+    op.create_table('task_due_counts',
+    sa.Column('assignee_id', sa.Integer(), nullable=False),
+    sa.Column('due_date', sa.Date(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('assignee_id', 'due_date')
+    )
+    op.execute(
+        "INSERT INTO task_counts (assignee_id, status, priority, count) "
+        "SELECT coalesce(assignee_id, 0), status, priority, count(*) FROM tasks "
+        "GROUP BY coalesce(assignee_id, 0), status, priority"
+    )
+    op.execute(
+        "INSERT INTO task_due_counts (assignee_id, due_date, count) "
+        "SELECT coalesce(assignee_id, 0), due_date, count(*) FROM tasks "
+        "WHERE status IN ('todo', 'in_progress') AND due_date IS NOT NULL "
+        "GROUP BY coalesce(assignee_id, 0), due_date"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('task_due_counts')
+    op.drop_table('task_counts')
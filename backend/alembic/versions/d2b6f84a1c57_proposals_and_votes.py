@@ -0,0 +1,63 @@
+"""proposals and votes
+
+Revision ID: d2b6f84a1c57
+Revises: c71f5a0b8e24
+Create Date: 2026-10-18 16:12:40.318905
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2b6f84a1c57'
+down_revision: Union[str, None] = 'c71f5a0b8e24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CHOICE = sa.Enum('yes', 'no', 'abstain', name='votechoice')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('proposals',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('quorum', sa.Integer(), nullable=False),
+    sa.Column('closes_at', sa.DateTime(), nullable=True),
+    sa.Column('closed_at', sa.DateTime(), nullable=True),
+    sa.Column('yes_votes', sa.Integer(), nullable=False),
+    sa.Column('no_votes', sa.Integer(), nullable=False),
+    sa.Column('abstain_votes', sa.Integer(), nullable=False),
+    sa.Column('quorum_reached_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_proposals_id'), 'proposals', ['id'], unique=False)
+    op.create_index(op.f('ix_proposals_updated_at'), 'proposals', ['updated_at'], unique=False)
+    op.create_table('votes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('proposal_id', sa.Integer(), nullable=False),
+    sa.Column('member_id', sa.Integer(), nullable=False),
+    sa.Column('choice', CHOICE, nullable=False),
+    sa.Column('cast_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['member_id'], ['members.id'], ),
+    sa.ForeignKeyConstraint(['proposal_id'], ['proposals.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('proposal_id', 'member_id', name='uq_votes_proposal_id_member_id')
+    )
+    op.create_index(op.f('ix_votes_id'), 'votes', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_votes_id'), table_name='votes')
+    op.drop_table('votes')
+    CHOICE.drop(op.get_bind(), checkfirst=True)
+    op.drop_index(op.f('ix_proposals_updated_at'), table_name='proposals')
+    op.drop_index(op.f('ix_proposals_id'), table_name='proposals')
+    op.drop_table('proposals')
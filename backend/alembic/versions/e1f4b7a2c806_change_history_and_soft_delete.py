@@ -0,0 +1,65 @@
+"""change history and soft delete
+
+Revision ID: e1f4b7a2c806
+Revises: d6a2f0c4b913
+Create Date: 2026-10-18 16:02:51.204718
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1f4b7a2c806'
+down_revision: Union[str, None] = 'd6a2f0c4b913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SOFT_DELETED = ('units', 'members', 'tasks')
+# Unique indexes that now only cover rows that are not deleted.
+UNIQUE = (
+    ('ix_units_tenant_id_name', 'units', ['tenant_id', 'name']),
+    ('ix_members_tenant_id_email', 'members', ['tenant_id', 'email']),
+)
+LIVE = sa.text('deleted_at IS NULL')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('changes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tenant_id', sa.Integer(), server_default='1', nullable=False),
+    sa.Column('entity', sa.String(), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('op', sa.String(), nullable=False),
+    sa.Column('actor', sa.String(), nullable=True),
+    sa.Column('changed_at', sa.DateTime(), nullable=False),
+    sa.Column('fields', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['tenant_id'], ['cooperatives.id'], name='fk_changes_tenant_id_cooperatives'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_changes_tenant_id_entity_entity_id_id', 'changes', ['tenant_id', 'entity', 'entity_id', 'id'])
+    op.create_index('ix_changes_tenant_id_entity_changed_at_id', 'changes', ['tenant_id', 'entity', 'changed_at', 'id'])
+    for table in SOFT_DELETED:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    for name, table, columns in UNIQUE:
+        op.drop_index(name, table_name=table)
+        op.create_index(name, table, columns, unique=True, sqlite_where=LIVE, postgresql_where=LIVE)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in SOFT_DELETED:
+        op.execute(f"DELETE FROM {table} WHERE deleted_at IS NOT NULL")
+    for name, table, columns in UNIQUE:
+        op.drop_index(name, table_name=table)
+        op.create_index(name, table, columns, unique=True)
+    for table in SOFT_DELETED:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('deleted_at')
+    op.drop_index('ix_changes_tenant_id_entity_changed_at_id', table_name='changes')
+    op.drop_index('ix_changes_tenant_id_entity_entity_id_id', table_name='changes')
+    op.drop_table('changes')
@@ -0,0 +1,58 @@
+"""full-text search indexes for tasks and members
+
+Revision ID: e83c5d19a7f2
+Revises: d2b6f84a1c57
+Create Date: 2026-10-18 17:25:51.904113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e83c5d19a7f2'
+down_revision: Union[str, None] = 'd2b6f84a1c57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Kept in sync with ``app.search.SEARCHABLE``.
+SEARCHABLE = {
+    'tasks': ('title',),
+    'members': ('name', 'email'),
+}
+
+
+def _document(columns) -> str:
+    return " || ' ' || ".join(f"coalesce({column}, '')" for column in columns)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    for table, columns in SEARCHABLE.items():
+        if dialect == 'sqlite':
+            op.execute(sa.text(
+                f"CREATE VIRTUAL TABLE {table}_fts USING fts5({', '.join(columns)}, "
+                "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            ))
+            op.execute(sa.text(
+                f"INSERT INTO {table}_fts (rowid, {', '.join(columns)}) "
+                f"SELECT id, {', '.join(columns)} FROM {table}"
+            ))
+        elif dialect == 'postgresql':
+            op.execute(sa.text(
+                f"CREATE INDEX ix_{table}_search ON {table} "
+                f"USING gin (to_tsvector('simple', {_document(columns)}))"
+            ))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    for table in SEARCHABLE:
+        if dialect == 'sqlite':
+            op.execute(sa.text(f"DROP TABLE IF EXISTS {table}_fts"))
+        elif dialect == 'postgresql':
+            op.execute(sa.text(f"DROP INDEX IF EXISTS ix_{table}_search"))
@@ -0,0 +1,30 @@
+"""reminder sweep index
+
+Revision ID: f3b8d1e6a259
+Revises: e1f4b7a2c806
+Create Date: 2026-10-18 23:41:07.318264
+
+Tenant scoping replaced ``ix_tasks_status_due_date_id`` with an index led by
+``tenant_id``. The reminder sweep spans all cooperatives, so it needs the
+index without the tenant back.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b8d1e6a259'
+down_revision: Union[str, None] = 'e1f4b7a2c806'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_tasks_status_due_date_id', 'tasks', ['status', 'due_date', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tasks_status_due_date_id', table_name='tasks')
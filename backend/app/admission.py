@@ -0,0 +1,260 @@
+"""Rate limits and a cap on concurrent requests, ahead of everything else.
+
+Two checks run before a request reaches the routes:
+
+* **Rate limit.** Each client gets a token bucket per kind of request
+  (``read`` or ``write``) and top-level path, e.g. ``write /tasks``. A bucket
+  refills at ``RATE_LIMIT_READS`` or ``RATE_LIMIT_WRITES`` tokens a second
+  and holds ``RATE_LIMIT_BURST`` seconds' worth. Once a bucket is empty the
+  client gets 429 with ``Retry-After`` until it refills, so a client looping
+  ``POST /tasks/`` can still vote and read. The client is the peer address;
+  behind a proxy, run uvicorn with ``--proxy-headers`` so that it is the
+  real one. Buckets live in this process (``memory``) or in Redis, shared by
+  all workers (``redis``). If Redis cannot be reached, requests are let
+  through.
+* **Concurrency cap.** At most ``MAX_CONCURRENT_REQUESTS`` requests run at
+  once, by default the size of the connection pool. Up to
+  ``REQUEST_QUEUE_SIZE`` more wait, each for at most
+  ``REQUEST_QUEUE_TIMEOUT_MS``, and no client may hold more than half of
+  those places, so one client's burst cannot fill the queue for everyone
+  else. Others get 503 at once, instead of waiting ``DB_POOL_TIMEOUT``
+  seconds for a connection while holding a worker.
+
+Rejected requests cost no database work, so when one client floods the API
+the others keep their latency. WebSockets and ``/metrics`` are not limited.
+Counters are served at ``GET /metrics/admission``.
+"""
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+
+from starlette.responses import JSONResponse
+
+from .config import Settings
+
+logger = logging.getLogger(__name__)
+
+WRITES = {"POST", "PUT", "PATCH", "DELETE"}
+EXEMPT = ("/metrics",)
+MAX_BUCKETS = 10000
+QUEUE_SHARE = 0.5  # of the queue one client may hold
+
+
+class MemoryBackend:
+    """Token buckets of this process, the least recently used dropped first."""
+
+    def __init__(self, maxsize: int = MAX_BUCKETS, clock=time.monotonic):
+        self.maxsize = maxsize
+        self._clock = clock
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        """Take a token from ``key``; the tokens left, or below 0 if there was none."""
+        now = self._clock()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                left = tokens
+            else:
+                left = tokens - 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return left
+
+
+# Refill and take in one step, on Redis' clock so that workers agree. The
+# count is returned as a string: Lua numbers become integers on the way out.
+TAKE = """
+local rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local left = tokens - 1
+if tokens >= 1 then
+    tokens = left
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+return tostring(left)
+"""
+
+
+class RedisBackend:
+    """Token buckets shared by every worker."""
+
+    def __init__(self, url: str, prefix: str = "tc:rate:"):
+        import redis.asyncio as redis
+
+        self._redis = redis.Redis.from_url(url)
+        self._take = self._redis.register_script(TAKE)
+        self._prefix = prefix
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        try:
+            return float(await self._take(keys=[self._prefix + key], args=[rate, burst]))
+        except Exception:
+            logger.warning("rate limit check failed; letting the request through", exc_info=True)
+            return burst
+
+
+def client_of(scope) -> str:
+    return (scope.get("client") or ("unknown",))[0]
+
+
+class Gate:
+    """At most ``limit`` holders, with a bounded queue that gives up after ``timeout`` seconds.
+
+    Each client may hold at most ``share`` of the queue. Waiters are futures
+    of whichever event loop they came from, so one gate serves a whole
+    process even where several loops run in threads.
+    """
+
+    def __init__(self, limit: int, queue_size: int, timeout: float, share: float = QUEUE_SHARE):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.per_client = max(1, int(queue_size * share))
+        self.active = 0
+        self._waiters: deque = deque()
+        self._queued: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def _dequeued(self, client: str) -> None:
+        left = self._queued.pop(client) - 1
+        if left:
+            self._queued[client] = left
+
+    async def enter(self, client: str = "unknown") -> bool:
+        """Take a slot, after queueing if need be; False if the request should be shed."""
+        with self._lock:
+            if self.active < self.limit:
+                self.active += 1
+                return True
+            if len(self._waiters) >= self.queue_size or self._queued.get(client, 0) >= self.per_client:
+                return False
+            loop = asyncio.get_running_loop()
+            waiter = (loop, loop.create_future(), client)
+            self._waiters.append(waiter)
+            self._queued[client] = self._queued.get(client, 0) + 1
+        try:
+            await asyncio.wait_for(waiter[1], self.timeout)
+            return True
+        except BaseException as exc:
+            # A slot handed over just as the wait ended is ours all the same.
+            with self._lock:
+                queued = waiter in self._waiters
+                if queued:
+                    self._waiters.remove(waiter)
+                    self._dequeued(client)
+            if isinstance(exc, asyncio.TimeoutError):
+                return not queued
+            if not queued:
+                self.leave()
+            raise
+
+    def leave(self) -> None:
+        with self._lock:
+            if not self._waiters:
+                self.active -= 1
+                return
+            # Handed straight to the next waiter; ``active`` stays the same.
+            loop, future, client = self._waiters.popleft()
+            self._dequeued(client)
+        loop.call_soon_threadsafe(_wake, future)
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class Admission:
+    def __init__(self, gate: Gate, backend=None, reads: float = 20, writes: float = 5, burst: float = 5):
+        self.gate = gate
+        self.backend = backend
+        self.rates = {"read": reads, "write": writes}
+        self.burst = burst
+        self.throttled = 0
+        self.shed = 0
+
+    @classmethod
+    def from_settings(cls, config: Settings) -> "Admission":
+        if config.rate_limit_backend == "redis":
+            backend = RedisBackend(config.redis_url)
+        elif config.rate_limit_backend == "memory":
+            backend = MemoryBackend()
+        else:
+            backend = None
+        gate = Gate(
+            config.max_concurrent_requests or config.db_pool_size + config.db_max_overflow,
+            config.request_queue_size,
+            config.request_queue_timeout_ms / 1000,
+        )
+        return cls(gate, backend, config.rate_limit_reads, config.rate_limit_writes, config.rate_limit_burst)
+
+    async def retry_after(self, scope) -> int | None:
+        """Seconds until the client may send this request again, or None if it may now."""
+        if self.backend is None:
+            return None
+        kind = "write" if scope["method"] in WRITES else "read"
+        rate = self.rates[kind]
+        client = client_of(scope)
+        top = "/" + scope["path"].strip("/").split("/", 1)[0]
+        left = await self.backend.take(f"{client}:{kind}:{top}", rate, rate * self.burst)
+        if left >= 0:
+            return None
+        return max(1, math.ceil(-left / rate))
+
+    def stats(self) -> dict:
+        return {
+            "active": self.gate.active,
+            "waiting": self.gate.waiting,
+            "limit": self.gate.limit,
+            "throttled": self.throttled,
+            "shed": self.shed,
+        }
+
+
+class AdmissionMiddleware:
+    """Plain ASGI middleware; installed outermost so rejected requests do no work."""
+
+    def __init__(self, app, admission: Admission):
+        self.app = app
+        self.admission = admission
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(EXEMPT):
+            await self.app(scope, receive, send)
+            return
+        admission = self.admission
+        retry_after = await admission.retry_after(scope)
+        if retry_after is not None:
+            admission.throttled += 1
+            response = JSONResponse(
+                {"detail": "rate limit exceeded"}, 429, headers={"Retry-After": str(retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        if not await admission.gate.enter(client_of(scope)):
+            admission.shed += 1
+            response = JSONResponse({"detail": "server is busy; try again"}, 503, headers={"Retry-After": "1"})
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission.gate.leave()
@@ -0,0 +1,150 @@
+"""Precomputed task counts behind ``/metrics/dashboard`` and ``/metrics/scorecards``.
+
+Every task write in :mod:`app.crud` passes the rows it removed and added to
+:func:`record` inside its own transaction, which turns them into ``+1``/``-1``
+deltas and upserts them into two small tables:
+
+* ``task_counts``: tasks per (assignee, status, priority);
+* ``task_due_counts``: open tasks per (assignee, due date), so the overdue
+  count is a range sum over this table instead of a scan of ``tasks``.
+
+Rows are kept per cooperative, and the scoped sessions of ``app.tenancy``
+read only their own. Both tables grow with the number of members, not tasks. :func:`recompute`
+rebuilds them from ``tasks`` with one GROUP BY each and is scheduled
+periodically to correct any drift, e.g. from writes that bypassed the CRUD
+layer.
+"""
+import datetime
+from collections import Counter
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from .db import dialect_insert
+from .models import Member, Task, TaskCount, TaskDueCount, TaskPriority, TaskStatus, Unit
+
+OPEN_STATUSES = (TaskStatus.todo, TaskStatus.in_progress)
+UNASSIGNED = 0
+
+
+def _deltas(rows, sign: int, counts: Counter, due: Counter) -> None:
+    for row in rows:
+        tenant, assignee = row.tenant_id, row.assignee_id or UNASSIGNED
+        status = TaskStatus(row.status)
+        counts[(tenant, assignee, status, TaskPriority(row.priority))] += sign
+        if status in OPEN_STATUSES and row.due_date is not None:
+            due[(tenant, assignee, row.due_date)] += sign
+
+
+def _upsert(db: Session, table, keys: list[str], deltas: Counter) -> None:
+    values = [dict(zip(keys, key), count=delta) for key, delta in deltas.items() if delta]
+    if not values:
+        return
+    stmt = dialect_insert(db, table)
+    stmt = stmt.on_conflict_do_update(index_elements=keys, set_={"count": table.c.count + stmt.excluded.count})
+    db.execute(stmt, values)
+
+
+def record(db: Session, removed=(), added=()) -> None:
+    """Apply the change from ``removed`` to ``added`` task rows; the caller commits."""
+    counts, due = Counter(), Counter()
+    _deltas(removed, -1, counts, due)
+    _deltas(added, 1, counts, due)
+    _upsert(db, TaskCount.__table__, ["tenant_id", "assignee_id", "status", "priority"], counts)
+    _upsert(db, TaskDueCount.__table__, ["tenant_id", "assignee_id", "due_date"], due)
+
+
+def recompute(db: Session) -> None:
+    """Rebuild both tables from ``tasks`` for every cooperative; the caller commits.
+
+    The statements are Core, so this works the same in a scoped session,
+    and skip deleted tasks explicitly.
+    """
+    tasks = Task.__table__
+    live = tasks.c.deleted_at.is_(None)
+    assignee = func.coalesce(tasks.c.assignee_id, UNASSIGNED)
+    db.execute(delete(TaskCount.__table__))
+    db.execute(delete(TaskDueCount.__table__))
+    db.execute(insert(TaskCount.__table__).from_select(
+        ["tenant_id", "assignee_id", "status", "priority", "count"],
+        select(tasks.c.tenant_id, assignee, tasks.c.status, tasks.c.priority, func.count())
+        .where(live)
+        .group_by(tasks.c.tenant_id, assignee, tasks.c.status, tasks.c.priority),
+    ))
+    db.execute(insert(TaskDueCount.__table__).from_select(
+        ["tenant_id", "assignee_id", "due_date", "count"],
+        select(tasks.c.tenant_id, assignee, tasks.c.due_date, func.count())
+        .where(live, tasks.c.status.in_(OPEN_STATUSES), tasks.c.due_date.is_not(None))
+        .group_by(tasks.c.tenant_id, assignee, tasks.c.due_date),
+    ))
+
+
+def _empty_card() -> dict:
+    return {
+        "total": 0,
+        "open": 0,
+        "overdue": 0,
+        "by_status": {status.value: 0 for status in TaskStatus},
+        "by_priority": {priority.value: 0 for priority in TaskPriority},
+    }
+
+
+def _add(card: dict, status: TaskStatus, priority: TaskPriority, count: int) -> None:
+    card["total"] += count
+    card["by_status"][status.value] += count
+    card["by_priority"][priority.value] += count
+    if status in OPEN_STATUSES:
+        card["open"] += count
+
+
+def _overdue(db: Session, today: datetime.date) -> dict[int, int]:
+    stmt = (
+        select(TaskDueCount.assignee_id, func.sum(TaskDueCount.count))
+        .where(TaskDueCount.due_date < today)
+        .group_by(TaskDueCount.assignee_id)
+    )
+    return dict(db.execute(stmt).all())
+
+
+def dashboard(db: Session, today: datetime.date) -> dict:
+    card = _empty_card()
+    stmt = (
+        select(TaskCount.status, TaskCount.priority, func.sum(TaskCount.count))
+        .group_by(TaskCount.status, TaskCount.priority)
+    )
+    for status, priority, count in db.execute(stmt):
+        _add(card, status, priority, count)
+    card["overdue"] = sum(_overdue(db, today).values())
+    return {"as_of": today.isoformat(), "tasks": card}
+
+
+def member_cards(db: Session, today: datetime.date) -> list[dict]:
+    """One card per member plus one for unassigned tasks (``member_id`` None)."""
+    cards: dict[int, dict] = {}
+    for member_id, name, unit_id in db.execute(select(Member.id, Member.name, Member.unit_id).order_by(Member.id)):
+        cards[member_id] = {"member_id": member_id, "name": name, "unit_id": unit_id, **_empty_card()}
+    cards[UNASSIGNED] = {"member_id": None, "name": None, "unit_id": None, **_empty_card()}
+    stmt = select(TaskCount.assignee_id, TaskCount.status, TaskCount.priority, TaskCount.count)
+    for assignee, status, priority, count in db.execute(stmt):
+        if assignee in cards:
+            _add(cards[assignee], status, priority, count)
+    for assignee, count in _overdue(db, today).items():
+        if assignee in cards:
+            cards[assignee]["overdue"] = count
+    unassigned = cards.pop(UNASSIGNED)
+    return [*cards.values(), unassigned]
+
+
+def unit_cards(db: Session, today: datetime.date) -> list[dict]:
+    """Member cards summed per unit; members without a unit go to ``unit_id`` None."""
+    units = {unit_id: name for unit_id, name in db.execute(select(Unit.id, Unit.name).order_by(Unit.id))}
+    cards = {unit_id: {"unit_id": unit_id, "name": name, **_empty_card()} for unit_id, name in units.items()}
+    cards[None] = {"unit_id": None, "name": None, **_empty_card()}
+    for member in member_cards(db, today)[:-1]:
+        card = cards[member["unit_id"] if member["unit_id"] in units else None]
+        for key in ("total", "open", "overdue"):
+            card[key] += member[key]
+        for group in ("by_status", "by_priority"):
+            for name, count in member[group].items():
+                card[group][name] += count
+    return list(cards.values())
@@ -1,82 +1,571 @@
-from fastapi import FastAPI, Depends
+import asyncio
+import datetime
+from contextlib import asynccontextmanager
+from typing import Any, Literal
+
+from fastapi import APIRouter, BackgroundTasks, Body, FastAPI, Depends, Header, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import ValidationError
+from pydantic_core import to_json
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
-from . import models, schemas, crud
-from .db import engine, Base, SessionLocal
-from .dependencies import get_db
-from .demo import seed_demo_data, reset_demo_db
+from . import aggregates, fast_rows, history, models, outbox, schemas, crud, search, sync, tenancy, vote_service
+from .admission import Admission, AdmissionMiddleware
+from .cache import response_cache
+from .concurrency import PreconditionFailed, parse_if_match, version_etag, with_etag
+from .config import Settings, settings
+from .db import SessionLocal, engine, get_async_engine, pool_status
+from .dependencies import get_db, get_tenant
+from .demo import reset_demo_db
+from .events import hub, parse_topics
+from .expand import ExpansionError, cache_namespaces, parse_expand, serialize_member, serialize_task, serialize_unit
+from .idempotency import IdempotencyMiddleware
+from .instrumentation import InstrumentationMiddleware, registry
+from .ordering import ReorderError
+from .pagination import PaginationError, next_page_headers
+
+# Nothing here touches the database at import time: the schema is created by
+# ``alembic upgrade head`` or ``python -m app.cli init-db``, and connections
+# are opened on the first request that needs one.
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start the event hub up front so changes made by this worker reach the
+    # broker even before one of its own clients subscribes.
+    await hub.ensure_started()
+    yield
+    await hub.stop()
+
+
+# CRUD routes served by sync handlers; ``async_api.router`` mirrors them.
+router = APIRouter()
+
+# Everything else. Included ahead of the CRUD router so that paths such as
+# ``/tasks/bulk`` are matched before ``/tasks/{task_id}``.
+feature_router = APIRouter()
+
+
+def query_error_handler(request: Request, exc: ValueError):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+
+def status_error_handler(request: Request, exc: ValueError):
+    """Errors that carry their own ``status_code``."""
+    return JSONResponse(status_code=exc.status_code, content={"detail": str(exc)})
+
+
+def run_bulk(db: Session, schema, items: list[dict], write) -> dict:
+    """Validate each item on its own and hand the valid ones to ``write``."""
+    valid, errors = [], []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, schema.model_validate(item)))
+        except ValidationError as exc:
+            errors.append({"index": index, "detail": str(exc)})
+    rows = write(db, valid, errors) if valid else []
+    errors.sort(key=lambda error: error["index"])
+    return {"items": rows, "errors": errors}
+
+
+@feature_router.post("/units/bulk", response_model=schemas.BulkResult[schemas.Unit])
+def create_units_bulk(items: list[dict[str, Any]] = Body(...), db: Session = Depends(get_db)):
+    return run_bulk(db, schemas.UnitCreate, items, crud.bulk_create_units)
+
+@feature_router.patch("/units/bulk", response_model=schemas.BulkResult[schemas.Unit])
+def update_units_bulk(items: list[dict[str, Any]] = Body(...), db: Session = Depends(get_db)):
+    return run_bulk(db, schemas.UnitBulkUpdate, items, crud.bulk_update_units)
+
+@feature_router.delete("/units/bulk", response_model=schemas.BulkDeleteResult)
+def remove_units_bulk(body: schemas.BulkDelete, db: Session = Depends(get_db)):
+    errors = []
+    return {"deleted": crud.bulk_delete_units(db, body.ids, errors), "errors": errors}
+
+@feature_router.post("/members/bulk", response_model=schemas.BulkResult[schemas.Member])
+def create_members_bulk(items: list[dict[str, Any]] = Body(...), db: Session = Depends(get_db)):
+    return run_bulk(db, schemas.MemberCreate, items, crud.bulk_create_members)
+
+@feature_router.patch("/members/bulk", response_model=schemas.BulkResult[schemas.Member])
+def update_members_bulk(items: list[dict[str, Any]] = Body(...), db: Session = Depends(get_db)):
+    return run_bulk(db, schemas.MemberBulkUpdate, items, crud.bulk_update_members)
+
+@feature_router.delete("/members/bulk", response_model=schemas.BulkDeleteResult)
+def remove_members_bulk(body: schemas.BulkDelete, db: Session = Depends(get_db)):
+    errors = []
+    return {"deleted": crud.bulk_delete_members(db, body.ids, errors), "errors": errors}
+
+@feature_router.post("/tasks/bulk", response_model=schemas.BulkResult[schemas.Task])
+def create_tasks_bulk(items: list[dict[str, Any]] = Body(...), db: Session = Depends(get_db)):
+    return run_bulk(db, schemas.TaskCreate, items, crud.bulk_create_tasks)
+
+@feature_router.patch("/tasks/bulk", response_model=schemas.BulkResult[schemas.Task])
+def update_tasks_bulk(items: list[dict[str, Any]] = Body(...), db: Session = Depends(get_db)):
+    return run_bulk(db, schemas.TaskBulkUpdate, items, crud.bulk_update_tasks)
+
+@feature_router.delete("/tasks/bulk", response_model=schemas.BulkDeleteResult)
+def remove_tasks_bulk(body: schemas.BulkDelete, db: Session = Depends(get_db)):
+    errors = []
+    return {"deleted": crud.bulk_delete_tasks(db, body.ids, errors), "errors": errors}
 
-Base.metadata.create_all(bind=engine)
 
-# Seed demo data if database is empty
-with SessionLocal() as session:
-    if not session.query(models.Unit).first():
-        seed_demo_data(session)
+# Reordering touches one row per move; a lane whose keys got too close is
+# respaced after the response is sent.
 
-app = FastAPI()
+@feature_router.patch("/tasks/reorder", response_model=schemas.Task)
+def reorder_task(move: schemas.TaskReorder, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    task, dense = crud.reorder_task(db, move)
+    if dense:
+        background_tasks.add_task(crud.rebalance_lane_job, task.lane_id)
+    return task
 
-@app.post("/units/", response_model=schemas.Unit)
+@feature_router.patch("/tasks/reorder/batch", response_model=schemas.BulkResult[schemas.Task])
+def reorder_tasks(background_tasks: BackgroundTasks, items: list[dict[str, Any]] = Body(...), db: Session = Depends(get_db)):
+    def write(db, moves, errors):
+        tasks, dense_lanes = crud.reorder_tasks(db, moves, errors)
+        for lane_id in sorted(dense_lanes):
+            background_tasks.add_task(crud.rebalance_lane_job, lane_id)
+        return tasks
+
+    return run_bulk(db, schemas.TaskReorder, items, write)
+
+
+@router.post("/units/", response_model=schemas.Unit)
 def create_unit(unit: schemas.UnitCreate, db: Session = Depends(get_db)):
     return crud.create_unit(db, unit)
 
-@app.get("/units/", response_model=list[schemas.Unit])
-def read_units(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_units(db, skip=skip, limit=limit)
+@router.get("/units/", response_model=list[schemas.UnitExpanded], response_model_exclude_unset=True)
+def read_units(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    sort: str = "id",
+    expand: str | None = None,
+    db: Session = Depends(get_db),
+):
+    fields = parse_expand("units", expand)
+    key, cached = response_cache.lookup(request, cache_namespaces("units", fields))
+    if cached:
+        return cached
+    plain = fast_rows.use_for(fields)
+    rows = crud.get_units(
+        db, skip=skip, limit=limit, cursor=cursor, sort=sort, expand=fields, plain=plain,
+    )
+    body = fast_rows.encode("units", rows) if plain else to_json([serialize_unit(row, fields) for row in rows])
+    return response_cache.store(key, request, body, next_page_headers(rows, sort, crud.UNIT_SORTS, limit))
 
-@app.get("/units/{unit_id}", response_model=schemas.Unit | None)
-def read_unit(unit_id: int, db: Session = Depends(get_db)):
-    return crud.get_unit(db, unit_id)
+@router.get("/units/{unit_id}", response_model=schemas.UnitExpanded | None, response_model_exclude_unset=True)
+def read_unit(request: Request, unit_id: int, expand: str | None = None, db: Session = Depends(get_db)):
+    fields = parse_expand("units", expand)
+    key, cached = response_cache.lookup(request, cache_namespaces("units", fields))
+    if cached:
+        return cached
+    obj = crud.get_unit(db, unit_id, expand=fields)
+    body = to_json(obj and serialize_unit(obj, fields))
+    return response_cache.store(key, request, body, etag=version_etag(obj, fields))
 
-@app.put("/units/{unit_id}", response_model=schemas.Unit | None)
-def update_unit(unit_id: int, unit: schemas.UnitUpdate, db: Session = Depends(get_db)):
-    return crud.update_unit(db, unit_id, unit)
+@router.put("/units/{unit_id}", response_model=schemas.Unit | None)
+def update_unit(
+    unit_id: int,
+    unit: schemas.UnitUpdate,
+    response: Response,
+    if_match: str | None = Header(None),
+    db: Session = Depends(get_db),
+):
+    obj = crud.update_unit(db, unit_id, unit, versions=parse_if_match(if_match))
+    return with_etag(response, obj)
 
-@app.delete("/units/{unit_id}", response_model=schemas.Unit | None)
+@router.delete("/units/{unit_id}", response_model=schemas.Unit | None)
 def remove_unit(unit_id: int, db: Session = Depends(get_db)):
     return crud.delete_unit(db, unit_id)
 
-@app.post("/members/", response_model=schemas.Member)
+@router.post("/members/", response_model=schemas.Member)
 def create_member(member: schemas.MemberCreate, db: Session = Depends(get_db)):
     return crud.create_member(db, member)
 
-@app.get("/members/", response_model=list[schemas.Member])
-def read_members(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_members(db, skip=skip, limit=limit)
+@router.get("/members/", response_model=list[schemas.MemberExpanded], response_model_exclude_unset=True)
+def read_members(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    sort: str = "id",
+    expand: str | None = None,
+    db: Session = Depends(get_db),
+):
+    fields = parse_expand("members", expand)
+    key, cached = response_cache.lookup(request, cache_namespaces("members", fields))
+    if cached:
+        return cached
+    plain = fast_rows.use_for(fields)
+    rows = crud.get_members(
+        db, skip=skip, limit=limit, cursor=cursor, sort=sort, expand=fields, plain=plain,
+    )
+    if plain:
+        body = fast_rows.encode("members", rows)
+    else:
+        body = to_json([serialize_member(row, fields) for row in rows])
+    return response_cache.store(key, request, body, next_page_headers(rows, sort, crud.MEMBER_SORTS, limit))
 
-@app.get("/members/{member_id}", response_model=schemas.Member | None)
-def read_member(member_id: int, db: Session = Depends(get_db)):
-    return crud.get_member(db, member_id)
+@router.get("/members/{member_id}", response_model=schemas.MemberExpanded | None, response_model_exclude_unset=True)
+def read_member(request: Request, member_id: int, expand: str | None = None, db: Session = Depends(get_db)):
+    fields = parse_expand("members", expand)
+    key, cached = response_cache.lookup(request, cache_namespaces("members", fields))
+    if cached:
+        return cached
+    obj = crud.get_member(db, member_id, expand=fields)
+    body = to_json(obj and serialize_member(obj, fields))
+    return response_cache.store(key, request, body, etag=version_etag(obj, fields))
 
-@app.put("/members/{member_id}", response_model=schemas.Member | None)
-def update_member(member_id: int, member: schemas.MemberUpdate, db: Session = Depends(get_db)):
-    return crud.update_member(db, member_id, member)
+@router.put("/members/{member_id}", response_model=schemas.Member | None)
+def update_member(
+    member_id: int,
+    member: schemas.MemberUpdate,
+    response: Response,
+    if_match: str | None = Header(None),
+    db: Session = Depends(get_db),
+):
+    obj = crud.update_member(db, member_id, member, versions=parse_if_match(if_match))
+    return with_etag(response, obj)
 
-@app.delete("/members/{member_id}", response_model=schemas.Member | None)
+@router.delete("/members/{member_id}", response_model=schemas.Member | None)
 def remove_member(member_id: int, db: Session = Depends(get_db)):
     return crud.delete_member(db, member_id)
 
 
-@app.post("/tasks/", response_model=schemas.Task)
+@router.post("/lanes/", response_model=schemas.Lane)
+def create_lane(lane: schemas.LaneCreate, db: Session = Depends(get_db)):
+    return crud.create_lane(db, lane)
+
+@router.get("/lanes/", response_model=list[schemas.Lane])
+def read_lanes(db: Session = Depends(get_db)):
+    return crud.get_lanes(db)
+
+@router.get("/lanes/{lane_id}", response_model=schemas.Lane | None)
+def read_lane(lane_id: int, db: Session = Depends(get_db)):
+    return crud.get_lane(db, lane_id)
+
+@router.put("/lanes/{lane_id}", response_model=schemas.Lane | None)
+def update_lane(lane_id: int, lane: schemas.LaneUpdate, db: Session = Depends(get_db)):
+    return crud.update_lane(db, lane_id, lane)
+
+@router.delete("/lanes/{lane_id}", response_model=schemas.Lane | None)
+def remove_lane(lane_id: int, db: Session = Depends(get_db)):
+    return crud.delete_lane(db, lane_id)
+
+
+@router.post("/tasks/", response_model=schemas.Task)
 def create_task(task: schemas.TaskCreate, db: Session = Depends(get_db)):
     return crud.create_task(db, task)
 
 
-@app.get("/tasks/", response_model=list[schemas.Task])
-def read_tasks(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_tasks(db, skip=skip, limit=limit)
+@router.get("/tasks/", response_model=list[schemas.TaskExpanded], response_model_exclude_unset=True)
+def read_tasks(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    sort: str = "id",
+    status: models.TaskStatus | None = None,
+    priority: models.TaskPriority | None = None,
+    assignee_id: int | None = None,
+    due_from: datetime.date | None = None,
+    due_to: datetime.date | None = None,
+    lane_id: int | None = None,
+    expand: str | None = None,
+    db: Session = Depends(get_db),
+):
+    fields = parse_expand("tasks", expand)
+    key, cached = response_cache.lookup(request, cache_namespaces("tasks", fields))
+    if cached:
+        return cached
+    plain = fast_rows.use_for(fields)
+    rows = crud.get_tasks(
+        db, skip=skip, limit=limit, cursor=cursor, sort=sort, status=status,
+        priority=priority, assignee_id=assignee_id, due_from=due_from, due_to=due_to,
+        lane_id=lane_id, expand=fields, plain=plain,
+    )
+    body = fast_rows.encode("tasks", rows) if plain else to_json([serialize_task(row, fields) for row in rows])
+    return response_cache.store(key, request, body, next_page_headers(rows, sort, crud.TASK_SORTS, limit))
 
 
-@app.get("/tasks/{task_id}", response_model=schemas.Task | None)
-def read_task(task_id: int, db: Session = Depends(get_db)):
-    return crud.get_task(db, task_id)
+@router.get("/tasks/{task_id}", response_model=schemas.TaskExpanded | None, response_model_exclude_unset=True)
+def read_task(request: Request, task_id: int, expand: str | None = None, db: Session = Depends(get_db)):
+    fields = parse_expand("tasks", expand)
+    key, cached = response_cache.lookup(request, cache_namespaces("tasks", fields))
+    if cached:
+        return cached
+    obj = crud.get_task(db, task_id, expand=fields)
+    body = to_json(obj and serialize_task(obj, fields))
+    return response_cache.store(key, request, body, etag=version_etag(obj, fields))
 
 
-@app.delete("/tasks/{task_id}", response_model=schemas.Task | None)
+@router.patch("/tasks/{task_id}", response_model=schemas.Task | None)
+def update_task(
+    task_id: int,
+    task: schemas.TaskPatch,
+    response: Response,
+    if_match: str | None = Header(None),
+    db: Session = Depends(get_db),
+):
+    obj = crud.update_task(db, task_id, task, versions=parse_if_match(if_match))
+    return with_etag(response, obj)
+
+
+@router.delete("/tasks/{task_id}", response_model=schemas.Task | None)
 def remove_task(task_id: int, db: Session = Depends(get_db)):
     return crud.delete_task(db, task_id)
 
 
-@app.post("/demo/reset")
+# Cooperatives (tenants). These are not scoped: any client may list them and
+# pick one with the ``X-Cooperative-Id`` header.
+
+@feature_router.post("/cooperatives/", response_model=schemas.Cooperative)
+def create_cooperative(cooperative: schemas.CooperativeCreate, db: Session = Depends(get_db)):
+    return crud.create_cooperative(db, cooperative)
+
+@feature_router.get("/cooperatives/", response_model=list[schemas.Cooperative])
+def read_cooperatives(db: Session = Depends(get_db)):
+    return crud.get_cooperatives(db)
+
+
+# Proposals and ballots. Results are read from counters kept on the proposal
+# row and are never cached; ``/ws?topics=proposals`` announces changes.
+
+@feature_router.post("/proposals/", response_model=schemas.Proposal)
+def create_proposal(proposal: schemas.ProposalCreate, db: Session = Depends(get_db)):
+    return crud.create_proposal(db, proposal)
+
+@feature_router.get("/proposals/", response_model=list[schemas.Proposal])
+def read_proposals(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    return crud.get_proposals(db, skip=skip, limit=limit)
+
+@feature_router.get("/proposals/{proposal_id}", response_model=schemas.Proposal | None)
+def read_proposal(proposal_id: int, db: Session = Depends(get_db)):
+    return crud.get_proposal(db, proposal_id)
+
+@feature_router.post("/proposals/{proposal_id}/votes", response_model=schemas.ProposalResults, status_code=201)
+def cast_vote(proposal_id: int, vote: schemas.VoteCreate, db: Session = Depends(get_db)):
+    return vote_service.cast_vote(db, proposal_id, vote.member_id, vote.choice)
+
+@feature_router.get("/proposals/{proposal_id}/results", response_model=schemas.ProposalResults)
+def read_results(proposal_id: int, db: Session = Depends(get_db)):
+    return vote_service.get_results(db, proposal_id)
+
+@feature_router.post("/proposals/{proposal_id}/close", response_model=schemas.ProposalResults)
+def close_proposal(proposal_id: int, db: Session = Depends(get_db)):
+    return vote_service.close_proposal(db, proposal_id)
+
+
+@feature_router.get("/search", response_model=schemas.SearchResults, response_model_exclude_unset=True)
+def search_entities(
+    request: Request,
+    q: str,
+    type: Literal["all", "tasks", "members"] = "all",
+    mode: Literal["full", "prefix"] = "full",
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """Ranked matches; ``mode=prefix`` matches word prefixes for typeahead."""
+    tables = tuple(search.SEARCHABLE) if type == "all" else (type,)
+    key, cached = response_cache.lookup(request, set(tables))
+    if cached:
+        return cached
+    hits = search.search(db, q, tables, prefix=mode == "prefix", limit=limit)
+    return response_cache.store(key, request, to_json(hits))
+
+
+@feature_router.get("/export/{entity}")
+def export_entity(
+    entity: Literal["units", "members", "tasks"],
+    format: Literal["ndjson", "csv"] = "ndjson",
+    updated_since: datetime.datetime | None = None,
+    tenant_id: int = Depends(get_tenant),
+):
+    """Stream a whole table; pass the returned watermark as ``updated_since`` next time.
+
+    Incremental exports also list the rows deleted since, with ``deleted_at`` set.
+    The watermark lags the request by ``sync.OVERLAP``: a transaction that
+    stamped ``updated_at`` earlier may commit after this export read the
+    table. Rows in the overlap are exported again, so consumers upsert.
+    """
+    watermark = models.utcnow() - sync.OVERLAP
+    from . import export
+
+    stream = export.STREAMS[format](export.EXPORT_MODELS[entity], _naive_utc(updated_since), tenant_id=tenant_id)
+    return StreamingResponse(
+        stream,
+        media_type=export.MEDIA_TYPES[format],
+        headers={"X-Export-Watermark": watermark.isoformat()},
+    )
+
+
+def _naive_utc(value: datetime.datetime | None) -> datetime.datetime | None:
+    """A query-string timestamp as the naive UTC the database stores."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return value
+
+
+HistoryEntity = Literal["units", "members", "lanes", "tasks", "proposals"]
+
+
+@feature_router.get("/history/{entity}", response_model=list[schemas.Change])
+def read_history(
+    response: Response,
+    entity: HistoryEntity,
+    since: datetime.datetime | None = None,
+    until: datetime.datetime | None = None,
+    actor: str | None = None,
+    cursor: str | None = None,
+    sort: Literal["changed_at", "-changed_at"] = "changed_at",
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+):
+    """Changes to ``entity`` with ``since <= changed_at < until``; see ``app.history``."""
+    rows = history.between(db, entity, _naive_utc(since), _naive_utc(until), actor, cursor, sort, limit)
+    response.headers.update(next_page_headers(rows, sort, history.SORTS, limit))
+    return [history.entry(row) for row in rows]
+
+
+@feature_router.get("/history/{entity}/{entity_id}", response_model=list[schemas.Change])
+def read_row_history(entity: HistoryEntity, entity_id: int, db: Session = Depends(get_db)):
+    """Every change to one row, oldest first, with the values each replaced."""
+    return history.for_row(db, entity, entity_id)
+
+
+@feature_router.get("/sync")
+def sync_changes(
+    request: Request, token: str | None = None, entities: str | None = None, db: Session = Depends(get_db),
+):
+    """Rows created, updated or deleted since ``token``; see ``app.sync``."""
+    body = sync.delta(db, sync.parse_token(token), sync.parse_entities(entities))
+    return sync.compressed(fast_rows.dumps(body), request.headers.get("Accept-Encoding"))
+
+
+def _websocket_tenant(header: str | None) -> int:
+    with SessionLocal() as db:
+        return tenancy.use(db, header)
+
+
+@feature_router.websocket("/ws")
+async def live_updates(websocket: WebSocket, topics: str | None = None, cooperative_id: str | None = None):
+    """Change events of one cooperative; browsers, which cannot set headers here, pass ``?cooperative_id=``."""
+    try:
+        wanted = parse_topics(topics)
+        tenant_id = await run_in_threadpool(_websocket_tenant, websocket.headers.get(tenancy.HEADER, cooperative_id))
+    except ValueError as exc:
+        await websocket.close(code=1008, reason=str(exc))
+        return
+    await websocket.accept()
+    await hub.ensure_started()
+    subscriber = hub.subscribe(wanted, tenant_id)
+
+    async def forward():
+        while True:
+            await websocket.send_text(await subscriber.queue.get())
+
+    async def drain():
+        # Clients do not send anything; this only notices the disconnect.
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+
+    tasks = [asyncio.create_task(forward()), asyncio.create_task(drain())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        hub.unsubscribe(subscriber)
+
+
+@feature_router.get("/metrics")
+def read_prometheus_metrics():
+    """Request and SQL counters in the Prometheus text format (``INSTRUMENTATION=1``)."""
+    return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@feature_router.get("/metrics/pool")
+def read_pool_metrics():
+    if settings.db_async:
+        return pool_status(get_async_engine().sync_engine)
+    return pool_status(engine)
+
+
+@feature_router.get("/metrics/cache")
+def read_cache_metrics():
+    return response_cache.stats()
+
+
+@feature_router.get("/metrics/events")
+def read_event_metrics():
+    return hub.stats()
+
+
+@feature_router.get("/metrics/admission")
+def read_admission_metrics(request: Request):
+    """Requests running and queued in this worker, and how many were turned away."""
+    return request.app.state.admission.stats()
+
+
+@feature_router.get("/metrics/outbox")
+def read_outbox_metrics(db: Session = Depends(get_db)):
+    """The backlog, plus the counters of a relay running in this process."""
+    return {**outbox.backlog(db), "relay": outbox.relay.metrics.snapshot()}
+
+
+# Served from the precomputed aggregates, so the cost does not grow with the
+# number of tasks; cached like the other GET routes.
+
+@feature_router.get("/metrics/dashboard")
+def read_dashboard(request: Request, db: Session = Depends(get_db)):
+    key, cached = response_cache.lookup(request, {"tasks"})
+    if cached:
+        return cached
+    return response_cache.store(key, request, to_json(aggregates.dashboard(db, models.utcnow().date())))
+
+
+@feature_router.get("/metrics/scorecards")
+def read_scorecards(request: Request, group: Literal["member", "unit"] = "member", db: Session = Depends(get_db)):
+    key, cached = response_cache.lookup(request, {"tasks", "members", "units"})
+    if cached:
+        return cached
+    cards = aggregates.member_cards if group == "member" else aggregates.unit_cards
+    return response_cache.store(key, request, to_json(cards(db, models.utcnow().date())))
+
+
+@feature_router.post("/demo/reset")
 def demo_reset():
     reset_demo_db()
     return {"detail": "database reset"}
+
+
+def create_app(config: Settings = settings) -> FastAPI:
+    app = FastAPI(lifespan=lifespan)
+    app.add_middleware(IdempotencyMiddleware, config=config)
+    if config.instrumentation:
+        app.add_middleware(InstrumentationMiddleware, config=config)
+    # Added last, so it runs first: rejected requests never reach the others.
+    app.state.admission = Admission.from_settings(config)
+    app.add_middleware(AdmissionMiddleware, admission=app.state.admission)
+    for error in (PaginationError, ExpansionError, ReorderError, search.SearchError):
+        app.add_exception_handler(error, query_error_handler)
+    for error in (
+        vote_service.VoteError, PreconditionFailed, tenancy.TenantError, sync.SyncError, crud.MissingReference,
+    ):
+        app.add_exception_handler(error, status_error_handler)
+    app.include_router(feature_router)
+    if config.db_async:
+        from .async_api import router as async_router
+
+        app.include_router(async_router)
+    else:
+        app.include_router(router)
+    return app
+
+
+app = create_app()
@@ -0,0 +1,204 @@
+import datetime
+
+from fastapi import APIRouter, Depends, Header, Request, Response
+from pydantic_core import to_json
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import async_crud, crud, fast_rows, models, schemas
+from .cache import response_cache
+from .concurrency import parse_if_match, version_etag, with_etag
+from .dependencies import get_async_db
+from .expand import cache_namespaces, parse_expand, serialize_member, serialize_task, serialize_unit
+from .pagination import next_page_headers
+
+# ``async def`` versions of the CRUD routes in ``api.router``; mounted instead
+# of them when ``settings.db_async`` is enabled.
+router = APIRouter()
+
+
+@router.post("/units/", response_model=schemas.Unit)
+async def create_unit(unit: schemas.UnitCreate, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.create_unit(db, unit)
+
+@router.get("/units/", response_model=list[schemas.UnitExpanded], response_model_exclude_unset=True)
+async def read_units(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    sort: str = "id",
+    expand: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    fields = parse_expand("units", expand)
+    key, cached = response_cache.lookup(request, cache_namespaces("units", fields))
+    if cached:
+        return cached
+    plain = fast_rows.use_for(fields)
+    rows = await async_crud.get_units(
+        db, skip=skip, limit=limit, cursor=cursor, sort=sort, expand=fields, plain=plain,
+    )
+    body = fast_rows.encode("units", rows) if plain else to_json([serialize_unit(row, fields) for row in rows])
+    return response_cache.store(key, request, body, next_page_headers(rows, sort, crud.UNIT_SORTS, limit))
+
+@router.get("/units/{unit_id}", response_model=schemas.UnitExpanded | None, response_model_exclude_unset=True)
+async def read_unit(request: Request, unit_id: int, expand: str | None = None, db: AsyncSession = Depends(get_async_db)):
+    fields = parse_expand("units", expand)
+    key, cached = response_cache.lookup(request, cache_namespaces("units", fields))
+    if cached:
+        return cached
+    obj = await async_crud.get_unit(db, unit_id, expand=fields)
+    body = to_json(obj and serialize_unit(obj, fields))
+    return response_cache.store(key, request, body, etag=version_etag(obj, fields))
+
+@router.put("/units/{unit_id}", response_model=schemas.Unit | None)
+async def update_unit(
+    unit_id: int,
+    unit: schemas.UnitUpdate,
+    response: Response,
+    if_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    obj = await async_crud.update_unit(db, unit_id, unit, versions=parse_if_match(if_match))
+    return with_etag(response, obj)
+
+@router.delete("/units/{unit_id}", response_model=schemas.Unit | None)
+async def remove_unit(unit_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.delete_unit(db, unit_id)
+
+@router.post("/members/", response_model=schemas.Member)
+async def create_member(member: schemas.MemberCreate, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.create_member(db, member)
+
+@router.get("/members/", response_model=list[schemas.MemberExpanded], response_model_exclude_unset=True)
+async def read_members(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    sort: str = "id",
+    expand: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    fields = parse_expand("members", expand)
+    key, cached = response_cache.lookup(request, cache_namespaces("members", fields))
+    if cached:
+        return cached
+    plain = fast_rows.use_for(fields)
+    rows = await async_crud.get_members(
+        db, skip=skip, limit=limit, cursor=cursor, sort=sort, expand=fields, plain=plain,
+    )
+    if plain:
+        body = fast_rows.encode("members", rows)
+    else:
+        body = to_json([serialize_member(row, fields) for row in rows])
+    return response_cache.store(key, request, body, next_page_headers(rows, sort, crud.MEMBER_SORTS, limit))
+
+@router.get("/members/{member_id}", response_model=schemas.MemberExpanded | None, response_model_exclude_unset=True)
+async def read_member(request: Request, member_id: int, expand: str | None = None, db: AsyncSession = Depends(get_async_db)):
+    fields = parse_expand("members", expand)
+    key, cached = response_cache.lookup(request, cache_namespaces("members", fields))
+    if cached:
+        return cached
+    obj = await async_crud.get_member(db, member_id, expand=fields)
+    body = to_json(obj and serialize_member(obj, fields))
+    return response_cache.store(key, request, body, etag=version_etag(obj, fields))
+
+@router.put("/members/{member_id}", response_model=schemas.Member | None)
+async def update_member(
+    member_id: int,
+    member: schemas.MemberUpdate,
+    response: Response,
+    if_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    obj = await async_crud.update_member(db, member_id, member, versions=parse_if_match(if_match))
+    return with_etag(response, obj)
+
+@router.delete("/members/{member_id}", response_model=schemas.Member | None)
+async def remove_member(member_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.delete_member(db, member_id)
+
+
+@router.post("/lanes/", response_model=schemas.Lane)
+async def create_lane(lane: schemas.LaneCreate, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.create_lane(db, lane)
+
+@router.get("/lanes/", response_model=list[schemas.Lane])
+async def read_lanes(db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.get_lanes(db)
+
+@router.get("/lanes/{lane_id}", response_model=schemas.Lane | None)
+async def read_lane(lane_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.get_lane(db, lane_id)
+
+@router.put("/lanes/{lane_id}", response_model=schemas.Lane | None)
+async def update_lane(lane_id: int, lane: schemas.LaneUpdate, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.update_lane(db, lane_id, lane)
+
+@router.delete("/lanes/{lane_id}", response_model=schemas.Lane | None)
+async def remove_lane(lane_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.delete_lane(db, lane_id)
+
+
+@router.post("/tasks/", response_model=schemas.Task)
+async def create_task(task: schemas.TaskCreate, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.create_task(db, task)
+
+
+@router.get("/tasks/", response_model=list[schemas.TaskExpanded], response_model_exclude_unset=True)
+async def read_tasks(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    sort: str = "id",
+    status: models.TaskStatus | None = None,
+    priority: models.TaskPriority | None = None,
+    assignee_id: int | None = None,
+    due_from: datetime.date | None = None,
+    due_to: datetime.date | None = None,
+    lane_id: int | None = None,
+    expand: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    fields = parse_expand("tasks", expand)
+    key, cached = response_cache.lookup(request, cache_namespaces("tasks", fields))
+    if cached:
+        return cached
+    plain = fast_rows.use_for(fields)
+    rows = await async_crud.get_tasks(
+        db, skip=skip, limit=limit, cursor=cursor, sort=sort, status=status,
+        priority=priority, assignee_id=assignee_id, due_from=due_from, due_to=due_to,
+        lane_id=lane_id, expand=fields, plain=plain,
+    )
+    body = fast_rows.encode("tasks", rows) if plain else to_json([serialize_task(row, fields) for row in rows])
+    return response_cache.store(key, request, body, next_page_headers(rows, sort, crud.TASK_SORTS, limit))
+
+
+@router.get("/tasks/{task_id}", response_model=schemas.TaskExpanded | None, response_model_exclude_unset=True)
+async def read_task(request: Request, task_id: int, expand: str | None = None, db: AsyncSession = Depends(get_async_db)):
+    fields = parse_expand("tasks", expand)
+    key, cached = response_cache.lookup(request, cache_namespaces("tasks", fields))
+    if cached:
+        return cached
+    obj = await async_crud.get_task(db, task_id, expand=fields)
+    body = to_json(obj and serialize_task(obj, fields))
+    return response_cache.store(key, request, body, etag=version_etag(obj, fields))
+
+
+@router.patch("/tasks/{task_id}", response_model=schemas.Task | None)
+async def update_task(
+    task_id: int,
+    task: schemas.TaskPatch,
+    response: Response,
+    if_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    obj = await async_crud.update_task(db, task_id, task, versions=parse_if_match(if_match))
+    return with_etag(response, obj)
+
+
+@router.delete("/tasks/{task_id}", response_model=schemas.Task | None)
+async def remove_task(task_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.delete_task(db, task_id)
@@ -0,0 +1,82 @@
+"""Awaitable counterparts of :mod:`app.crud`.
+
+Each function runs the sync implementation through ``AsyncSession.run_sync``,
+which drives the same ORM code over the asyncio driver without blocking the
+event loop, so query building and persistence rules live in one place.
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud, models, schemas
+from .expand import load_options
+
+# Unit CRUD
+
+async def create_unit(db: AsyncSession, unit: schemas.UnitCreate) -> models.Unit:
+    return await db.run_sync(crud.create_unit, unit)
+
+async def get_units(db: AsyncSession, **params):
+    return await db.run_sync(crud.get_units, **params)
+
+async def get_unit(db: AsyncSession, unit_id: int, expand: frozenset = frozenset()):
+    return await db.get(models.Unit, unit_id, options=load_options("units", expand))
+
+async def update_unit(db: AsyncSession, unit_id: int, unit: schemas.UnitCreate, versions=None):
+    return await db.run_sync(crud.update_unit, unit_id, unit, versions)
+
+async def delete_unit(db: AsyncSession, unit_id: int):
+    return await db.run_sync(crud.delete_unit, unit_id)
+
+# Member CRUD
+
+async def create_member(db: AsyncSession, member: schemas.MemberCreate) -> models.Member:
+    return await db.run_sync(crud.create_member, member)
+
+async def get_members(db: AsyncSession, **params):
+    return await db.run_sync(crud.get_members, **params)
+
+async def get_member(db: AsyncSession, member_id: int, expand: frozenset = frozenset()):
+    return await db.get(models.Member, member_id, options=load_options("members", expand))
+
+async def update_member(db: AsyncSession, member_id: int, member: schemas.MemberCreate, versions=None):
+    return await db.run_sync(crud.update_member, member_id, member, versions)
+
+async def delete_member(db: AsyncSession, member_id: int):
+    return await db.run_sync(crud.delete_member, member_id)
+
+# Lane CRUD
+
+async def create_lane(db: AsyncSession, lane: schemas.LaneCreate) -> models.Lane:
+    return await db.run_sync(crud.create_lane, lane)
+
+async def get_lanes(db: AsyncSession):
+    return await db.run_sync(crud.get_lanes)
+
+async def get_lane(db: AsyncSession, lane_id: int):
+    return await db.get(models.Lane, lane_id)
+
+async def update_lane(db: AsyncSession, lane_id: int, lane: schemas.LaneUpdate):
+    return await db.run_sync(crud.update_lane, lane_id, lane)
+
+async def delete_lane(db: AsyncSession, lane_id: int):
+    return await db.run_sync(crud.delete_lane, lane_id)
+
+# Task CRUD
+
+async def create_task(db: AsyncSession, task: schemas.TaskCreate) -> models.Task:
+    return await db.run_sync(crud.create_task, task)
+
+
+async def get_tasks(db: AsyncSession, **params):
+    return await db.run_sync(crud.get_tasks, **params)
+
+
+async def get_task(db: AsyncSession, task_id: int, expand: frozenset = frozenset()):
+    return await db.get(models.Task, task_id, options=load_options("tasks", expand))
+
+
+async def update_task(db: AsyncSession, task_id: int, task: schemas.TaskPatch, versions=None):
+    return await db.run_sync(crud.update_task, task_id, task, versions)
+
+
+async def delete_task(db: AsyncSession, task_id: int):
+    return await db.run_sync(crud.delete_task, task_id)
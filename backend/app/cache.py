@@ -0,0 +1,204 @@
+"""Read-through cache for the GET routes.
+
+Cached responses are keyed by the request URL plus a *generation* counter per
+namespace (``units``, ``members``, ``tasks``) the response depends on. The
+CRUD mutation paths bump the generations they touch, which retires every
+dependent entry at once without having to find or delete them; stale entries
+simply age out of the LRU or expire.
+
+The cache fails open: if the backend cannot be reached, reads are served
+uncached and writes go through, with the error logged and counted.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import Request, Response
+
+from .config import Settings, settings
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBackend:
+    """Per-process LRU with a TTL on each entry."""
+
+    def __init__(self, maxsize: int = 2048):
+        self.maxsize = maxsize
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def counters(self, keys: list[str]) -> list[int]:
+        with self._lock:
+            return [self._counters.get(key, 0) for key in keys]
+
+    def incr(self, key: str) -> None:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisBackend:
+    """Shared cache so an invalidation in one worker is seen by all of them."""
+
+    def __init__(self, url: str, prefix: str = "tc:cache:"):
+        import redis
+
+        # Short timeouts: an unreachable Redis should cost a request little
+        # more than a cache miss.
+        self._redis = redis.Redis.from_url(url, socket_connect_timeout=0.5, socket_timeout=0.5)
+        self._prefix = prefix
+        self.evictions = 0  # handled by Redis' own maxmemory policy
+
+    def get(self, key: str) -> bytes | None:
+        return self._redis.get(self._prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        self._redis.set(self._prefix + key, value, ex=ttl)
+
+    def counters(self, keys: list[str]) -> list[int]:
+        return [int(value or 0) for value in self._redis.mget([self._prefix + key for key in keys])]
+
+    def incr(self, key: str) -> None:
+        self._redis.incr(self._prefix + key)
+
+    def __len__(self) -> int:
+        return 0
+
+
+class NullBackend(MemoryBackend):
+    """Stores nothing; ETags and 304 responses still work."""
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        pass
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in tags or "*" in tags
+
+
+class ResponseCache:
+    def __init__(self, backend, ttl: int = 30):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @classmethod
+    def from_settings(cls, config: Settings) -> "ResponseCache":
+        if config.cache_backend == "redis":
+            backend = RedisBackend(config.redis_url)
+        elif config.cache_backend == "none":
+            backend = NullBackend()
+        else:
+            backend = MemoryBackend(config.cache_maxsize)
+        return cls(backend, config.cache_ttl)
+
+    def _failed(self, action: str) -> None:
+        self.errors += 1
+        logger.warning("response cache %s failed; continuing without it", action, exc_info=True)
+
+    def invalidate(self, *namespaces: str) -> None:
+        """Retire the entries that depend on ``namespaces``; called after a commit, so it never raises."""
+        for namespace in namespaces:
+            try:
+                self.backend.incr(f"gen:{namespace}")
+            except Exception:
+                self._failed("invalidation")
+
+    def _key(self, request: Request, namespaces: set[str]) -> str:
+        names = sorted(namespaces)
+        generations = self.backend.counters([f"gen:{name}" for name in names])
+        # Set by ``get_db``: the same URL reads different rows per cooperative.
+        tenant = getattr(request.state, "tenant_id", None)
+        url = f"{tenant}:{request.url.path}?{request.url.query}"
+        digest = hashlib.blake2b(url.encode(), digest_size=16).hexdigest()
+        return f"resp:{digest}:" + ",".join(f"{n}={g}" for n, g in zip(names, generations))
+
+    def _respond(self, request: Request, body: bytes, etag: str, headers: dict) -> Response:
+        headers = {**headers, "ETag": etag}
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def lookup(self, request: Request, namespaces: set[str]) -> tuple[str | None, Response | None]:
+        """Return the cache key and, on a hit, the response to send.
+
+        The key is None when the backend failed; ``store`` then skips it.
+        """
+        try:
+            key = self._key(request, namespaces)
+            entry = self.backend.get(key)
+        except Exception:
+            self._failed("read")
+            key, entry = None, None
+        if entry is None:
+            self.misses += 1
+            return key, None
+        self.hits += 1
+        meta, body = entry.split(b"\n", 1)
+        meta = json.loads(meta)
+        return key, self._respond(request, body, meta["etag"], meta["headers"])
+
+    def store(
+        self, key: str | None, request: Request, body: bytes, headers: dict | None = None, etag: str | None = None,
+    ) -> Response:
+        """Cache ``body`` and respond with it; ``etag`` defaults to a hash of the body."""
+        headers = headers or {}
+        etag = etag or make_etag(body)
+        if key is not None:
+            meta = json.dumps({"etag": etag, "headers": headers}).encode()
+            try:
+                self.backend.set(key, meta + b"\n" + body, self.ttl)
+            except Exception:
+                self._failed("write")
+        return self._respond(request, body, etag, headers)
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "evictions": self.backend.evictions,
+            "entries": len(self.backend),
+        }
+
+
+response_cache = ResponseCache.from_settings(settings)
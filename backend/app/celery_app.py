@@ -1,10 +1,109 @@
+import logging
+
 from celery import Celery
 
-celery_app = Celery(
-    'thecooperator', broker='redis://localhost:6379/0', backend='redis://localhost:6379/0'
-)
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+celery_app = Celery('thecooperator', broker=settings.celery_broker_url, backend=settings.celery_result_backend)
+
+# One periodic sweep covers every task due in the window, instead of one
+# queued job per task; run ``celery -A app.celery_app.celery_app beat``.
+celery_app.conf.beat_schedule = {
+    'due-date-reminders': {
+        'task': 'app.celery_app.send_due_date_reminders',
+        'schedule': float(settings.reminder_interval),
+    },
+    'recompute-task-aggregates': {
+        'task': 'app.celery_app.recompute_task_aggregates',
+        'schedule': float(settings.metrics_recompute_interval),
+    },
+    'purge-idempotency-keys': {
+        'task': 'app.celery_app.purge_idempotency_keys',
+        'schedule': 3600.0,
+    },
+    'relay-outbox': {
+        'task': 'app.celery_app.relay_outbox',
+        'schedule': float(settings.outbox_interval),
+    },
+    'maintain-history': {
+        'task': 'app.celery_app.maintain_history',
+        'schedule': 86400.0,
+    },
+}
+
+
+@celery_app.task
+def send_due_date_reminders() -> dict:
+    from .reminders import run_sweep
+
+    result = run_sweep().as_dict()
+    logger.info(
+        "reminder sweep: %(sent)s mails for %(tasks)s tasks in %(seconds)ss (%(mails_per_second)s/s), %(failed)s failed",
+        result,
+    )
+    return result
+
 
 @celery_app.task
-def send_due_date_reminder(task_id: int):
-    # placeholder for email reminder logic
-    print(f"Reminder: task {task_id} is due soon")
+def recompute_task_aggregates() -> None:
+    """Rebuild the dashboard counters from ``tasks`` to correct any drift."""
+    from . import aggregates
+    from .cache import response_cache
+    from .db import SessionLocal
+
+    with SessionLocal() as db:
+        aggregates.recompute(db)
+        db.commit()
+    response_cache.invalidate("tasks")
+
+
+@celery_app.task
+def purge_idempotency_keys() -> int:
+    """Delete Idempotency-Key responses older than ``IDEMPOTENCY_TTL``."""
+    from . import idempotency
+    from .db import SessionLocal
+
+    with SessionLocal() as db:
+        purged = idempotency.purge(db, settings.idempotency_ttl)
+        db.commit()
+    return purged
+
+
+@celery_app.task
+def relay_outbox() -> dict:
+    """Hand the jobs waiting in the outbox to ``process_changes``."""
+    from .db import SessionLocal
+    from .outbox import relay
+
+    relayed = relay.drain(SessionLocal)
+    stats = relay.metrics.snapshot()
+    if relayed:
+        logger.info(
+            "outbox relay: %s events; totals %s events in %s messages, %.1f events/s",
+            relayed, stats["events"], stats["messages"], stats["events_per_second"],
+        )
+    return stats
+
+
+@celery_app.task
+def process_changes(messages: list[dict]) -> None:
+    """Run the registered outbox handlers for one relayed batch."""
+    from .outbox import handle
+
+    handle(messages)
+
+
+@celery_app.task
+def maintain_history() -> int:
+    """Add the coming months' history partitions and drop expired months."""
+    import datetime
+
+    from . import history
+    from .db import SessionLocal
+
+    with SessionLocal() as db:
+        dropped = history.maintain(db, datetime.date.today(), settings.history_retention_months)
+        db.commit()
+    return dropped
@@ -0,0 +1,179 @@
+"""Database setup commands, run once per deployment rather than per worker.
+
+    python -m app.cli init-db [--seed]   create missing tables
+    python -m app.cli seed               insert demo data into empty tables
+    python -m app.cli reset-demo         replace everything with the demo data
+    python -m app.cli generate [--preset NAME] [--seed N] [--tasks N ...]
+                              [--snapshot FILE]
+                                         replace everything with a synthetic
+                                         dataset, optionally saved to FILE
+    python -m app.cli restore FILE       copy a snapshot back (SQLite)
+    python -m app.cli relay-outbox [--once]
+                                         hand queued background jobs to Celery
+    python -m app.cli partition-tasks --partitions N [--dry-run]
+                                         hash-partition tasks by cooperative
+                                         (PostgreSQL)
+    python -m app.cli partition-history [--dry-run]
+                                         range-partition the change history
+                                         by month (PostgreSQL)
+
+Production databases should be managed with ``alembic upgrade head``;
+``init-db`` is a shortcut for local SQLite databases and tests.
+"""
+import argparse
+
+
+def init_db(seed: bool = False) -> None:
+    from .db import Base, engine
+    from . import models  # noqa: F401  (registers the tables)
+
+    Base.metadata.create_all(bind=engine)
+    if seed:
+        seed_db()
+
+
+def seed_db() -> None:
+    from .db import SessionLocal
+    from .demo import seed_demo_data
+
+    with SessionLocal() as session:
+        seed_demo_data(session)
+
+
+def generate(spec, snapshot: str | None = None) -> None:
+    from sqlalchemy.orm import Session
+
+    from . import models  # noqa: F401  (registers the tables)
+    from . import seeding
+    from .db import Base, engine
+
+    Base.metadata.create_all(bind=engine)
+    with Session(bind=engine) as db:
+        seeding.truncate(db)
+        seeding.generate(db, spec)
+    if snapshot:
+        if engine.dialect.name != "sqlite":
+            raise SystemExit("--snapshot needs SQLite")
+        seeding.snapshot(engine, snapshot).close()
+
+
+def restore(path: str) -> None:
+    from . import seeding
+    from .db import engine
+
+    if engine.dialect.name != "sqlite":
+        raise SystemExit("restore needs SQLite")
+    seeding.restore(engine, path)
+
+
+def relay_outbox(once: bool = False) -> None:
+    import time
+
+    from .config import settings
+    from .db import SessionLocal
+    from .outbox import relay
+
+    while True:
+        relayed = relay.drain(SessionLocal)
+        if relayed or once:
+            print(f"relayed {relayed} events; totals {relay.metrics.snapshot()}", flush=True)
+        if once:
+            return
+        time.sleep(settings.outbox_interval)
+
+
+def partition_tasks(partitions: int, dry_run: bool = False) -> None:
+    from sqlalchemy import text
+
+    from .db import engine
+    from .tenancy import partition_statements
+
+    statements = partition_statements(partitions)
+    if dry_run:
+        print(";\n".join(statements) + ";")
+        return
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("partition-tasks needs PostgreSQL; use --dry-run to see the DDL")
+    with engine.begin() as connection:
+        for statement in statements:
+            connection.execute(text(statement))
+
+
+def partition_history(dry_run: bool = False) -> None:
+    import datetime
+
+    from sqlalchemy import func, select, text
+
+    from .db import engine
+    from .history import partition_statements
+    from .models import Change
+
+    today = datetime.date.today()
+    with engine.connect() as connection:
+        oldest = connection.scalar(select(func.min(Change.changed_at)))
+    statements = partition_statements(oldest.date() if oldest else today, today)
+    if dry_run:
+        print(";\n".join(statements) + ";")
+        return
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("partition-history needs PostgreSQL; use --dry-run to see the DDL")
+    with engine.begin() as connection:
+        for statement in statements:
+            connection.execute(text(statement))
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    init = commands.add_parser("init-db", help="create missing tables")
+    init.add_argument("--seed", action="store_true", help="also insert demo data")
+    commands.add_parser("seed", help="insert demo data into empty tables")
+    commands.add_parser("reset-demo", help="replace everything with the demo data")
+    generated = commands.add_parser("generate", help="replace everything with a synthetic dataset")
+    generated.add_argument("--preset", choices=["tiny", "small", "medium", "large"], default="small")
+    for name in ("cooperatives", "units", "members", "tasks", "proposals", "seed"):
+        generated.add_argument(f"--{name}", type=int, help=f"override the preset's {name}")
+    generated.add_argument("--skew", type=float, help="1 spreads tasks evenly over members")
+    generated.add_argument("--snapshot", metavar="FILE", help="also save the result for `restore`")
+    restored = commands.add_parser("restore", help="copy a snapshot back (SQLite)")
+    restored.add_argument("path", metavar="FILE")
+    relayed = commands.add_parser("relay-outbox", help="hand queued background jobs to Celery")
+    relayed.add_argument("--once", action="store_true", help="drain the outbox once instead of polling")
+    partition = commands.add_parser("partition-tasks", help="hash-partition tasks by cooperative (PostgreSQL)")
+    partition.add_argument("--partitions", type=int, default=8)
+    partition.add_argument("--dry-run", action="store_true", help="print the DDL instead of running it")
+    history = commands.add_parser("partition-history", help="range-partition the change history by month (PostgreSQL)")
+    history.add_argument("--dry-run", action="store_true", help="print the DDL instead of running it")
+    args = parser.parse_args(argv)
+
+    if args.command == "init-db":
+        init_db(seed=args.seed)
+    elif args.command == "seed":
+        seed_db()
+    elif args.command == "generate":
+        from dataclasses import replace
+
+        from .seeding import PRESETS
+
+        overrides = {
+            name: getattr(args, name)
+            for name in ("cooperatives", "units", "members", "tasks", "proposals", "seed", "skew")
+            if getattr(args, name) is not None
+        }
+        generate(replace(PRESETS[args.preset], **overrides), args.snapshot)
+    elif args.command == "restore":
+        restore(args.path)
+    elif args.command == "relay-outbox":
+        relay_outbox(args.once)
+    elif args.command == "partition-tasks":
+        partition_tasks(args.partitions, args.dry_run)
+    elif args.command == "partition-history":
+        partition_history(args.dry_run)
+    else:
+        from .demo import reset_demo_db
+
+        reset_demo_db()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Optimistic concurrency for unit, member and task writes.
+
+Every write to one of these rows increments its ``version``, and the detail
+routes and write responses send the version as the ``ETag`` (``"3"``). A
+client that sends it back in ``If-Match`` changes the row only if nobody
+else has changed it since; otherwise the request fails with 412 Precondition
+Failed and writes nothing. Without ``If-Match`` the last writer wins, as
+before.
+
+The check and the write are a single statement,
+``UPDATE ... WHERE id = :id AND version IN (...) RETURNING ...``, so there
+is no gap between reading the version and writing the row, and the caller
+gets the new row without reading it back.
+"""
+import re
+
+from fastapi import Response
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from .tenancy import columns
+
+TAG = re.compile(r'^"(\d+)"$')
+
+
+class PreconditionFailed(ValueError):
+    status_code = 412
+
+
+def etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def version_etag(row, expand: frozenset = frozenset()) -> str | None:
+    """The ``ETag`` of a row on its own, or None if there is no row.
+
+    Also None for responses with ``expand=``: they include other rows too, so
+    the version alone does not identify them.
+    """
+    if row is None or expand:
+        return None
+    return etag(row.version)
+
+
+def with_etag(response: Response, row):
+    if row is not None:
+        response.headers["ETag"] = etag(row.version)
+    return row
+
+
+def parse_if_match(header: str | None) -> frozenset[int] | None:
+    """The versions an ``If-Match`` header accepts, or None for no condition.
+
+    ``*`` adds no condition, because these writes never create a row. Weak
+    tags (``W/"3"``) and anything that is not one of our tags match no
+    version, since ``If-Match`` compares tags strongly (RFC 9110).
+    """
+    if header is None:
+        return None
+    versions = set()
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return None
+        match = TAG.match(tag)
+        if match:
+            versions.add(int(match.group(1)))
+    return frozenset(versions)
+
+
+def update_row(db: Session, model, row_id: int, values: dict, versions: frozenset[int] | None = None):
+    """Write ``values`` to one row and increment its version; the caller commits.
+
+    Returns the new row as a Core row, or None when no row has that id or its
+    version is not one of ``versions``.
+    """
+    stmt = update(model).where(model.id == row_id)
+    if versions is not None:
+        stmt = stmt.where(model.version.in_(versions))
+    stmt = (
+        stmt.values(**values, version=model.version + 1).returning(*columns(model))
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(stmt).first()
+
+
+def precondition_failed(db: Session, model, row_id: int, versions: frozenset[int]) -> PreconditionFailed:
+    """Describe a failed ``If-Match``; the caller has rolled back."""
+    current = db.scalar(select(model.version).where(model.id == row_id))
+    name = model.__tablename__.rstrip("s")
+    if current is None:
+        return PreconditionFailed(f"{name} {row_id} does not exist")
+    expected = ", ".join(etag(version) for version in sorted(versions)) or "none"
+    return PreconditionFailed(f"{name} {row_id} is at version {current}; If-Match accepted {expected}")
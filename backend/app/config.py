@@ -0,0 +1,173 @@
+import os
+from dataclasses import dataclass
+
+
+def _env_bool(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return default if value in (None, "") else int(value)
+
+
+def _database_url() -> str:
+    url = os.getenv("DATABASE_URL")
+    if url:
+        return url
+    if os.getenv("POSTGRES_HOST"):
+        return "postgresql://{user}:{password}@{host}/{db}".format(
+            user=os.getenv("POSTGRES_USER", "tc_app"),
+            password=os.getenv("POSTGRES_PASSWORD", ""),
+            host=os.environ["POSTGRES_HOST"],
+            db=os.getenv("POSTGRES_DB", "thecooperator"),
+        )
+    return "sqlite:///./test.db"
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Runtime configuration read from environment variables."""
+
+    database_url: str
+    # Serve the CRUD routes with ``async def`` handlers on an AsyncEngine.
+    db_async: bool = False
+    # Connection pool sizing, applied per worker process.
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    # SQLite: WAL journal lets readers proceed while a writer commits.
+    sqlite_wal: bool = True
+    sqlite_busy_timeout_ms: int = 5000
+    # PostgreSQL: 0 disables the statement timeout.
+    pg_statement_timeout_ms: int = 0
+    # PostgreSQL: executions before a statement is prepared server-side
+    # (psycopg) or the size of the per-connection statement cache (asyncpg).
+    pg_prepare_threshold: int = 5
+    redis_url: str = "redis://localhost:6379/0"
+    # Response cache for the GET routes: "memory" (per process), "redis"
+    # (shared by all workers) or "none". Defaults to "redis" when REDIS_URL
+    # is set: a write only invalidates the memory cache of the worker that
+    # handled it, so other workers would serve stale reads until cache_ttl.
+    cache_backend: str = "memory"
+    cache_ttl: int = 30
+    cache_maxsize: int = 2048
+    # List routes without ``expand=`` read plain column rows and encode them
+    # without re-validating each one (``app.fast_rows``).
+    fast_serialization: bool = False
+    # Live updates: "memory" (single worker) or "redis" pub/sub across workers.
+    events_backend: str = "memory"
+    events_flush_ms: int = 50
+    events_queue_size: int = 100
+    # Due-date reminders: mail relay, sweep cadence and batching.
+    smtp_host: str = "localhost"
+    smtp_port: int = 25
+    smtp_username: str = ""
+    smtp_password: str = ""
+    smtp_starttls: bool = False
+    smtp_from: str = "noreply@thecooperator.local"
+    smtp_connections: int = 5
+    reminder_window_days: int = 1
+    reminder_interval: int = 3600
+    reminder_batch_size: int = 1000
+    # Per-request timings, SQL counts and /metrics (``app.instrumentation``);
+    # statements slower than slow_query_ms are logged (0 = never).
+    instrumentation: bool = False
+    slow_query_ms: int = 0
+    # Seconds between full rebuilds of the task aggregates (Celery beat).
+    metrics_recompute_interval: int = 3600
+    # Seconds a stored Idempotency-Key response is replayed (``app.idempotency``).
+    idempotency_ttl: int = 86400
+    # Celery broker and result store; "memory://" or "sqla+sqlite:///celery.db"
+    # work without Redis.
+    celery_broker_url: str = "redis://localhost:6379/0"
+    celery_result_backend: str = "redis://localhost:6379/0"
+    # Background jobs for writes go through the ``outbox`` table
+    # (``app.outbox``); the relay hands them to "celery" or, in tests, to
+    # "memory", up to outbox_batch_size rows per batch every outbox_interval
+    # seconds.
+    outbox: bool = True
+    outbox_backend: str = "celery"
+    outbox_batch_size: int = 500
+    outbox_interval: int = 5
+    # Change history of CRUD writes (``app.history``); Celery beat keeps the
+    # last history_retention_months months, the current one included
+    # (0 = keep all).
+    history: bool = True
+    history_retention_months: int = 0
+    # Per-client token buckets (``app.admission``): "memory" (per process),
+    # "redis" (shared by all workers) or "none". Rates are requests per
+    # second for each top-level path; a bucket holds rate_limit_burst
+    # seconds' worth.
+    rate_limit_backend: str = "none"
+    rate_limit_reads: int = 20
+    rate_limit_writes: int = 5
+    rate_limit_burst: int = 5
+    # Requests run at once per worker (0 = db_pool_size + db_max_overflow);
+    # beyond that up to request_queue_size wait, then the rest get 503.
+    max_concurrent_requests: int = 0
+    request_queue_size: int = 32
+    request_queue_timeout_ms: int = 1000
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            database_url=_database_url(),
+            db_async=_env_bool("DB_ASYNC"),
+            db_pool_size=_env_int("DB_POOL_SIZE", 5),
+            db_max_overflow=_env_int("DB_MAX_OVERFLOW", 10),
+            db_pool_timeout=_env_int("DB_POOL_TIMEOUT", 30),
+            db_pool_recycle=_env_int("DB_POOL_RECYCLE", 1800),
+            db_pool_pre_ping=_env_bool("DB_POOL_PRE_PING", True),
+            sqlite_wal=_env_bool("SQLITE_WAL", True),
+            sqlite_busy_timeout_ms=_env_int("SQLITE_BUSY_TIMEOUT_MS", 5000),
+            pg_statement_timeout_ms=_env_int("PG_STATEMENT_TIMEOUT_MS", 0),
+            pg_prepare_threshold=_env_int("PG_PREPARE_THRESHOLD", 5),
+            redis_url=os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+            cache_backend=os.getenv("CACHE_BACKEND", "redis" if os.getenv("REDIS_URL") else "memory"),
+            cache_ttl=_env_int("CACHE_TTL", 30),
+            cache_maxsize=_env_int("CACHE_MAXSIZE", 2048),
+            fast_serialization=_env_bool("FAST_SERIALIZATION"),
+            events_backend=os.getenv("EVENTS_BACKEND", "memory"),
+            events_flush_ms=_env_int("EVENTS_FLUSH_MS", 50),
+            events_queue_size=_env_int("EVENTS_QUEUE_SIZE", 100),
+            smtp_host=os.getenv("SMTP_HOST", "localhost"),
+            smtp_port=_env_int("SMTP_PORT", 25),
+            smtp_username=os.getenv("SMTP_USERNAME", ""),
+            smtp_password=os.getenv("SMTP_PASSWORD", ""),
+            smtp_starttls=_env_bool("SMTP_STARTTLS"),
+            smtp_from=os.getenv("SMTP_FROM", "noreply@thecooperator.local"),
+            smtp_connections=_env_int("SMTP_CONNECTIONS", 5),
+            reminder_window_days=_env_int("REMINDER_WINDOW_DAYS", 1),
+            reminder_interval=_env_int("REMINDER_INTERVAL", 3600),
+            reminder_batch_size=_env_int("REMINDER_BATCH_SIZE", 1000),
+            instrumentation=_env_bool("INSTRUMENTATION"),
+            slow_query_ms=_env_int("SLOW_QUERY_MS", 0),
+            metrics_recompute_interval=_env_int("METRICS_RECOMPUTE_INTERVAL", 3600),
+            idempotency_ttl=_env_int("IDEMPOTENCY_TTL", 86400),
+            celery_broker_url=os.getenv("CELERY_BROKER_URL", os.getenv("REDIS_URL", "redis://localhost:6379/0")),
+            celery_result_backend=os.getenv(
+                "CELERY_RESULT_BACKEND", os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+            ),
+            outbox=_env_bool("OUTBOX", True),
+            outbox_backend=os.getenv("OUTBOX_BACKEND", "celery"),
+            outbox_batch_size=_env_int("OUTBOX_BATCH_SIZE", 500),
+            outbox_interval=_env_int("OUTBOX_INTERVAL", 5),
+            history=_env_bool("HISTORY", True),
+            history_retention_months=_env_int("HISTORY_RETENTION_MONTHS", 0),
+            rate_limit_backend=os.getenv("RATE_LIMIT_BACKEND", "none"),
+            rate_limit_reads=_env_int("RATE_LIMIT_READS", 20),
+            rate_limit_writes=_env_int("RATE_LIMIT_WRITES", 5),
+            rate_limit_burst=_env_int("RATE_LIMIT_BURST", 5),
+            max_concurrent_requests=_env_int("MAX_CONCURRENT_REQUESTS", 0),
+            request_queue_size=_env_int("REQUEST_QUEUE_SIZE", 32),
+            request_queue_timeout_ms=_env_int("REQUEST_QUEUE_TIMEOUT_MS", 1000),
+        )
+
+
+settings = Settings.from_env()
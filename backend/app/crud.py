@@ -1,96 +1,769 @@
+import datetime
+
+from sqlalchemy import and_, bindparam, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from . import models, schemas
+from . import aggregates, fast_rows, history, models, outbox, schemas, search
+from .tenancy import columns, stamp
+from .cache import response_cache
+from .concurrency import precondition_failed, update_row
+from .db import SessionLocal
+from .events import notify
+from .expand import load_options
+from .ordering import ReorderError, STEP, is_dense, key_between, spaced_keys
+from .pagination import keyset_page
+
+UNIT_SORTS = {"id": models.Unit.id, "name": models.Unit.name}
+MEMBER_SORTS = {"id": models.Member.id, "name": models.Member.name}
+TASK_SORTS = {
+    "id": models.Task.id,
+    "title": models.Task.title,
+    "status": models.Task.status,
+    "priority": models.Task.priority,
+    "due_date": models.Task.due_date,
+    "sort_index": models.Task.sort_index,
+}
+
+
+def _changed(db: Session, namespace: str, op: str, ids) -> None:
+    """Run after a commit: retire cached reads and notify live subscribers.
+
+    Background jobs are queued and the history logged before the commit
+    instead, with ``_record``, so they commit or roll back with the write.
+    """
+    response_cache.invalidate(namespace)
+    notify(db, namespace, op, ids)
+
+
+def _record(db: Session, namespace: str, op: str, changes: dict) -> None:
+    """Run before a commit: queue background jobs and log the change history.
+
+    ``changes`` maps each changed row id to the fields written, or None for
+    deletes; see ``app.outbox`` and ``app.history``.
+    """
+    outbox.record(db, namespace, op, changes)
+    history.record(db, namespace, op, changes)
+
+
+def _select(entity: str, expand: frozenset, plain: bool):
+    """ORM entities, or with ``plain`` the response columns as plain rows."""
+    if plain:
+        return select(*fast_rows.columns(entity))
+    return select(fast_rows.MODELS[entity]).options(*load_options(entity, expand))
+
+
+def _page(db: Session, stmt, model, sorts, skip, limit, cursor, sort, plain: bool = False):
+    stmt = keyset_page(stmt, model, sort, sorts, cursor, limit)
+    if not cursor and skip:
+        stmt = stmt.offset(skip)
+    return db.execute(stmt).all() if plain else list(db.scalars(stmt))
+
+
+def _update(db: Session, model, row_id: int, values: dict, versions=None, before_commit=None):
+    """One conditional ``UPDATE ... RETURNING``; see ``app.concurrency``.
+
+    Returns the new row, or None if there is no such row. Raises
+    ``PreconditionFailed`` if ``versions`` is given and the row's is not in it.
+    """
+    row = update_row(db, model, row_id, values, versions)
+    if row is None:
+        db.rollback()
+        if versions is not None:
+            raise precondition_failed(db, model, row_id, versions)
+        return None
+    if before_commit:
+        before_commit(row)
+    _record(db, model.__tablename__, "update", {row_id: history.written(model.__tablename__, values)})
+    db.commit()
+    _changed(db, model.__tablename__, "update", [row_id])
+    return row
+
+
+class MissingReference(ValueError):
+    status_code = 400
+
+
+MEMBER_REFERENCES = {"unit_id": models.Unit.id}
+TASK_REFERENCES = {"assignee_id": models.Member.id, "lane_id": models.Lane.id}
+
+
+def _check_references(db: Session, values: dict, references: dict) -> None:
+    """Raise ``MissingReference`` unless each id in ``values`` names a row of this cooperative.
+
+    The single-row counterpart of ``_existing`` and ``_reject_missing``.
+    """
+    for field, column in references.items():
+        value = values.get(field)
+        if value is not None and not _existing(db, column, [value]):
+            raise MissingReference(f"{field} {value} does not exist")
+
+
+def _delete(db: Session, model, row_id: int, before_commit=None):
+    """Soft-delete one row by stamping ``deleted_at``; see ``models.SoftDeleted``.
+
+    One ``UPDATE ... RETURNING`` like ``_update``, so nothing that refers to
+    the row is loaded. Returns the row, or None if there is no such row.
+    """
+    row = update_row(db, model, row_id, {"deleted_at": models.utcnow()})
+    if row is None:
+        db.rollback()
+        return None
+    if before_commit:
+        before_commit(row)
+    _record(db, model.__tablename__, "delete", {row_id: None})
+    db.commit()
+    _changed(db, model.__tablename__, "delete", [row_id])
+    return row
+
+# Cooperative CRUD; see ``app.tenancy``.
+
+def create_cooperative(db: Session, cooperative: schemas.CooperativeCreate) -> models.Cooperative:
+    db_cooperative = models.Cooperative(name=cooperative.name)
+    db.add(db_cooperative)
+    db.commit()
+    db.refresh(db_cooperative)
+    return db_cooperative
+
+def get_cooperatives(db: Session):
+    return list(db.scalars(select(models.Cooperative).order_by(models.Cooperative.id)))
 
 # Unit CRUD
 
 def create_unit(db: Session, unit: schemas.UnitCreate) -> models.Unit:
     db_unit = models.Unit(name=unit.name)
     db.add(db_unit)
+    db.flush()
+    _record(db, "units", "create", {db_unit.id: history.snapshot("units", db_unit)})
     db.commit()
     db.refresh(db_unit)
+    _changed(db, "units", "create", [db_unit.id])
     return db_unit
 
-def get_units(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Unit).offset(skip).limit(limit).all()
+def get_units(
+    db: Session, skip: int = 0, limit: int = 100, cursor: str | None = None, sort: str = "id",
+    expand: frozenset = frozenset(), plain: bool = False,
+):
+    stmt = _select("units", expand, plain)
+    return _page(db, stmt, models.Unit, UNIT_SORTS, skip, limit, cursor, sort, plain)
 
-def get_unit(db: Session, unit_id: int):
-    return db.get(models.Unit, unit_id)
+def get_unit(db: Session, unit_id: int, expand: frozenset = frozenset()):
+    return db.get(models.Unit, unit_id, options=load_options("units", expand))
 
-def update_unit(db: Session, unit_id: int, unit: schemas.UnitCreate):
-    obj = db.get(models.Unit, unit_id)
-    if obj:
-        obj.name = unit.name
-        db.commit()
-        db.refresh(obj)
-    return obj
+def update_unit(db: Session, unit_id: int, unit: schemas.UnitCreate, versions=None):
+    return _update(db, models.Unit, unit_id, {"name": unit.name}, versions)
 
 def delete_unit(db: Session, unit_id: int):
-    obj = db.get(models.Unit, unit_id)
-    if obj:
-        db.delete(obj)
-        db.commit()
-    return obj
+    return _delete(db, models.Unit, unit_id)
 
 # Member CRUD
 
 def create_member(db: Session, member: schemas.MemberCreate) -> models.Member:
+    _check_references(db, {"unit_id": member.unit_id}, MEMBER_REFERENCES)
     db_member = models.Member(name=member.name, email=member.email, unit_id=member.unit_id)
     db.add(db_member)
+    db.flush()
+    search.index(db, "members", [db_member])
+    _record(db, "members", "create", {db_member.id: history.snapshot("members", db_member)})
     db.commit()
     db.refresh(db_member)
+    _changed(db, "members", "create", [db_member.id])
     return db_member
 
-def get_members(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Member).offset(skip).limit(limit).all()
+def get_members(
+    db: Session, skip: int = 0, limit: int = 100, cursor: str | None = None, sort: str = "id",
+    expand: frozenset = frozenset(), plain: bool = False,
+):
+    stmt = _select("members", expand, plain)
+    return _page(db, stmt, models.Member, MEMBER_SORTS, skip, limit, cursor, sort, plain)
+
+def get_member(db: Session, member_id: int, expand: frozenset = frozenset()):
+    return db.get(models.Member, member_id, options=load_options("members", expand))
+
+def update_member(db: Session, member_id: int, member: schemas.MemberCreate, versions=None):
+    values = member.model_dump()
+    _check_references(db, values, MEMBER_REFERENCES)
+    return _update(
+        db, models.Member, member_id, values, versions,
+        lambda row: search.index(db, "members", [row]),
+    )
+
+def delete_member(db: Session, member_id: int):
+    return _delete(db, models.Member, member_id, lambda row: search.unindex(db, "members", [member_id]))
 
-def get_member(db: Session, member_id: int):
-    return db.get(models.Member, member_id)
+# Lane CRUD
 
-def update_member(db: Session, member_id: int, member: schemas.MemberCreate):
-    obj = db.get(models.Member, member_id)
+def _last_key(db: Session, column, *where) -> float:
+    return db.scalar(select(func.max(column)).where(*where)) or 0.0
+
+
+def create_lane(db: Session, lane: schemas.LaneCreate) -> models.Lane:
+    sort_index = lane.sort_index
+    if sort_index is None:
+        sort_index = _last_key(db, models.Lane.sort_index) + STEP
+    db_lane = models.Lane(name=lane.name, sort_index=sort_index)
+    db.add(db_lane)
+    db.flush()
+    _record(db, "lanes", "create", {db_lane.id: history.snapshot("lanes", db_lane)})
+    db.commit()
+    db.refresh(db_lane)
+    _changed(db, "lanes", "create", [db_lane.id])
+    return db_lane
+
+def get_lanes(db: Session):
+    return list(db.scalars(select(models.Lane).order_by(models.Lane.sort_index, models.Lane.id)))
+
+def get_lane(db: Session, lane_id: int):
+    return db.get(models.Lane, lane_id)
+
+def update_lane(db: Session, lane_id: int, lane: schemas.LaneUpdate):
+    obj = db.get(models.Lane, lane_id)
     if obj:
-        obj.name = member.name
-        obj.email = member.email
-        obj.unit_id = member.unit_id
+        values = {"name": lane.name}
+        if lane.sort_index is not None:
+            values["sort_index"] = lane.sort_index
+        for name, value in values.items():
+            setattr(obj, name, value)
+        _record(db, "lanes", "update", {obj.id: values})
         db.commit()
         db.refresh(obj)
+        _changed(db, "lanes", "update", [obj.id])
     return obj
 
-def delete_member(db: Session, member_id: int):
-    obj = db.get(models.Member, member_id)
+def delete_lane(db: Session, lane_id: int):
+    obj = db.get(models.Lane, lane_id)
     if obj:
+        # Done here as well as by ON DELETE SET NULL, which SQLite only
+        # honours with foreign keys switched on.
+        moved = list(db.scalars(
+            update(models.Task).where(models.Task.lane_id == lane_id)
+            .values(lane_id=None, version=models.Task.version + 1).returning(models.Task.id)
+        ))
         db.delete(obj)
+        _record(db, "lanes", "delete", {lane_id: None})
+        _record(db, "tasks", "update", {task_id: {"lane_id": None} for task_id in moved})
         db.commit()
+        _changed(db, "lanes", "delete", [lane_id])
+        if moved:
+            _changed(db, "tasks", "update", moved)
     return obj
 
+# Proposal CRUD; ballots go through ``app.vote_service``.
+
+def create_proposal(db: Session, proposal: schemas.ProposalCreate) -> models.Proposal:
+    closes_at = proposal.closes_at
+    if closes_at is not None and closes_at.tzinfo is not None:
+        closes_at = closes_at.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    db_proposal = models.Proposal(
+        title=proposal.title, description=proposal.description, quorum=proposal.quorum, closes_at=closes_at,
+    )
+    db.add(db_proposal)
+    db.flush()
+    _record(db, "proposals", "create", {db_proposal.id: history.snapshot("proposals", db_proposal)})
+    db.commit()
+    db.refresh(db_proposal)
+    _changed(db, "proposals", "create", [db_proposal.id])
+    return db_proposal
+
+def get_proposals(db: Session, skip: int = 0, limit: int = 100):
+    return list(db.scalars(select(models.Proposal).order_by(models.Proposal.id).offset(skip).limit(limit)))
+
+def get_proposal(db: Session, proposal_id: int):
+    return db.get(models.Proposal, proposal_id)
+
 # Task CRUD
 
-def create_task(db: Session, task: schemas.TaskCreate) -> models.Task:
-    db_task = models.Task(
+def _task_values(task: schemas.TaskCreate) -> dict:
+    return dict(
         title=task.title,
         status=task.status or models.TaskStatus.todo,
         priority=task.priority or models.TaskPriority.medium,
         due_date=task.due_date,
         assignee_id=task.assignee_id,
+        lane_id=task.lane_id,
+        sort_index=task.sort_index,
     )
+
+
+def create_task(db: Session, task: schemas.TaskCreate) -> models.Task:
+    values = _task_values(task)
+    _check_references(db, values, TASK_REFERENCES)
+    db_task = models.Task(**values)
+    if db_task.lane_id is not None and db_task.sort_index is None:
+        db_task.sort_index = _last_key(db, models.Task.sort_index, models.Task.lane_id == db_task.lane_id) + STEP
     db.add(db_task)
+    db.flush()  # stamps the cooperative, which the aggregates are keyed by
+    aggregates.record(db, added=[db_task])
+    search.index(db, "tasks", [db_task])
+    _record(db, "tasks", "create", {db_task.id: history.snapshot("tasks", db_task)})
     db.commit()
     db.refresh(db_task)
+    _changed(db, "tasks", "create", [db_task.id])
     return db_task
 
 
-def get_tasks(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Task).offset(skip).limit(limit).all()
+def get_tasks(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    sort: str = "id",
+    status: models.TaskStatus | None = None,
+    priority: models.TaskPriority | None = None,
+    assignee_id: int | None = None,
+    due_from: datetime.date | None = None,
+    due_to: datetime.date | None = None,
+    lane_id: int | None = None,
+    expand: frozenset = frozenset(),
+    plain: bool = False,
+):
+    stmt = _select("tasks", expand, plain)
+    if lane_id is not None:
+        stmt = stmt.where(models.Task.lane_id == lane_id)
+    if status is not None:
+        stmt = stmt.where(models.Task.status == status)
+    if priority is not None:
+        stmt = stmt.where(models.Task.priority == priority)
+    if assignee_id is not None:
+        stmt = stmt.where(models.Task.assignee_id == assignee_id)
+    if due_from is not None:
+        stmt = stmt.where(models.Task.due_date >= due_from)
+    if due_to is not None:
+        stmt = stmt.where(models.Task.due_date <= due_to)
+    return _page(db, stmt, models.Task, TASK_SORTS, skip, limit, cursor, sort, plain)
 
 
-def get_task(db: Session, task_id: int):
-    return db.get(models.Task, task_id)
+def get_task(db: Session, task_id: int, expand: frozenset = frozenset()):
+    return db.get(models.Task, task_id, options=load_options("tasks", expand))
+
+
+# Fields the task aggregates are counted by; changing one needs the old values.
+COUNTED_FIELDS = {"status", "priority", "assignee_id", "due_date"}
+
+
+def update_task(db: Session, task_id: int, task: schemas.TaskPatch, versions=None):
+    """Change the fields set in ``task``; None if there is no such task.
+
+    A change to a counted field reads the row first for ``aggregates.record``
+    and then updates it only if it is still at the version read, so the
+    counts are moved from exactly the values that were replaced.
+    """
+    values = task.model_dump(exclude_unset=True)
+    _check_references(db, values, TASK_REFERENCES)
+    if "due_date" in values:
+        values["reminded_at"] = None  # a new due date deserves a new reminder
+    if not values.keys() & COUNTED_FIELDS:
+        return _update(db, models.Task, task_id, values, versions, lambda row: search.index(db, "tasks", [row]))
+    before = db.execute(select(*columns(models.Task)).where(models.Task.id == task_id).with_for_update()).first()
+    if before is None or (versions is not None and before.version not in versions):
+        db.rollback()
+        if versions is not None:
+            raise precondition_failed(db, models.Task, task_id, versions)
+        return None
+
+    def record(row):
+        aggregates.record(db, removed=[before], added=[row])
+        search.index(db, "tasks", [row])
+
+    # The row is locked where the database supports it, so only a write that
+    # bypassed the lock can make this miss; it is reported as a conflict.
+    return _update(db, models.Task, task_id, values, frozenset([before.version]), record)
 
 
 def delete_task(db: Session, task_id: int):
-    obj = db.get(models.Task, task_id)
-    if obj:
-        db.delete(obj)
+    def record(row):
+        aggregates.record(db, removed=[row])
+        search.unindex(db, "tasks", [task_id])
+
+    return _delete(db, models.Task, task_id, record)
+
+# Task ordering
+#
+# Tasks in a lane are ordered by ``(sort_index, id)``. A move reads the keys
+# of the two neighbours through the ``(lane_id, sort_index, id)`` index and
+# writes a key between them to the moved row only; see ``app.ordering``.
+
+def _position(db: Session, task_id: int, moving_id: int, lane_id: int) -> tuple[float, int]:
+    if task_id == moving_id:
+        raise ReorderError(f"task {task_id} cannot be its own neighbour")
+    row = db.execute(select(models.Task.lane_id, models.Task.sort_index).where(models.Task.id == task_id)).first()
+    if row is None:
+        raise ReorderError(f"task {task_id} does not exist")
+    if row.lane_id != lane_id:
+        raise ReorderError(f"task {task_id} is not in lane {lane_id}")
+    return row.sort_index, task_id
+
+
+def _adjacent(db: Session, lane_id: int, moving_id: int, key: float, row_id: int, after: bool):
+    """The task directly after (or before) ``(key, row_id)`` in the lane."""
+    Task = models.Task
+    if after:
+        seek = or_(Task.sort_index > key, and_(Task.sort_index == key, Task.id > row_id))
+        order = (Task.sort_index, Task.id)
+    else:
+        seek = or_(Task.sort_index < key, and_(Task.sort_index == key, Task.id < row_id))
+        order = (Task.sort_index.desc(), Task.id.desc())
+    stmt = (
+        select(Task.id, Task.sort_index)
+        .where(Task.lane_id == lane_id, Task.id != moving_id, seek)
+        .order_by(*order)
+        .limit(1)
+    )
+    return db.execute(stmt).first()
+
+
+def _bounds(db: Session, task: models.Task, lane_id: int, move: schemas.TaskReorder) -> tuple:
+    if move.before_id is not None:
+        lower, before_id = _position(db, move.before_id, task.id, lane_id)
+        below = _adjacent(db, lane_id, task.id, lower, before_id, after=True)
+        if move.after_id is not None and (below is None or below.id != move.after_id):
+            raise ReorderError(f"tasks {move.before_id} and {move.after_id} are not adjacent")
+        return lower, below and below.sort_index
+    if move.after_id is not None:
+        upper, after_id = _position(db, move.after_id, task.id, lane_id)
+        above = _adjacent(db, lane_id, task.id, upper, after_id, after=False)
+        return above and above.sort_index, upper
+    last = db.scalar(
+        select(func.max(models.Task.sort_index))
+        .where(models.Task.lane_id == lane_id, models.Task.id != task.id)
+    )
+    return last, None
+
+
+def _move(db: Session, move: schemas.TaskReorder) -> tuple[models.Task, bool]:
+    task = db.get(models.Task, move.task_id)
+    if task is None:
+        raise ReorderError(f"task {move.task_id} does not exist")
+    lane_id = move.lane_id if move.lane_id is not None else task.lane_id
+    if lane_id is None:
+        raise ReorderError(f"task {task.id} is not in a lane; pass lane_id")
+    if move.lane_id is not None and db.get(models.Lane, lane_id) is None:
+        raise ReorderError(f"lane {lane_id} does not exist")
+    lower, upper = _bounds(db, task, lane_id, move)
+    key = key_between(lower, upper)
+    if upper is not None and lower is not None and not lower < key < upper:
+        # Out of float precision between these two: renumber now and retry.
+        rebalance_lane(db, lane_id, commit=False)
+        lower, upper = _bounds(db, task, lane_id, move)
+        key = key_between(lower, upper)
+    task.lane_id = lane_id
+    task.sort_index = key
+    task.version = models.Task.version + 1
+    db.flush()
+    return task, is_dense(lower, upper)
+
+
+def reorder_task(db: Session, move: schemas.TaskReorder) -> tuple[models.Task, bool]:
+    """Move one task; the flag says its lane should be rebalanced soon."""
+    try:
+        task, dense = _move(db, move)
+    except ReorderError:
+        db.rollback()
+        raise
+    _record(db, "tasks", "update", {task.id: {"lane_id": task.lane_id, "sort_index": task.sort_index}})
+    db.commit()
+    db.refresh(task)
+    _changed(db, "tasks", "update", [task.id])
+    return task, dense
+
+
+def reorder_tasks(db: Session, moves: list, errors: list) -> tuple[list, set[int]]:
+    """Apply ``(index, TaskReorder)`` moves in order in one transaction.
+
+    Returns the moved tasks and the lanes that should be rebalanced.
+    """
+    moved, dense_lanes = [], set()
+    for index, move in moves:
+        try:
+            with db.begin_nested():
+                task, dense = _move(db, move)
+        except ReorderError as exc:
+            errors.append({"index": index, "detail": str(exc)})
+            continue
+        moved.append(task)
+        if dense:
+            dense_lanes.add(task.lane_id)
+    _record(db, "tasks", "update", {
+        task.id: {"lane_id": task.lane_id, "sort_index": task.sort_index} for task in moved
+    })
+    db.commit()
+    if moved:
+        _changed(db, "tasks", "update", list(dict.fromkeys(task.id for task in moved)))
+    return moved, dense_lanes
+
+
+def rebalance_lane(db: Session, lane_id: int, commit: bool = True) -> list[int]:
+    """Respace every key in a lane ``STEP`` apart, keeping the current order."""
+    stmt = (
+        select(models.Task.id)
+        .where(models.Task.lane_id == lane_id)
+        .order_by(models.Task.sort_index, models.Task.id)
+        .with_for_update()
+    )
+    ids = list(db.scalars(stmt))
+    values = [{"row_id": row_id, "key": key} for row_id, key in zip(ids, spaced_keys(len(ids)))]
+    table = models.Task.__table__
+    respace = (
+        update(table).where(table.c.id == bindparam("row_id"))
+        .values(sort_index=bindparam("key"), version=table.c.version + 1)
+    )
+    for chunk in _chunks(values):
+        db.execute(respace, chunk)
+    _record(db, "tasks", "update", {value["row_id"]: {"sort_index": value["key"]} for value in values})
+    if commit:
         db.commit()
-    return obj
+        _changed(db, "tasks", "update", ids)
+    return ids
+
+
+def rebalance_lane_job(lane_id: int) -> None:
+    """Background entry point; the request's session is closed by the time it runs."""
+    with SessionLocal() as db:
+        rebalance_lane(db, lane_id)
+
+# Bulk operations
+#
+# Items arrive as ``(index, schema)`` pairs that already passed validation.
+# Conflicts are reported as ``{"index", "detail"}`` errors instead of aborting
+# the batch, and the remaining rows are written in one transaction with one
+# executemany statement per chunk. Rows are returned as Core rows, so no ORM
+# objects are built or refreshed.
+
+BULK_CHUNK = 500
+
+
+def _chunks(seq: list, size: int = BULK_CHUNK):
+    for start in range(0, len(seq), size):
+        yield seq[start:start + size]
+
+
+def _existing(db: Session, column, values) -> set:
+    found = set()
+    for chunk in _chunks(list({v for v in values if v is not None})):
+        found.update(db.scalars(select(column).where(column.in_(chunk))))
+    return found
+
+
+def _reject_taken(items: list, field: str, taken: set, errors: list, owners: dict | None = None) -> list:
+    """Drop items whose unique ``field`` exists in the table or earlier in the batch.
+
+    ``owners`` maps taken values to their row id, so an update may keep its
+    own value.
+    """
+    kept, seen = [], set()
+    for index, data in items:
+        value = data.get(field)
+        if value is None:
+            kept.append((index, data))
+            continue
+        if value in taken and owners is not None:
+            taken_by_other = owners[value] != data.get("id")
+        else:
+            taken_by_other = value in taken
+        if value in seen or taken_by_other:
+            errors.append({"index": index, "detail": f"{field} {value!r} already exists"})
+            continue
+        seen.add(value)
+        kept.append((index, data))
+    return kept
+
+
+def _reject_missing(items: list, field: str, existing: set, errors: list) -> list:
+    kept = []
+    for index, data in items:
+        value = data.get(field)
+        if value is not None and value not in existing:
+            errors.append({"index": index, "detail": f"{field} {value} does not exist"})
+        else:
+            kept.append((index, data))
+    return kept
+
+
+def _bulk_insert(db: Session, model, items: list, errors: list, before_commit=None) -> list:
+    table = model.__table__
+    items = [(index, data) for (index, _), data in zip(items, stamp(db, [data for _, data in items]))]
+    stmt = insert(table).returning(*table.c, sort_by_parameter_order=True)
+    try:
+        rows = []
+        for chunk in _chunks(items):
+            rows.extend(db.execute(stmt, [data for _, data in chunk]).all())
+        search.index(db, table.name, rows)
+        if before_commit:
+            before_commit(rows)
+        _record(db, table.name, "create", {row.id: history.snapshot(table.name, row) for row in rows})
+        db.commit()
+        _changed(db, table.name, "create", [row.id for row in rows])
+        return rows
+    except IntegrityError:
+        db.rollback()
+    # A concurrent writer won a unique value after the pre-checks: retry row
+    # by row so only the offending items fail.
+    rows = []
+    for index, data in items:
+        try:
+            with db.begin_nested():
+                rows.append(db.execute(stmt, data).one())
+        except IntegrityError as exc:
+            errors.append({"index": index, "detail": str(exc.orig)})
+    search.index(db, table.name, rows)
+    if before_commit:
+        before_commit(rows)
+    _record(db, table.name, "create", {row.id: history.snapshot(table.name, row) for row in rows})
+    db.commit()
+    _changed(db, table.name, "create", [row.id for row in rows])
+    return rows
+
+
+def _bulk_update(db: Session, model, items: list, errors: list, before_commit=None) -> list:
+    table = model.__table__
+    # Also confines the by-id UPDATE below, which is not scoped, to the cooperative.
+    found = _existing(db, model.id, (data["id"] for _, data in items))
+    items = _reject_missing(items, "id", found, errors)
+    if not items:
+        return []
+    try:
+        for chunk in _chunks([data for _, data in items if len(data) > 1]):
+            db.execute(update(model), chunk)
+    except IntegrityError:
+        db.rollback()
+        # As in ``_bulk_insert``: retry row by row so only the offending items fail.
+        kept = []
+        for index, data in items:
+            try:
+                if len(data) > 1:
+                    with db.begin_nested():
+                        db.execute(update(model), [data])
+                kept.append((index, data))
+            except IntegrityError as exc:
+                errors.append({"index": index, "detail": str(exc.orig)})
+        items = kept
+        if not items:
+            db.commit()
+            return []
+    for chunk in _chunks([data["id"] for _, data in items if len(data) > 1]):
+        db.execute(
+            update(model).where(model.id.in_(chunk)).values(version=model.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+    ids = [data["id"] for _, data in items]
+    rows = []
+    for chunk in _chunks(ids):
+        rows.extend(db.execute(select(*columns(model)).where(model.id.in_(chunk))).all())
+    search.index(db, table.name, rows)
+    if before_commit:
+        before_commit(rows)
+    _record(db, table.name, "update", {data["id"]: history.written(table.name, data) for _, data in items})
+    db.commit()
+    _changed(db, table.name, "update", ids)
+    order = {row_id: position for position, row_id in enumerate(ids)}
+    return sorted(rows, key=lambda row: order[row.id])
+
+
+def _bulk_delete(db: Session, model, ids: list[int], errors: list, before_commit=None) -> list[int]:
+    """Soft-delete the rows, one ``UPDATE ... RETURNING`` per chunk; see ``_delete``."""
+    table = model.__table__
+    rows = []
+    now = models.utcnow()
+    for chunk in _chunks(ids):
+        rows.extend(db.execute(
+            update(model).where(model.id.in_(chunk)).values(deleted_at=now, version=model.version + 1)
+            .returning(*columns(model)).execution_options(synchronize_session=False)
+        ).all())
+    search.unindex(db, table.name, [row.id for row in rows])
+    if before_commit:
+        before_commit(rows)
+    _record(db, table.name, "delete", {row.id: None for row in rows})
+    db.commit()
+    deleted = [row.id for row in rows]
+    _changed(db, table.name, "delete", deleted)
+    gone = set(deleted)
+    errors.extend(
+        {"index": index, "detail": f"id {row_id} does not exist"}
+        for index, row_id in enumerate(ids) if row_id not in gone
+    )
+    return deleted
+
+
+def bulk_create_units(db: Session, units: list, errors: list) -> list:
+    items = [(index, {"name": unit.name}) for index, unit in units]
+    taken = _existing(db, models.Unit.name, (data["name"] for _, data in items))
+    items = _reject_taken(items, "name", taken, errors)
+    return _bulk_insert(db, models.Unit, items, errors)
+
+
+def bulk_create_members(db: Session, members: list, errors: list) -> list:
+    items = [(index, member.model_dump()) for index, member in members]
+    taken = _existing(db, models.Member.email, (data["email"] for _, data in items))
+    items = _reject_taken(items, "email", taken, errors)
+    units = _existing(db, models.Unit.id, (data["unit_id"] for _, data in items))
+    items = _reject_missing(items, "unit_id", units, errors)
+    return _bulk_insert(db, models.Member, items, errors)
+
+
+def bulk_create_tasks(db: Session, tasks: list, errors: list) -> list:
+    items = [(index, _task_values(task)) for index, task in tasks]
+    assignees = _existing(db, models.Member.id, (data["assignee_id"] for _, data in items))
+    items = _reject_missing(items, "assignee_id", assignees, errors)
+    lanes = _existing(db, models.Lane.id, (data["lane_id"] for _, data in items))
+    items = _reject_missing(items, "lane_id", lanes, errors)
+    # Tasks without a key go to the end of their lane in request order.
+    ends = {}
+    for _, data in items:
+        lane_id = data["lane_id"]
+        if lane_id is None or data["sort_index"] is not None:
+            continue
+        if lane_id not in ends:
+            ends[lane_id] = _last_key(db, models.Task.sort_index, models.Task.lane_id == lane_id)
+        ends[lane_id] += STEP
+        data["sort_index"] = ends[lane_id]
+    return _bulk_insert(db, models.Task, items, errors, lambda rows: aggregates.record(db, added=rows))
+
+
+def _owners(db: Session, column, values) -> dict:
+    owners = {}
+    for chunk in _chunks(list({v for v in values if v is not None})):
+        owners.update(db.execute(select(column, column.class_.id).where(column.in_(chunk))).all())
+    return owners
+
+
+def bulk_update_units(db: Session, units: list, errors: list) -> list:
+    items = [(index, unit.model_dump(exclude_unset=True)) for index, unit in units]
+    owners = _owners(db, models.Unit.name, (data.get("name") for _, data in items))
+    items = _reject_taken(items, "name", set(owners), errors, owners)
+    return _bulk_update(db, models.Unit, items, errors)
+
+
+def bulk_update_members(db: Session, members: list, errors: list) -> list:
+    items = [(index, member.model_dump(exclude_unset=True)) for index, member in members]
+    owners = _owners(db, models.Member.email, (data.get("email") for _, data in items))
+    items = _reject_taken(items, "email", set(owners), errors, owners)
+    units = _existing(db, models.Unit.id, (data.get("unit_id") for _, data in items))
+    items = _reject_missing(items, "unit_id", units, errors)
+    return _bulk_update(db, models.Member, items, errors)
+
+
+def bulk_update_tasks(db: Session, tasks: list, errors: list) -> list:
+    items = [(index, task.model_dump(exclude_unset=True)) for index, task in tasks]
+    for _, data in items:
+        if "due_date" in data:
+            data["reminded_at"] = None  # a new due date deserves a new reminder
+    assignees = _existing(db, models.Member.id, (data.get("assignee_id") for _, data in items))
+    items = _reject_missing(items, "assignee_id", assignees, errors)
+    before = []
+    for chunk in _chunks([data["id"] for _, data in items]):
+        before.extend(db.execute(select(*columns(models.Task)).where(models.Task.id.in_(chunk))).all())
+    return _bulk_update(
+        db, models.Task, items, errors, lambda rows: aggregates.record(db, removed=before, added=rows),
+    )
+
+
+def bulk_delete_units(db: Session, ids: list[int], errors: list) -> list[int]:
+    return _bulk_delete(db, models.Unit, ids, errors)
+
+
+def bulk_delete_members(db: Session, ids: list[int], errors: list) -> list[int]:
+    return _bulk_delete(db, models.Member, ids, errors)
+
+
+def bulk_delete_tasks(db: Session, ids: list[int], errors: list) -> list[int]:
+    return _bulk_delete(db, models.Task, ids, errors, lambda rows: aggregates.record(db, removed=rows))
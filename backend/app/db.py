@@ -1,12 +1,184 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from functools import lru_cache
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from .config import Settings, settings
+
+SQLALCHEMY_DATABASE_URL = settings.database_url
+
+# Async drivers used when the URL names only the dialect.
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+class PoolMetrics:
+    """Counters for one engine's connection pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def observe_checkout(self, waited: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def snapshot(self, pool) -> dict:
+        stats = {
+            "connections_opened": self.connections_opened,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_seconds_total": self.wait_seconds_total,
+            "wait_seconds_max": self.wait_seconds_max,
+        }
+        if isinstance(pool, QueuePool):
+            stats.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+            )
+        return stats
+
+
+class _TimedCheckout:
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.observe_checkout(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.observe_checkout(time.perf_counter() - start)
+        return conn
+
+
+def instrumented_pool(base: type, metrics: PoolMetrics) -> type:
+    # A class per engine, so the metrics survive Pool.recreate() on dispose.
+    return type(f"Instrumented{base.__name__}", (_TimedCheckout, base), {"metrics": metrics})
+
+
+def engine_options(url: str, config: Settings, metrics: PoolMetrics, is_async: bool = False) -> dict:
+    """Keyword arguments for ``create_engine`` tuned for the URL's dialect."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    options: dict = {}
+    connect_args: dict = {}
+
+    in_memory = backend == "sqlite" and parsed.database in (None, "", ":memory:")
+    if not in_memory:
+        options.update(
+            poolclass=instrumented_pool(AsyncAdaptedQueuePool if is_async else QueuePool, metrics),
+            pool_size=config.db_pool_size,
+            max_overflow=config.db_max_overflow,
+            pool_timeout=config.db_pool_timeout,
+            pool_recycle=config.db_pool_recycle,
+            pool_pre_ping=config.db_pool_pre_ping,
+        )
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+    if backend == "sqlite" and not is_async:
+        connect_args["check_same_thread"] = False
+    elif backend == "postgresql":
+        driver = parsed.get_driver_name()
+        timeout = config.pg_statement_timeout_ms
+        if driver == "asyncpg":
+            if timeout:
+                connect_args["server_settings"] = {"statement_timeout": str(timeout)}
+            if not config.pg_prepare_threshold:
+                connect_args["statement_cache_size"] = 0
+        else:
+            if timeout:
+                connect_args["options"] = f"-c statement_timeout={timeout}"
+            if driver == "psycopg":
+                connect_args["prepare_threshold"] = config.pg_prepare_threshold or None
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+
+def _attach_listeners(engine: Engine, url: str, config: Settings, metrics: PoolMetrics) -> None:
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        metrics.connections_opened += 1
+        if make_url(url).get_backend_name() != "sqlite":
+            return
+        cursor = dbapi_connection.cursor()
+        if config.sqlite_wal:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(config.sqlite_busy_timeout_ms)}")
+        cursor.close()
+
+
+def create_db_engine(url: str, config: Settings = settings) -> Engine:
+    metrics = PoolMetrics()
+    db_engine = create_engine(url, **engine_options(url, config, metrics))
+    db_engine.pool_metrics = metrics
+    _attach_listeners(db_engine, url, config, metrics)
+    return db_engine
+
+
+engine = create_db_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
+
+
+def pool_status(db_engine: Engine = engine) -> dict:
+    return db_engine.pool_metrics.snapshot(db_engine.pool)
+
+
+def async_database_url(url: str) -> str:
+    """Swap the sync DBAPI of ``url`` for its asyncio counterpart."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"no async driver known for {backend!r}")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(
+        hide_password=False
+    )
+
+
+@lru_cache
+def get_async_engine():
+    # Imported and created on first use so the sync deployment does not need
+    # greenlet or the async drivers installed.
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = async_database_url(SQLALCHEMY_DATABASE_URL)
+    metrics = PoolMetrics()
+    async_engine = create_async_engine(url, **engine_options(url, settings, metrics, is_async=True))
+    async_engine.sync_engine.pool_metrics = metrics
+    _attach_listeners(async_engine.sync_engine, url, settings, metrics)
+    return async_engine
+
+
+@lru_cache
+def get_async_sessionmaker():
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    return async_sessionmaker(get_async_engine(), autoflush=False, expire_on_commit=False)
+
+
+def dialect_insert(db, table):
+    """``INSERT`` for ``table`` with the bound dialect's ``ON CONFLICT`` support."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
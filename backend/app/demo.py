@@ -1,36 +1,39 @@
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 
-from . import models
-from .db import Base, engine, SessionLocal
+from . import models, seeding, tenancy
+from .cache import response_cache
+from .db import engine
 
+DEMO = {
+    models.Cooperative: [{"id": models.DEFAULT_TENANT, "name": "Default cooperative"}],
+    models.Unit: [{"id": 1, "name": "101"}, {"id": 2, "name": "102"}],
+    models.Member: [
+        {"id": 1, "name": "Alice", "email": "alice@example.com", "unit_id": 1},
+        {"id": 2, "name": "Bob", "email": "bob@example.com", "unit_id": 2},
+    ],
+    models.Lane: [
+        {"id": 1, "name": "Backlog", "sort_index": 1024.0},
+        {"id": 2, "name": "In Progress", "sort_index": 2048.0},
+        {"id": 3, "name": "Done", "sort_index": 3072.0},
+    ],
+    models.Task: [
+        {"id": 1, "title": "Paint hallway", "assignee_id": 1, "lane_id": 1, "sort_index": 1024.0},
+        {"id": 2, "title": "Fix sink", "assignee_id": 2, "lane_id": 1, "sort_index": 2048.0},
+    ],
+}
 
-def seed_demo_data(session: Session) -> None:
-    """Insert demo Units, Members and Tasks if tables are empty."""
-    if not session.query(models.Unit).first():
-        session.add_all([
-            models.Unit(name="101"),
-            models.Unit(name="102"),
-        ])
-        session.commit()
-
-    if not session.query(models.Member).first():
-        session.add_all([
-            models.Member(name="Alice", email="alice@example.com", unit_id=1),
-            models.Member(name="Bob", email="bob@example.com", unit_id=2),
-        ])
-        session.commit()
 
-    if not session.query(models.Task).first():
-        session.add_all([
-            models.Task(title="Paint hallway", assignee_id=1),
-            models.Task(title="Fix sink", assignee_id=2),
-        ])
-        session.commit()
+def seed_demo_data(session: Session) -> None:
+    """Insert demo Units, Members, Lanes and Tasks into empty tables, in one transaction."""
+    for model, rows in DEMO.items():
+        if session.scalar(select(model.id).limit(1)) is None:
+            session.execute(insert(model), rows)
+    seeding.finish(session)
 
 
 def reset_demo_db() -> None:
-    """Drop all tables and recreate them with demo data."""
-    Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
-    with SessionLocal() as session:
-        seed_demo_data(session)
+    """Replace everything in the database with the demo data."""
+    seeding.reset(engine, "demo", seed_demo_data)
+    tenancy.forget()
+    response_cache.invalidate("units", "members", "tasks", "lanes")
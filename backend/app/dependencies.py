@@ -1,9 +1,27 @@
-from .db import SessionLocal
+from fastapi import Depends, Request
+from sqlalchemy.orm import Session
 
+from . import history, tenancy
+from .db import SessionLocal, get_async_sessionmaker
 
-def get_db():
+
+def get_db(request: Request):
     db = SessionLocal()
     try:
+        request.state.tenant_id = tenancy.use(db, request.headers.get(tenancy.HEADER))
+        history.use(db, request.headers.get(history.HEADER))
         yield db
     finally:
         db.close()
+
+
+async def get_async_db(request: Request):
+    async with get_async_sessionmaker()() as db:
+        request.state.tenant_id = await db.run_sync(tenancy.use, request.headers.get(tenancy.HEADER))
+        history.use(db.sync_session, request.headers.get(history.HEADER))
+        yield db
+
+
+def get_tenant(request: Request, db: Session = Depends(get_db)) -> int:
+    """The requesting cooperative, for routes that open their own sessions."""
+    return request.state.tenant_id
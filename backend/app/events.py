@@ -0,0 +1,260 @@
+"""Live change notifications for WebSocket subscribers.
+
+The CRUD write paths call :func:`EventHub.publish` after each commit. Changes
+are coalesced per entity over a short window and sent as one message per
+topic and cooperative, e.g. ``{"topic": "tasks.updated", "tenant_id": 1,
+"created": [7], "updated": [3, 4], "deleted": []}``. Clients refetch what
+they need, so a message only has to say *what* changed. A subscriber only
+gets the messages of its own cooperative.
+
+Messages travel through a broker so every worker sees every change: Redis
+pub/sub in multi-worker deployments, or an in-process broker for a single
+worker and tests. Each subscriber has a bounded queue; when a slow client
+falls behind, its backlog is replaced by a single ``resync`` message instead
+of growing without limit. Subscribers also get ``resync`` when the worker
+reconnects to Redis, since messages sent while it was away are lost.
+"""
+import asyncio
+import contextlib
+import json
+import logging
+import threading
+from collections import defaultdict
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .config import Settings, settings
+from .db import Base
+from .tenancy import current
+
+logger = logging.getLogger(__name__)
+
+TOPICS = {
+    "units": "units.updated",
+    "members": "members.updated",
+    "tasks": "tasks.updated",
+    "lanes": "lanes.updated",
+    "proposals": "proposals.updated",
+}
+OP_KEYS = {"create": "created", "update": "updated", "delete": "deleted"}
+RESYNC = json.dumps({"topic": "resync"})
+RECONNECT_MIN = 0.1  # seconds; doubled after each failed attempt
+RECONNECT_MAX = 5.0
+
+
+class Subscriber:
+    def __init__(self, topics: set[str], tenant_id: int, maxsize: int):
+        self.topics = topics
+        self.tenant_id = tenant_id
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def offer(self, message: str) -> None:
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+                self.dropped += 1
+            self.queue.put_nowait(RESYNC)
+
+
+class MemoryBroker:
+    async def start(self, deliver, resync) -> None:
+        self._deliver = deliver
+
+    async def publish(self, message: str) -> None:
+        self._deliver(message)
+
+    async def stop(self) -> None:
+        pass
+
+
+class RedisBroker:
+    def __init__(self, url: str, channel: str = "tc:events"):
+        self.url = url
+        self.channel = channel
+        self._task = None
+
+    async def start(self, deliver, resync) -> None:
+        import redis.asyncio as redis
+
+        self._redis = redis.Redis.from_url(self.url)
+        self._pubsub = self._redis.pubsub()
+        await self._pubsub.subscribe(self.channel)
+        self._task = asyncio.create_task(self._listen(deliver, resync))
+
+    async def _listen(self, deliver, resync) -> None:
+        """Deliver messages until cancelled, reconnecting with backoff when Redis goes away."""
+        delay = RECONNECT_MIN
+        while True:
+            try:
+                if self._pubsub is None:
+                    self._pubsub = self._redis.pubsub()
+                    await self._pubsub.subscribe(self.channel)
+                    resync()
+                delay = RECONNECT_MIN
+                async for message in self._pubsub.listen():
+                    if message["type"] == "message":
+                        deliver(message["data"].decode())
+            except Exception:
+                logger.warning("lost the events channel; reconnecting in %.1fs", delay, exc_info=True)
+            pubsub, self._pubsub = self._pubsub, None
+            if pubsub is not None:
+                with contextlib.suppress(Exception):
+                    await pubsub.aclose()
+            await asyncio.sleep(delay)
+            delay = min(2 * delay, RECONNECT_MAX)
+
+    async def publish(self, message: str) -> None:
+        await self._redis.publish(self.channel, message)
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            if self._pubsub is not None:
+                await self._pubsub.aclose()
+            await self._redis.aclose()
+
+
+def _merge(previous: str | None, op: str) -> str:
+    if op == "delete" or previous is None:
+        return op
+    return "create" if previous == "create" else op
+
+
+class EventHub:
+    def __init__(self, broker, flush_interval: float = 0.05, queue_size: int = 100):
+        self.broker = broker
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.broadcasts = 0
+        self._subscribers: dict[tuple[int, str], set[Subscriber]] = defaultdict(set)
+        self._pending: dict[tuple[int, str], dict[int, str]] = {}
+        self._flush_scheduled = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, config: Settings) -> "EventHub":
+        broker = RedisBroker(config.redis_url) if config.events_backend == "redis" else MemoryBroker()
+        return cls(broker, config.events_flush_ms / 1000, config.events_queue_size)
+
+    async def ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self.loop is loop:
+            return
+        self.loop = loop
+        await self.broker.start(self._deliver, self._resync)
+
+    async def stop(self) -> None:
+        await self.broker.stop()
+        self.loop = None
+
+    # Publishing side; safe to call from any thread.
+
+    @property
+    def listening(self) -> bool:
+        """False until this worker starts the hub; until then nobody can listen."""
+        return self.loop is not None and not self.loop.is_closed()
+
+    def publish(self, tenant_id: int, entity: str, op: str, ids) -> None:
+        loop = self.loop
+        if not self.listening:
+            return
+        with self._lock:
+            pending = self._pending.setdefault((tenant_id, entity), {})
+            for row_id in ids:
+                pending[row_id] = _merge(pending.get(row_id), op)
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        try:
+            loop.call_soon_threadsafe(loop.call_later, self.flush_interval, self._start_flush)
+        except RuntimeError:  # loop closed in the meantime
+            self._flush_scheduled = False
+
+    def _start_flush(self) -> None:
+        asyncio.ensure_future(self.flush())
+
+    async def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flush_scheduled = False
+        for (tenant_id, entity), changes in pending.items():
+            message = {"topic": TOPICS[entity], "tenant_id": tenant_id, "created": [], "updated": [], "deleted": []}
+            for row_id, op in changes.items():
+                message[OP_KEYS[op]].append(row_id)
+            try:
+                await self.broker.publish(json.dumps(message, separators=(",", ":")))
+            except Exception:
+                logger.warning("could not publish %s changes", entity, exc_info=True)
+
+    # Delivery side; runs on the event loop.
+
+    def _deliver(self, message: str) -> None:
+        fields = json.loads(message)
+        self.broadcasts += 1
+        for subscriber in self._subscribers.get((fields.get("tenant_id"), fields["topic"]), ()):
+            subscriber.offer(message)
+
+    def _resync(self) -> None:
+        for subscriber in set().union(*self._subscribers.values()):
+            subscriber.offer(RESYNC)
+
+    def subscribe(self, topics: set[str], tenant_id: int) -> Subscriber:
+        subscriber = Subscriber(topics, tenant_id, self.queue_size)
+        for topic in topics:
+            self._subscribers[tenant_id, topic].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        for topic in subscriber.topics:
+            key = (subscriber.tenant_id, topic)
+            self._subscribers[key].discard(subscriber)
+            if not self._subscribers[key]:
+                del self._subscribers[key]
+
+    def stats(self) -> dict:
+        subscribers = set().union(*self._subscribers.values())
+        return {
+            "subscribers": len(subscribers),
+            "broadcasts": self.broadcasts,
+            "dropped": sum(s.dropped for s in subscribers),
+        }
+
+
+def notify(db: Session, entity: str, op: str, ids) -> None:
+    """Publish committed changes to ``entity`` rows to their cooperative's subscribers.
+
+    Sessions without a cooperative (Celery jobs, the CLI) look up whose rows
+    they changed; rows that no longer exist are skipped.
+    """
+    tenant_id = current(db)
+    if tenant_id is not None:
+        hub.publish(tenant_id, entity, op, ids)
+        return
+    if not hub.listening:
+        return
+    table = Base.metadata.tables[entity]
+    owners: dict[int, list[int]] = defaultdict(list)
+    for row_tenant, row_id in db.execute(select(table.c.tenant_id, table.c.id).where(table.c.id.in_(list(ids)))):
+        owners[row_tenant].append(row_id)
+    for row_tenant, row_ids in owners.items():
+        hub.publish(row_tenant, entity, op, row_ids)
+
+
+def parse_topics(topics: str | None) -> set[str]:
+    """Accept ``tasks`` or ``tasks.updated``; default to every topic."""
+    if not topics:
+        return set(TOPICS.values())
+    names = {name.strip() for name in topics.split(",") if name.strip()}
+    parsed = {TOPICS.get(name, name) for name in names}
+    unknown = parsed - set(TOPICS.values())
+    if unknown:
+        raise ValueError(f"unknown topics {sorted(unknown)}")
+    return parsed
+
+
+hub = EventHub.from_settings(settings)
@@ -0,0 +1,92 @@
+"""``expand=`` support for the list and detail routes.
+
+Each expansion maps to the loader strategy that fetches it in a constant
+number of statements: ``joinedload`` for many-to-one references (one JOIN in
+the main query) and ``selectinload`` for collections (one extra ``IN`` query
+per page), so the statement count no longer grows with the number of rows.
+"""
+from sqlalchemy.orm import joinedload, selectinload
+
+from . import models, schemas
+
+EXPANSIONS = {
+    "units": {
+        "members": lambda: selectinload(models.Unit.members),
+    },
+    "members": {
+        "unit": lambda: joinedload(models.Member.unit),
+        "tasks": lambda: selectinload(models.Member.tasks),
+    },
+    "tasks": {
+        "assignee": lambda: joinedload(models.Task.assignee),
+        "assignee.unit": lambda: joinedload(models.Task.assignee).joinedload(models.Member.unit),
+    },
+}
+
+
+# Cache namespaces an expanded response depends on besides its own entity.
+DEPENDENCIES = {
+    "members": {"members"},
+    "unit": {"units"},
+    "tasks": {"tasks"},
+    "assignee": {"members"},
+    "assignee.unit": {"members", "units"},
+}
+
+
+class ExpansionError(ValueError):
+    pass
+
+
+def parse_expand(entity: str, expand: str | None) -> frozenset[str]:
+    if not expand:
+        return frozenset()
+    requested = frozenset(part.strip() for part in expand.split(",") if part.strip())
+    unknown = requested - EXPANSIONS[entity].keys()
+    if unknown:
+        raise ExpansionError(
+            f"cannot expand {', '.join(sorted(unknown))} on {entity}; "
+            f"expected one of {sorted(EXPANSIONS[entity])}"
+        )
+    return requested
+
+
+def cache_namespaces(entity: str, expand: frozenset[str]) -> set[str]:
+    namespaces = {entity}
+    for name in expand:
+        namespaces |= DEPENDENCIES[name]
+    return namespaces
+
+
+def load_options(entity: str, expand: frozenset[str]) -> list:
+    return [EXPANSIONS[entity][name]() for name in sorted(expand)]
+
+
+def _dump(schema, obj) -> dict:
+    return schema.model_validate(obj).model_dump()
+
+
+def serialize_unit(unit: models.Unit, expand: frozenset[str]) -> dict:
+    data = _dump(schemas.Unit, unit)
+    if "members" in expand:
+        data["members"] = [_dump(schemas.Member, member) for member in unit.members]
+    return data
+
+
+def serialize_member(member: models.Member, expand: frozenset[str]) -> dict:
+    data = _dump(schemas.Member, member)
+    if "unit" in expand:
+        data["unit"] = member.unit and _dump(schemas.Unit, member.unit)
+    if "tasks" in expand:
+        data["tasks"] = [_dump(schemas.Task, task) for task in member.tasks]
+    return data
+
+
+def serialize_task(task: models.Task, expand: frozenset[str]) -> dict:
+    data = _dump(schemas.Task, task)
+    if expand & {"assignee", "assignee.unit"}:
+        assignee = task.assignee
+        data["assignee"] = assignee and _dump(schemas.Member, assignee)
+        if assignee and "assignee.unit" in expand:
+            data["assignee"]["unit"] = assignee.unit and _dump(schemas.Unit, assignee.unit)
+    return data
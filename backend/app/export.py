@@ -0,0 +1,88 @@
+import csv
+import datetime
+import enum
+import io
+import json
+from typing import Iterator
+
+from sqlalchemy import select
+
+from . import models
+from .db import SessionLocal
+
+EXPORT_MODELS = {"units": models.Unit, "members": models.Member, "tasks": models.Task}
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+BATCH_SIZE = 1000
+
+
+def _plain(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+def _exported(model, incremental: bool = False) -> list:
+    """The exported columns; the cooperative is implied by the request.
+
+    Only incremental exports carry ``deleted_at``: a full export has no
+    deleted rows.
+    """
+    skipped = ("tenant_id",) if incremental else ("tenant_id", "deleted_at")
+    return [column for column in model.__table__.c if column.name not in skipped]
+
+
+def _batches(
+    model, updated_since: datetime.datetime | None, batch_size: int, tenant_id: int | None,
+) -> Iterator[tuple[list, list]]:
+    """Yield ``(columns, rows)`` batches of plain column tuples.
+
+    ``yield_per`` streams from a server-side cursor where the driver supports
+    one, so memory stays bounded by the batch size instead of the table size.
+    The session is opened here rather than taken from ``get_db`` because it
+    has to outlive the route handler while the response streams, so the
+    cooperative and deleted rows are filtered on explicitly.
+
+    With ``updated_since``, rows deleted after it are included with their
+    ``deleted_at``, so that a consumer following the feed learns of them.
+    Deleting a row also bumps its ``updated_at``.
+    """
+    table = model.__table__
+    exported = _exported(model, incremental=updated_since is not None)
+    stmt = select(*exported).order_by(table.c.id).execution_options(yield_per=batch_size)
+    if tenant_id is not None:
+        stmt = stmt.where(table.c.tenant_id == tenant_id)
+    if updated_since is not None:
+        stmt = stmt.where(table.c.updated_at > updated_since)
+    else:
+        stmt = stmt.where(table.c.deleted_at.is_(None))
+    columns = [column.name for column in exported]
+    with SessionLocal() as db:
+        for partition in db.execute(stmt).partitions():
+            yield columns, partition
+
+
+def ndjson_stream(model, updated_since=None, batch_size: int = BATCH_SIZE, tenant_id=None) -> Iterator[bytes]:
+    for columns, rows in _batches(model, updated_since, batch_size, tenant_id):
+        lines = (
+            json.dumps({name: _plain(value) for name, value in zip(columns, row)}, separators=(",", ":"))
+            for row in rows
+        )
+        yield ("\n".join(lines) + "\n").encode()
+
+
+def csv_stream(model, updated_since=None, batch_size: int = BATCH_SIZE, tenant_id=None) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(column.name for column in _exported(model, incremental=updated_since is not None))
+    for _, rows in _batches(model, updated_since, batch_size, tenant_id):
+        writer.writerows([_plain(value) for value in row] for row in rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+STREAMS = {"ndjson": ndjson_stream, "csv": csv_stream}
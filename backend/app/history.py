@@ -0,0 +1,245 @@
+"""Append-only change history of the rows the CRUD layer writes.
+
+Every create, update and delete in ``app.crud``, and closing a proposal,
+adds one ``changes`` row per changed row before it commits, so the history
+commits or rolls back with the write. A write's entries go in as one
+multi-row INSERT. Each entry records the entity, the row id, the operation,
+the ``X-Actor`` header of the request and the time. It also stores the
+fields the write set, as compact JSON: every logged field for a create, the
+fields in the request for an update, and nothing for a delete::
+
+    {"status":"done","due_date":"2026-05-01"}
+
+Old values are not read on the write path. ``GET /history/{entity}/{id}``
+rebuilds them by replaying the row's earlier entries, so each entry there
+also has ``previous``, the values the write replaced (as far as the history
+goes back). ``GET /history/{entity}?since=&until=`` lists a time range. Both
+are index seeks on ``(tenant_id, entity, entity_id, id)`` and
+``(tenant_id, entity, changed_at, id)``.
+
+Units, members and tasks are soft-deleted (``models.SoftDeleted``), so a
+deleted row and everything that refers to it stay in place.
+
+On PostgreSQL, ``python -m app.cli partition-history`` turns ``changes``
+into monthly RANGE partitions. The daily ``maintain-history`` beat job then
+creates the coming months ahead of time and drops whole months past the
+last ``HISTORY_RETENTION_MONTHS``. Elsewhere the job deletes those rows
+instead.
+"""
+import datetime
+import json
+import re
+
+from sqlalchemy import delete, insert, select, text
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex
+
+from .config import settings
+from .export import _plain
+from .models import DEFAULT_TENANT, Change, utcnow
+from .pagination import keyset_page
+from .tenancy import owners
+
+HEADER = "X-Actor"
+
+# The fields kept per entity; bookkeeping columns (version, updated_at,
+# reminded_at, the vote counters) are left out.
+FIELDS = {
+    "units": ("name",),
+    "members": ("name", "email", "unit_id"),
+    "lanes": ("name", "sort_index"),
+    "tasks": ("title", "status", "priority", "due_date", "assignee_id", "lane_id", "sort_index"),
+    "proposals": ("title", "description", "quorum", "closes_at", "closed_at"),
+}
+SORTS = {"changed_at": Change.changed_at}
+
+# Months of partitions kept ready past the current one.
+MONTHS_AHEAD = 2
+PARTITION = re.compile(r"^changes_y(\d{4})m(\d{2})$")
+
+
+def use(db: Session, header: str | None) -> None:
+    """Attribute ``db``'s writes to the actor named by ``header``."""
+    db.info["actor"] = header[:200] if header else None
+
+
+def snapshot(entity: str, row) -> dict:
+    """The logged fields of a new row, an ORM object or Core row."""
+    return {name: getattr(row, name) for name in FIELDS[entity]}
+
+
+def written(entity: str, values: dict) -> dict:
+    """The logged fields among the ``values`` an update wrote."""
+    return {name: value for name, value in values.items() if name in FIELDS[entity]}
+
+
+def _encode(fields: dict | None) -> str | None:
+    if fields is None:
+        return None
+    return json.dumps({name: _plain(value) for name, value in fields.items()}, separators=(",", ":"))
+
+
+def record(db: Session, entity: str, op: str, changes: dict) -> None:
+    """Log the rows changed in ``db``'s transaction; the caller commits.
+
+    ``changes`` maps each row id to the fields written, or None for deletes.
+    """
+    if not settings.history or not changes:
+        return
+    # A row already gone from an unscoped session's view can only have been
+    # hard-deleted; it is logged under the default cooperative.
+    tenants = owners(db, entity, changes)
+    actor = db.info.get("actor")
+    now = utcnow()
+    db.execute(insert(Change.__table__), [
+        {
+            "tenant_id": tenants.get(row_id, DEFAULT_TENANT), "entity": entity, "entity_id": row_id, "op": op,
+            "actor": actor, "changed_at": now, "fields": _encode(fields),
+        }
+        for row_id, fields in changes.items()
+    ])
+
+
+def entry(change: Change) -> dict:
+    return {
+        "id": change.id,
+        "entity": change.entity,
+        "entity_id": change.entity_id,
+        "op": change.op,
+        "actor": change.actor,
+        "changed_at": change.changed_at,
+        "fields": json.loads(change.fields) if change.fields is not None else None,
+    }
+
+
+def for_row(db: Session, entity: str, entity_id: int) -> list[dict]:
+    """Every entry for one row, oldest first, each with the values it replaced.
+
+    ``previous`` holds the earlier value of each field the entry set; fields
+    last set before the history began are missing from it. A delete's
+    ``previous`` is the row's last known state.
+    """
+    stmt = select(Change).where(Change.entity == entity, Change.entity_id == entity_id).order_by(Change.id)
+    state: dict = {}
+    entries = []
+    for change in db.scalars(stmt):
+        item = entry(change)
+        fields = item["fields"]
+        if change.op == "delete":
+            item["previous"] = dict(state)
+        elif change.op == "update":
+            item["previous"] = {name: state[name] for name in fields if name in state}
+        else:
+            item["previous"] = None
+        state.update(fields or {})
+        entries.append(item)
+    return entries
+
+
+def between(
+    db: Session, entity: str, since: datetime.datetime | None = None, until: datetime.datetime | None = None,
+    actor: str | None = None, cursor: str | None = None, sort: str = "changed_at", limit: int = 100,
+) -> list[Change]:
+    """Entries for ``entity`` with ``since <= changed_at < until``, paged by ``(changed_at, id)``."""
+    stmt = select(Change).where(Change.entity == entity)
+    if since is not None:
+        stmt = stmt.where(Change.changed_at >= since)
+    if until is not None:
+        stmt = stmt.where(Change.changed_at < until)
+    if actor is not None:
+        stmt = stmt.where(Change.actor == actor)
+    return list(db.scalars(keyset_page(stmt, Change, sort, SORTS, cursor, limit)))
+
+
+# Monthly partitions (PostgreSQL)
+
+def _month(day: datetime.date, offset: int = 0) -> datetime.date:
+    months = day.year * 12 + day.month - 1 + offset
+    return datetime.date(months // 12, months % 12 + 1, 1)
+
+
+def month_partitions(start: datetime.date, months: int) -> list[str]:
+    """DDL creating the partitions for ``months`` months from ``start``'s month, if missing."""
+    statements = []
+    for offset in range(months):
+        lower, upper = _month(start, offset), _month(start, offset + 1)
+        statements.append(
+            f"CREATE TABLE IF NOT EXISTS changes_y{lower.year}m{lower.month:02d} PARTITION OF changes "
+            f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+    return statements
+
+
+def partition_statements(first: datetime.date, today: datetime.date) -> list[str]:
+    """PostgreSQL DDL that turns ``changes`` into RANGE(changed_at) monthly partitions.
+
+    There is one partition per month from ``first``'s (the oldest entry)
+    through ``MONTHS_AHEAD`` months past ``today``'s, plus a default
+    partition for anything outside them. The primary key must contain the
+    partition key, so it becomes ``(id, changed_at)``; ids still come from
+    the same sequence. The rows are copied inside the same transaction.
+    """
+    from sqlalchemy.dialects import postgresql
+
+    months = (today.year - first.year) * 12 + today.month - first.month + MONTHS_AHEAD + 1
+    statements = [
+        "ALTER TABLE changes RENAME TO changes_unpartitioned",
+        "CREATE TABLE changes (LIKE changes_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        "PARTITION BY RANGE (changed_at)",
+    ]
+    statements += month_partitions(first, months)
+    statements += [
+        "CREATE TABLE changes_default PARTITION OF changes DEFAULT",
+        "INSERT INTO changes SELECT * FROM changes_unpartitioned",
+        # Otherwise dropping the old table would drop the id sequence with it.
+        "ALTER SEQUENCE changes_id_seq OWNED BY changes.id",
+        "DROP TABLE changes_unpartitioned",
+        "ALTER TABLE changes ADD PRIMARY KEY (id, changed_at)",
+        "ALTER TABLE changes ADD FOREIGN KEY (tenant_id) REFERENCES cooperatives (id)",
+    ]
+    dialect = postgresql.dialect()
+    statements += [
+        str(CreateIndex(index).compile(dialect=dialect))
+        for index in sorted(Change.__table__.indexes, key=lambda index: index.name)
+    ]
+    return statements
+
+
+def _partitions(db: Session) -> list[str] | None:
+    """The monthly partitions of ``changes``, or None if it is not partitioned."""
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    if db.scalar(text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('changes')"
+    )) is None:
+        return None
+    return list(db.scalars(text(
+        "SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = 'changes'::regclass"
+    )))
+
+
+def maintain(db: Session, today: datetime.date, retention_months: int) -> int:
+    """Prepare the coming months and drop the expired ones; the caller commits.
+
+    ``retention_months`` months are kept, the current one included; with 0
+    nothing is dropped. Returns the number of
+    partitions dropped, or of rows deleted when ``changes`` is not
+    partitioned.
+    """
+    cutoff = _month(today, 1 - retention_months) if retention_months else None
+    partitions = _partitions(db)
+    if partitions is None:
+        if cutoff is None:
+            return 0
+        return db.execute(delete(Change).where(Change.changed_at < cutoff)).rowcount
+    for statement in month_partitions(today, MONTHS_AHEAD + 1):
+        db.execute(text(statement))
+    dropped = 0
+    for name in partitions:
+        match = PARTITION.match(name)
+        if cutoff is None or not match:
+            continue
+        if _month(datetime.date(int(match.group(1)), int(match.group(2)), 1), 1) <= cutoff:
+            db.execute(text(f"DROP TABLE {name}"))
+            dropped += 1
+    return dropped
@@ -0,0 +1,176 @@
+"""Replay the response to a retried write instead of applying it twice.
+
+A client that may retry a ``POST``, ``PUT``, ``PATCH`` or ``DELETE`` sends an
+``Idempotency-Key`` header with a value it never reuses, e.g. a UUID. The
+first request with a key claims it by inserting a row into
+``idempotency_keys``; as with ballots, ``ON CONFLICT DO NOTHING`` decides
+which of two simultaneous requests gets it. That request runs normally, and
+its response is stored in the row before it is sent. Later requests with the
+same key:
+
+* get the stored response again with ``Idempotent-Replayed: true``, and
+  nothing is written;
+* get 409 while the first request is still running;
+* get 422 if their method, path, query or body differ from the first's.
+
+The ``X-Cooperative-Id`` header is part of the fingerprint, so a key reused
+under another cooperative gets 422 and never that cooperative's response.
+
+A 5xx response is not stored: the key is released so that a retry runs
+again. Keys are kept for ``IDEMPOTENCY_TTL`` seconds. If a worker dies after
+claiming a key, retries get 409 until the key expires.
+"""
+import datetime
+import hashlib
+import json
+
+from sqlalchemy import delete, select, update
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+from .config import Settings, settings
+from .db import SessionLocal, dialect_insert
+from .models import DEFAULT_TENANT, IdempotencyKey, utcnow
+from .tenancy import HEADER
+
+METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+MAX_KEY_LENGTH = 255
+REPLAYED = (b"idempotent-replayed", b"true")
+
+
+def fingerprint(scope, body: bytes) -> str:
+    digest = hashlib.sha256()
+    tenant = Headers(raw=scope.get("headers", [])).get(HEADER, str(DEFAULT_TENANT))
+    for part in (scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""), tenant.encode(), body):
+        digest.update(part)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def claim(key: str, request_fingerprint: str, ttl: int):
+    """Claim ``key`` for a new request, or return the row of an earlier one."""
+    table = IdempotencyKey.__table__
+    now = utcnow()
+    with SessionLocal() as db:
+        while True:
+            db.execute(delete(table).where(
+                table.c.key == key, table.c.created_at < now - datetime.timedelta(seconds=ttl),
+            ))
+            insert = dialect_insert(db, table).values(key=key, fingerprint=request_fingerprint, created_at=now)
+            claimed = db.execute(insert.on_conflict_do_nothing(index_elements=["key"]).returning(table.c.key)).first()
+            db.commit()
+            if claimed is not None:
+                return None
+            earlier = db.execute(select(table).where(table.c.key == key)).first()
+            if earlier is not None:
+                return earlier
+            # Released between the two statements; claim it again.
+
+
+def store(key: str, status: int, headers: list, body: bytes) -> None:
+    table = IdempotencyKey.__table__
+    with SessionLocal() as db:
+        db.execute(
+            update(table).where(table.c.key == key)
+            .values(status_code=status, headers=json.dumps(headers), body=body)
+        )
+        db.commit()
+
+
+def release(key: str) -> None:
+    with SessionLocal() as db:
+        db.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key))
+        db.commit()
+
+
+def purge(db, ttl: int, now: datetime.datetime | None = None) -> int:
+    """Delete expired keys; the caller commits."""
+    cutoff = (now or utcnow()) - datetime.timedelta(seconds=ttl)
+    return db.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < cutoff)).rowcount
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+class IdempotencyMiddleware:
+    """Plain ASGI middleware; requests without the header pass straight through."""
+
+    def __init__(self, app, config: Settings = settings):
+        self.app = app
+        self.config = config
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in METHODS:
+            await self.app(scope, receive, send)
+            return
+        key = Headers(scope=scope).get("idempotency-key")
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not 0 < len(key) <= MAX_KEY_LENGTH:
+            response = JSONResponse({"detail": f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"}, 400)
+            await response(scope, receive, send)
+            return
+
+        body = await _read_body(receive)
+        request_fingerprint = fingerprint(scope, body)
+        earlier = await run_in_threadpool(claim, key, request_fingerprint, self.config.idempotency_ttl)
+        if earlier is not None:
+            await self._replay(earlier, request_fingerprint, scope, receive, send)
+            return
+
+        replayed = False
+
+        async def receive_body():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        start, chunks = None, []
+
+        async def send_and_store(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body") and start["status"] < 500:
+                    # Stored before the client sees it, so a retry after
+                    # this response always gets it replayed.
+                    headers = [
+                        [name.decode("latin-1"), value.decode("latin-1")] for name, value in start.get("headers", [])
+                    ]
+                    await run_in_threadpool(store, key, start["status"], headers, b"".join(chunks))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_body, send_and_store)
+        except BaseException:
+            await run_in_threadpool(release, key)
+            raise
+        if start is None or start["status"] >= 500:
+            await run_in_threadpool(release, key)
+
+    async def _replay(self, earlier, request_fingerprint: str, scope, receive, send) -> None:
+        if earlier.fingerprint != request_fingerprint:
+            response = JSONResponse({"detail": "Idempotency-Key was already used for a different request"}, 422)
+        elif earlier.status_code is None:
+            response = JSONResponse(
+                {"detail": "a request with this Idempotency-Key is still being processed"}, 409,
+                headers={"Retry-After": "1"},
+            )
+        else:
+            headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in json.loads(earlier.headers)]
+            await send({"type": "http.response.start", "status": earlier.status_code, "headers": [*headers, REPLAYED]})
+            await send({"type": "http.response.body", "body": earlier.body})
+            return
+        await response(scope, receive, send)
@@ -0,0 +1,224 @@
+"""Per-request timings, SQL statement counts and a slow-query log.
+
+:class:`InstrumentationMiddleware` wraps every HTTP request in a
+:class:`RequestStats` held in a context variable. Engine-wide SQLAlchemy
+hooks add each statement's count and duration to the stats of the request
+that ran it. Because the variable is copied into the worker threads of sync
+handlers and into SQLAlchemy's greenlets, this works on the sync and async
+paths alike.
+When the response starts, the totals go out in a ``Server-Timing`` header.
+When it ends, they are added to per-route histograms and counters, which
+``GET /metrics`` serves in the Prometheus text format.
+
+Statements slower than ``SLOW_QUERY_MS`` are logged to ``app.sql.slow``
+with their parameters and the route that ran them.
+
+Everything is off unless ``INSTRUMENTATION=1``. When it is off, the
+middleware is not installed and the SQL hooks return at once because no
+request has stats.
+"""
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import Settings, settings
+
+logger = logging.getLogger("app.sql.slow")
+
+# Upper bounds in seconds, as in the Prometheus client defaults.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MAX_LOGGED_PARAMS = 500  # characters
+
+
+class RequestStats:
+    __slots__ = ("scope", "slow_query_ms", "statements", "db_seconds")
+
+    def __init__(self, scope: dict, slow_query_ms: int = 0):
+        self.scope = scope
+        self.slow_query_ms = slow_query_ms
+        self.statements = 0
+        self.db_seconds = 0.0
+
+    @property
+    def route(self) -> str:
+        """The matched route template, e.g. ``/tasks/{task_id}``.
+
+        Templates rather than paths keep the number of label values bounded.
+        """
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or "unmatched"
+
+
+_current: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for index, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.total += value
+        self.count += 1
+
+
+class Registry:
+    """Process-wide counters, labelled by method and route template."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency: dict[tuple[str, str], Histogram] = {}
+        self.requests: dict[tuple[str, str, int], int] = {}
+        self.statements: dict[tuple[str, str], int] = {}
+        self.db_seconds: dict[tuple[str, str], float] = {}
+        self.slow_queries = 0
+
+    def record(self, method: str, route: str, status: int, seconds: float, stats: RequestStats) -> None:
+        key = (method, route)
+        with self._lock:
+            histogram = self.latency.get(key)
+            if histogram is None:
+                histogram = self.latency[key] = Histogram()
+            histogram.observe(seconds)
+            self.requests[key + (status,)] = self.requests.get(key + (status,), 0) + 1
+            self.statements[key] = self.statements.get(key, 0) + stats.statements
+            self.db_seconds[key] = self.db_seconds.get(key, 0.0) + stats.db_seconds
+
+    def slow_query(self) -> None:
+        with self._lock:
+            self.slow_queries += 1
+
+    def render(self) -> str:
+        """The Prometheus text exposition format."""
+        with self._lock:
+            latency = {key: (list(h.counts), h.total, h.count) for key, h in self.latency.items()}
+            requests, statements = dict(self.requests), dict(self.statements)
+            db_seconds, slow_queries = dict(self.db_seconds), self.slow_queries
+
+        lines = [
+            "# HELP tc_http_request_duration_seconds Time from request to the end of the response.",
+            "# TYPE tc_http_request_duration_seconds histogram",
+        ]
+        for (method, route), (counts, total, count) in sorted(latency.items()):
+            labels = f'method="{method}",route="{_escape(route)}"'
+            cumulative = 0
+            for bound, bucket in zip(BUCKETS, counts):
+                cumulative += bucket
+                lines.append(f'tc_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'tc_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"tc_http_request_duration_seconds_sum{{{labels}}} {total}")
+            lines.append(f"tc_http_request_duration_seconds_count{{{labels}}} {count}")
+
+        lines += ["# HELP tc_http_requests_total Requests by status code.", "# TYPE tc_http_requests_total counter"]
+        for (method, route, status), value in sorted(requests.items()):
+            lines.append(f'tc_http_requests_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {value}')
+
+        lines += ["# HELP tc_db_statements_total SQL statements run by requests.", "# TYPE tc_db_statements_total counter"]
+        for (method, route), value in sorted(statements.items()):
+            lines.append(f'tc_db_statements_total{{method="{method}",route="{_escape(route)}"}} {value}')
+
+        lines += ["# HELP tc_db_seconds_total Time requests spent in SQL statements.", "# TYPE tc_db_seconds_total counter"]
+        for (method, route), value in sorted(db_seconds.items()):
+            lines.append(f'tc_db_seconds_total{{method="{method}",route="{_escape(route)}"}} {value}')
+
+        lines += [
+            "# HELP tc_db_slow_queries_total Statements slower than SLOW_QUERY_MS.",
+            "# TYPE tc_db_slow_queries_total counter",
+            f"tc_db_slow_queries_total {slow_queries}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+registry = Registry()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    started = conn.info.get("query_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    stats.statements += 1
+    stats.db_seconds += elapsed
+    if stats.slow_query_ms and elapsed * 1000 >= stats.slow_query_ms:
+        registry.slow_query()
+        params = repr(parameters)
+        if len(params) > MAX_LOGGED_PARAMS:
+            params = params[:MAX_LOGGED_PARAMS] + "..."
+        logger.warning(
+            "slow query %.1f ms on %s: %s; parameters: %s",
+            elapsed * 1000, stats.route, " ".join(statement.split()), params,
+        )
+
+
+def _handle_error(context):
+    # A failed statement never reaches ``after_cursor_execute``; drop its start
+    # time, or the connection's next statement would be timed from it.
+    started = context.connection.info.get("query_started") if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+def install_sql_hooks() -> None:
+    """Listen on every engine, including the async engines' sync halves."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+
+class InstrumentationMiddleware:
+    """Plain ASGI middleware, so streamed responses are not buffered."""
+
+    def __init__(self, app, config: Settings = settings):
+        self.app = app
+        self.config = config
+        install_sql_hooks()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        stats = RequestStats(scope, self.config.slow_query_ms)
+        token = _current.set(stats)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                total_ms = (time.perf_counter() - started) * 1000
+                timing = (
+                    f'app;dur={total_ms:.1f}, db;dur={stats.db_seconds * 1000:.1f};desc="{stats.statements} queries"'
+                )
+                message["headers"] = [*message.get("headers", []), (b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            registry.record(scope["method"], stats.route, status, time.perf_counter() - started, stats)
@@ -1,26 +1,134 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Date, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    Column, Integer, String, Text, ForeignKey, Date, DateTime, Enum, Float, Index, LargeBinary, UniqueConstraint,
+    event, text,
+)
+from sqlalchemy.orm import Session, declared_attr, relationship, with_loader_criteria
+import datetime
 import enum
 
+from . import search
 from .db import Base
 
-class Unit(Base):
+
+def utcnow() -> datetime.datetime:
+    # Stored as naive UTC so comparisons behave the same on SQLite and PostgreSQL.
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+# Rows written without a cooperative (the demo data, single-cooperative
+# deployments) belong to this one.
+DEFAULT_TENANT = 1
+
+
+class Cooperative(Base):
+    """A tenant: every unit, member, lane, task and proposal belongs to one."""
+
+    __tablename__ = "cooperatives"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)
+    created_at = Column(DateTime, default=utcnow)
+
+
+class TenantScoped:
+    """Adds ``tenant_id``; queries on these models are scoped by ``app.tenancy``.
+
+    Indexes on these tables lead with ``tenant_id`` so that a cooperative's
+    queries never touch another's rows.
+    """
+
+    @declared_attr
+    def tenant_id(cls):
+        return Column(
+            Integer, ForeignKey("cooperatives.id"), nullable=False,
+            default=DEFAULT_TENANT, server_default=str(DEFAULT_TENANT),
+        )
+
+
+class SoftDeleted:
+    """Adds ``deleted_at``; ``app.crud`` stamps it instead of deleting the row.
+
+    ORM queries on these models skip deleted rows, see ``_hide_deleted``
+    below; pass ``execution_options(include_deleted=True)`` to see them.
+    Nothing that refers to a deleted row is looked up or rewritten, and the
+    row's change history (``app.history``) keeps pointing at it. Unique
+    indexes only cover live rows, so a deleted name can be used again.
+    """
+
+    deleted_at = Column(DateTime, nullable=True)
+
+
+LIVE = text("deleted_at IS NULL")
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _hide_deleted(state) -> None:
+    # Column loads refresh an object that was already loaded, e.g. the row
+    # a delete has just returned.
+    if state.is_column_load or state.execution_options.get("include_deleted"):
+        return
+    if state.is_select or state.is_update or state.is_delete:
+        state.statement = state.statement.options(with_loader_criteria(
+            SoftDeleted, lambda cls: cls.deleted_at.is_(None), include_aliases=True,
+        ))
+
+
+class Unit(SoftDeleted, TenantScoped, Base):
     __tablename__ = "units"
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, unique=True, index=True)
+    name = Column(String)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # see app.concurrency
 
     members = relationship("Member", back_populates="unit")
 
-class Member(Base):
+    __table_args__ = (
+        Index("ix_units_tenant_id_name", "tenant_id", "name", unique=True, sqlite_where=LIVE, postgresql_where=LIVE),
+        Index("ix_units_tenant_id_id", "tenant_id", "id"),
+        Index("ix_units_tenant_id_updated_at", "tenant_id", "updated_at"),
+    )
+
+class Member(SoftDeleted, TenantScoped, Base):
     __tablename__ = "members"
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, index=True)
-    email = Column(String, unique=True, index=True)
+    name = Column(String)
+    email = Column(String)
     unit_id = Column(Integer, ForeignKey("units.id"))
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # see app.concurrency
 
     unit = relationship("Unit", back_populates="members")
+    tasks = relationship("Task", back_populates="assignee")
+
+    __table_args__ = (
+        Index(
+            "ix_members_tenant_id_email", "tenant_id", "email", unique=True,
+            sqlite_where=LIVE, postgresql_where=LIVE,
+        ),
+        Index("ix_members_tenant_id_id", "tenant_id", "id"),
+        Index("ix_members_tenant_id_name_id", "tenant_id", "name", "id"),
+        Index("ix_members_tenant_id_updated_at", "tenant_id", "updated_at"),
+    )
+
+
+class Lane(TenantScoped, Base):
+    """A board column; tasks are ordered inside it by ``Task.sort_index``."""
+
+    __tablename__ = "lanes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String)
+    sort_index = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow, index=True)
+
+    tasks = relationship("Task", back_populates="lane")
+
+    __table_args__ = (
+        Index("ix_lanes_tenant_id_name", "tenant_id", "name", unique=True),
+        Index("ix_lanes_tenant_id_sort_index_id", "tenant_id", "sort_index", "id"),
+    )
 
 
 class TaskStatus(str, enum.Enum):
@@ -35,7 +143,7 @@ class TaskPriority(str, enum.Enum):
     high = "high"
 
 
-class Task(Base):
+class Task(SoftDeleted, TenantScoped, Base):
     __tablename__ = "tasks"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -44,5 +152,155 @@ class Task(Base):
     priority = Column(Enum(TaskPriority), default=TaskPriority.medium)
     due_date = Column(Date, nullable=True)
     assignee_id = Column(Integer, ForeignKey("members.id"), nullable=True)
+    lane_id = Column(Integer, ForeignKey("lanes.id", ondelete="SET NULL"), nullable=True)
+    sort_index = Column(Float, nullable=True)
+    # Set when the due-date reminder went out; cleared when due_date changes.
+    reminded_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # see app.concurrency
+
+    assignee = relationship("Member", back_populates="tasks")
+    lane = relationship("Lane", back_populates="tasks")
+
+    # Composite indexes backing keyset pagination: the tenant, then each list
+    # filter, then the sort key and the id tie-breaker.
+    __table_args__ = (
+        Index("ix_tasks_tenant_id_id", "tenant_id", "id"),
+        Index("ix_tasks_tenant_id_due_date_id", "tenant_id", "due_date", "id"),
+        Index("ix_tasks_tenant_id_status_due_date_id", "tenant_id", "status", "due_date", "id"),
+        Index("ix_tasks_tenant_id_assignee_id_due_date_id", "tenant_id", "assignee_id", "due_date", "id"),
+        Index("ix_tasks_tenant_id_priority_id", "tenant_id", "priority", "id"),
+        Index("ix_tasks_tenant_id_updated_at", "tenant_id", "updated_at"),
+        # Board order: neighbours of a task and the end of a lane are index
+        # seeks. A lane belongs to one cooperative, so it needs no tenant_id.
+        Index("ix_tasks_lane_id_sort_index_id", "lane_id", "sort_index", "id"),
+        # The due-date reminder sweep pages through every cooperative at once.
+        Index("ix_tasks_status_due_date_id", "status", "due_date", "id"),
+    )
+
+
+
+# Full-text search indexes on the side of these tables; see ``app.search``.
+search.install(Member.__table__)
+search.install(Task.__table__)
+
+# Precomputed task aggregates for the metrics routes, kept in step with the
+# task writes by ``app.aggregates``. ``assignee_id`` 0 stands for unassigned
+# so it can be part of the primary key.
+
+class TaskCount(TenantScoped, Base):
+    __tablename__ = "task_counts"
+
+    tenant_id = Column(Integer, primary_key=True)
+    assignee_id = Column(Integer, primary_key=True)
+    status = Column(Enum(TaskStatus), primary_key=True)
+    priority = Column(Enum(TaskPriority), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class TaskDueCount(TenantScoped, Base):
+    """Open tasks per assignee and due date; overdue counts sum a range of it."""
+
+    __tablename__ = "task_due_counts"
+
+    tenant_id = Column(Integer, primary_key=True)
+    assignee_id = Column(Integer, primary_key=True)
+    due_date = Column(Date, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class Proposal(TenantScoped, Base):
+    """A motion put to the members; ballots are tallied as they arrive.
+
+    ``yes_votes``/``no_votes``/``abstain_votes`` are running counters bumped by
+    ``app.vote_service`` in the transaction that inserts each ballot, so the
+    results never require counting ``votes``. ``quorum_reached_at`` is stamped
+    by the ballot that brings the total to ``quorum``.
+    """
+
+    __tablename__ = "proposals"
+
+    id = Column(Integer, primary_key=True, index=True)
+    title = Column(String, nullable=False)
+    description = Column(Text, nullable=True)
+    quorum = Column(Integer, nullable=False, default=1)
+    closes_at = Column(DateTime, nullable=True)
+    closed_at = Column(DateTime, nullable=True)
+    yes_votes = Column(Integer, nullable=False, default=0)
+    no_votes = Column(Integer, nullable=False, default=0)
+    abstain_votes = Column(Integer, nullable=False, default=0)
+    quorum_reached_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=utcnow)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow, index=True)
+
+    votes = relationship("Vote", back_populates="proposal", passive_deletes=True)
+
+    __table_args__ = (Index("ix_proposals_tenant_id_id", "tenant_id", "id"),)
+
+
+class VoteChoice(str, enum.Enum):
+    yes = "yes"
+    no = "no"
+    abstain = "abstain"
+
+
+class Vote(Base):
+    __tablename__ = "votes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    proposal_id = Column(Integer, ForeignKey("proposals.id", ondelete="CASCADE"), nullable=False)
+    member_id = Column(Integer, ForeignKey("members.id"), nullable=False)
+    choice = Column(Enum(VoteChoice), nullable=False)
+    cast_at = Column(DateTime, default=utcnow)
+
+    proposal = relationship("Proposal", back_populates="votes")
+    member = relationship("Member")
+
+    # One ballot per member and proposal, enforced by the database so that
+    # concurrent submissions cannot both get in.
+    __table_args__ = (UniqueConstraint("proposal_id", "member_id", name="uq_votes_proposal_id_member_id"),)
+
+
+class IdempotencyKey(Base):
+    """An ``Idempotency-Key`` sent with a write and the response it got; see ``app.idempotency``."""
+
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String, primary_key=True)
+    fingerprint = Column(String, nullable=False)  # of the method, path, query and body
+    status_code = Column(Integer, nullable=True)  # None while the first request is running
+    headers = Column(Text, nullable=True)  # JSON list of [name, value] pairs
+    body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime, default=utcnow, nullable=False, index=True)
+
+
+class OutboxEvent(Base):
+    """A committed change waiting to be handed to the job queue; see ``app.outbox``."""
+
+    __tablename__ = "outbox"
+
+    id = Column(Integer, primary_key=True)
+    tenant_id = Column(Integer, nullable=False)
+    entity = Column(String, nullable=False)  # table name, e.g. "tasks"
+    entity_id = Column(Integer, nullable=False)
+    op = Column(String, nullable=False)  # "create", "update" or "delete"
+    created_at = Column(DateTime, default=utcnow, nullable=False)
+
+
+class Change(TenantScoped, Base):
+    """One create, update or delete of a row and the fields it wrote; see ``app.history``."""
+
+    __tablename__ = "changes"
+
+    id = Column(Integer, primary_key=True)
+    entity = Column(String, nullable=False)  # table name, e.g. "tasks"
+    entity_id = Column(Integer, nullable=False)
+    op = Column(String, nullable=False)  # "create", "update" or "delete"
+    actor = Column(String, nullable=True)  # the X-Actor header of the request
+    changed_at = Column(DateTime, default=utcnow, nullable=False)
+    fields = Column(Text, nullable=True)  # compact JSON object; None for deletes
 
-    assignee = relationship("Member")
+    __table_args__ = (
+        Index("ix_changes_tenant_id_entity_entity_id_id", "tenant_id", "entity", "entity_id", "id"),
+        Index("ix_changes_tenant_id_entity_changed_at_id", "tenant_id", "entity", "changed_at", "id"),
+    )
@@ -0,0 +1,33 @@
+"""Fractional sort keys for ordering tasks inside a lane.
+
+A moved task gets a key halfway between its new neighbours, so a move
+rewrites one row no matter how long the lane is. Every halving uses up
+precision; once two neighbours are closer than ``MIN_GAP`` the lane is
+renumbered ``STEP`` apart again, which is the only operation that touches
+the whole lane.
+"""
+STEP = 1024.0
+MIN_GAP = 1e-6
+
+
+class ReorderError(ValueError):
+    pass
+
+
+def key_between(before: float | None, after: float | None) -> float:
+    """Key for a task placed after ``before`` and before ``after``."""
+    if before is None and after is None:
+        return STEP
+    if before is None:
+        return after - STEP
+    if after is None:
+        return before + STEP
+    return before + (after - before) / 2
+
+
+def is_dense(before: float | None, after: float | None) -> bool:
+    return before is not None and after is not None and after - before < MIN_GAP
+
+
+def spaced_keys(count: int, start: float = 0.0) -> list[float]:
+    return [start + STEP * (position + 1) for position in range(count)]
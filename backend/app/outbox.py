@@ -0,0 +1,203 @@
+"""Transactional outbox for background jobs.
+
+Writes that should start background work (notifications, score
+recomputation) call :func:`record` before they commit. It adds one
+``outbox`` row per changed entity in the same transaction, so a job exists
+exactly when the write commits and never for one that rolls back. The
+request does not wait for the broker either.
+
+A :class:`Relay` drains the table in batches, oldest first. Each batch is
+claimed with a single ``DELETE ... RETURNING`` (``FOR UPDATE SKIP LOCKED`` on
+PostgreSQL, so several relays can run side by side). Repeated events for the
+same row are coalesced, using the same rules as the WebSocket events: a
+create followed by updates stays a create, and a delete wins. The batch then
+goes to the dispatcher as one message of per-entity changes::
+
+    [{"entity": "tasks", "tenant_id": 1, "created": [7], "updated": [3, 4], "deleted": []}]
+
+The claim commits only after the dispatcher accepted the batch. A failed
+send leaves the rows for the next pass, so delivery is at least once and
+handlers must be idempotent.
+
+The relay runs from Celery beat every ``OUTBOX_INTERVAL`` seconds, or with
+``python -m app.cli relay-outbox``. The Celery task ``process_changes`` hands
+each message to the functions registered with :func:`handler`.
+"""
+import logging
+import threading
+import time
+from typing import Callable
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from .config import Settings, settings
+from .events import OP_KEYS, _merge
+from .models import DEFAULT_TENANT, OutboxEvent, utcnow
+from .tenancy import owners
+
+logger = logging.getLogger(__name__)
+
+TASK = "app.celery_app.process_changes"
+
+HANDLERS: dict[str, list[Callable[[dict], None]]] = {}
+
+
+def record(db: Session, entity: str, op: str, ids) -> None:
+    """Queue background work for rows changed in ``db``'s transaction; the caller commits."""
+    if not settings.outbox or not ids:
+        return
+    tenants = owners(db, entity, ids)  # see history.record
+    now = utcnow()
+    db.execute(insert(OutboxEvent.__table__), [
+        {"tenant_id": tenants.get(row_id, DEFAULT_TENANT), "entity": entity, "entity_id": row_id, "op": op, "created_at": now}
+        for row_id in dict.fromkeys(ids)
+    ])
+
+
+def coalesce(rows) -> list[dict]:
+    """One change message per entity and cooperative, with one op per row id."""
+    pending: dict[tuple[str, int], dict[int, str]] = {}
+    for row in sorted(rows, key=lambda row: row.id):
+        changes = pending.setdefault((row.entity, row.tenant_id), {})
+        changes[row.entity_id] = _merge(changes.get(row.entity_id), row.op)
+    messages = []
+    for (entity, tenant_id), changes in pending.items():
+        message = {"entity": entity, "tenant_id": tenant_id, "created": [], "updated": [], "deleted": []}
+        for row_id, op in changes.items():
+            message[OP_KEYS[op]].append(row_id)
+        messages.append(message)
+    return messages
+
+
+def handler(entity: str):
+    """Register ``func(message)`` to run for each change message about ``entity``."""
+    def register(func):
+        HANDLERS.setdefault(entity, []).append(func)
+        return func
+    return register
+
+
+def handle(messages: list[dict]) -> None:
+    for message in messages:
+        for func in HANDLERS.get(message["entity"], ()):
+            func(message)
+
+
+class CeleryDispatcher:
+    """Sends each batch to the ``process_changes`` task as a single Celery message."""
+
+    def __init__(self, app=None):
+        self._app = app
+
+    def send(self, messages: list[dict]) -> None:
+        if self._app is None:
+            from .celery_app import celery_app
+
+            self._app = celery_app
+        self._app.send_task(TASK, args=[messages])
+
+
+class MemoryDispatcher:
+    """Keeps the batches and runs the handlers inline; a broker and worker in one, for tests."""
+
+    def __init__(self):
+        self.batches: list[list[dict]] = []
+
+    def send(self, messages: list[dict]) -> None:
+        self.batches.append(messages)
+        handle(messages)
+
+
+class RelayMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.events = 0
+        self.messages = 0
+        self.coalesced = 0
+        self.failures = 0
+        self.seconds_total = 0.0
+        self.lag_seconds_max = 0.0
+
+    def observe(self, events: int, messages: int, coalesced: int, seconds: float, lag: float) -> None:
+        with self._lock:
+            self.batches += 1
+            self.events += events
+            self.messages += messages
+            self.coalesced += coalesced
+            self.seconds_total += seconds
+            self.lag_seconds_max = max(self.lag_seconds_max, lag)
+
+    def observe_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+
+    def snapshot(self) -> dict:
+        return {
+            "batches": self.batches,
+            "events": self.events,
+            "messages": self.messages,
+            "coalesced": self.coalesced,
+            "failures": self.failures,
+            "seconds_total": self.seconds_total,
+            "events_per_second": self.events / self.seconds_total if self.seconds_total else 0.0,
+            "lag_seconds_max": self.lag_seconds_max,
+        }
+
+
+class Relay:
+    def __init__(self, dispatcher, batch_size: int = 500):
+        self.dispatcher = dispatcher
+        self.batch_size = batch_size
+        self.metrics = RelayMetrics()
+
+    @classmethod
+    def from_settings(cls, config: Settings) -> "Relay":
+        dispatcher = MemoryDispatcher() if config.outbox_backend == "memory" else CeleryDispatcher()
+        return cls(dispatcher, config.outbox_batch_size)
+
+    def relay_batch(self, db: Session) -> int:
+        """Dispatch up to ``batch_size`` of the oldest events; returns how many were read."""
+        started = time.perf_counter()
+        table = OutboxEvent.__table__
+        oldest = select(table.c.id).order_by(table.c.id).limit(self.batch_size)
+        if db.get_bind().dialect.name == "postgresql":
+            oldest = oldest.with_for_update(skip_locked=True)
+        try:
+            rows = db.execute(delete(table).where(table.c.id.in_(oldest)).returning(*table.c)).all()
+            if not rows:
+                db.rollback()
+                return 0
+            messages = coalesce(rows)
+            self.dispatcher.send(messages)
+            db.commit()
+        except Exception:
+            db.rollback()
+            self.metrics.observe_failure()
+            raise
+        distinct = sum(len(m["created"]) + len(m["updated"]) + len(m["deleted"]) for m in messages)
+        lag = (utcnow() - min(row.created_at for row in rows)).total_seconds()
+        self.metrics.observe(len(rows), len(messages), len(rows) - distinct, time.perf_counter() - started, lag)
+        return len(rows)
+
+    def drain(self, session_factory: Callable[[], Session], max_batches: int | None = None) -> int:
+        """Relay batches until the outbox is empty; returns the number of events relayed."""
+        relayed = batches = 0
+        with session_factory() as db:
+            while max_batches is None or batches < max_batches:
+                count = self.relay_batch(db)
+                relayed += count
+                batches += 1
+                if count < self.batch_size:
+                    break
+        return relayed
+
+
+def backlog(db: Session) -> dict:
+    """Events waiting in the outbox and the age in seconds of the oldest."""
+    pending, oldest = db.execute(select(func.count(), func.min(OutboxEvent.created_at))).one()
+    return {"pending": pending, "oldest_seconds": (utcnow() - oldest).total_seconds() if oldest else 0.0}
+
+
+relay = Relay.from_settings(settings)
@@ -0,0 +1,219 @@
+"""Periodic due-date reminder sweep.
+
+One sweep replaces a Celery job per task. It walks the open tasks of every
+cooperative due within the window along ``ix_tasks_status_due_date_id``
+(status, due date and id, without the tenant), one keyset page at a time,
+and then sends each assignee a single mail listing all their tasks, however
+many pages those were spread over. A task is claimed by setting
+``reminded_at`` as its page is read and released again if sending fails, so
+reruns and overlapping sweeps never mail a task twice.
+
+Mail goes out over a fixed number of SMTP connections, each reused for many
+messages, so the relay sees a bounded number of sessions however large the
+sweep.
+"""
+import asyncio
+import datetime
+import time
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from . import models
+from .config import Settings, settings
+from .db import SessionLocal
+
+OPEN_STATUSES = (models.TaskStatus.todo, models.TaskStatus.in_progress)
+MAX_ERRORS = 10  # per sweep result; the rest are only counted
+
+
+@dataclass
+class SweepResult:
+    tasks: int = 0
+    members: int = 0
+    sent: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+    errors: list[str] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return {
+            "tasks": self.tasks,
+            "members": self.members,
+            "sent": self.sent,
+            "failed": self.failed,
+            "seconds": round(self.seconds, 3),
+            "mails_per_second": round(self.sent / self.seconds, 1) if self.seconds else 0.0,
+            "errors": self.errors,
+        }
+
+
+def due_pages(db: Session, start: datetime.date, end: datetime.date, batch_size: int):
+    """Yield pages of open, unreminded, assigned tasks due in ``[start, end]``."""
+    Task = models.Task
+    stmt = (
+        select(Task.id, Task.title, Task.due_date, Task.assignee_id, models.Member.name, models.Member.email)
+        .join(models.Member, models.Member.id == Task.assignee_id)
+        .where(
+            Task.status.in_(OPEN_STATUSES),
+            Task.due_date.between(start, end),
+            Task.reminded_at.is_(None),
+        )
+        .order_by(Task.due_date, Task.id)
+        .limit(batch_size)
+    )
+    last = None
+    while True:
+        page_stmt = stmt
+        if last is not None:
+            page_stmt = stmt.where(or_(Task.due_date > last[0], and_(Task.due_date == last[0], Task.id > last[1])))
+        rows = db.execute(page_stmt).all()
+        if not rows:
+            return
+        yield rows
+        last = (rows[-1].due_date, rows[-1].id)
+
+
+def _mark(db: Session, ids: list[int], value, only_unclaimed: bool) -> list[int]:
+    Task = models.Task
+    stmt = update(Task).where(Task.id.in_(ids))
+    if only_unclaimed:
+        stmt = stmt.where(Task.reminded_at.is_(None))
+    # Reminder bookkeeping is not a content change: keep updated_at so
+    # incremental exports do not pick these rows up.
+    stmt = stmt.values(reminded_at=value, updated_at=Task.updated_at).returning(Task.id)
+    claimed = list(db.scalars(stmt))
+    db.commit()
+    return claimed
+
+
+def claim(db: Session, ids: list[int], now: datetime.datetime) -> set[int]:
+    """Stamp ``reminded_at`` on the tasks nobody else claimed yet."""
+    return set(_mark(db, ids, now, only_unclaimed=True))
+
+
+def release(db: Session, ids: list[int]) -> None:
+    if ids:
+        _mark(db, ids, None, only_unclaimed=False)
+
+
+def build_message(sender: str, name: str, email: str, tasks: list) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = sender
+    message["To"] = email
+    if len(tasks) == 1:
+        message["Subject"] = f"Reminder: {tasks[0].title} is due {tasks[0].due_date.isoformat()}"
+    else:
+        message["Subject"] = f"Reminder: {len(tasks)} tasks are due soon"
+    lines = [f"Hi {name},", "", "These tasks assigned to you are due soon:", ""]
+    lines += [f"- {task.title} (due {task.due_date.isoformat()})" for task in tasks]
+    message.set_content("\n".join(lines) + "\n")
+    return message
+
+
+class SMTPPool:
+    """At most ``smtp_connections`` SMTP sessions, kept open between batches.
+
+    Use as ``async with SMTPPool(config) as pool``; the sessions are closed
+    on exit.
+    """
+
+    def __init__(self, config: Settings = settings):
+        self.config = config
+        self.size = max(1, config.smtp_connections)
+        self._idle: list = []
+
+    async def __aenter__(self) -> "SMTPPool":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        idle, self._idle = self._idle, []
+        for client in idle:
+            try:
+                await client.quit()
+            except Exception:
+                client.close()
+
+    def _client(self):
+        import aiosmtplib
+
+        config = self.config
+        return aiosmtplib.SMTP(
+            hostname=config.smtp_host,
+            port=config.smtp_port,
+            username=config.smtp_username or None,
+            password=config.smtp_password or None,
+            start_tls=config.smtp_starttls,
+        )
+
+    async def _worker(self, queue: asyncio.Queue, failed: list) -> None:
+        client = self._idle.pop() if self._idle else None
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            key, message = item
+            try:
+                if client is None or not client.is_connected:
+                    client = self._client()
+                    await client.connect()
+                await client.send_message(message)
+            except Exception as exc:  # the relay decides what a bad address is
+                failed.append((key, exc))
+                if client is not None:
+                    client.close()
+                client = None
+        if client is not None and client.is_connected:
+            self._idle.append(client)
+
+    async def send(self, messages: list[tuple[object, EmailMessage]]) -> list[tuple[object, Exception]]:
+        """Send ``(key, message)`` pairs; return the keys that failed with their errors."""
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in messages:
+            queue.put_nowait(item)
+        workers = min(self.size, len(messages))
+        for _ in range(workers):
+            queue.put_nowait(None)
+        failed: list = []
+        await asyncio.gather(*(self._worker(queue, failed) for _ in range(workers)))
+        return failed
+
+
+async def sweep(
+    session_factory: sessionmaker = SessionLocal,
+    config: Settings = settings,
+    today: datetime.date | None = None,
+) -> SweepResult:
+    today = today or models.utcnow().date()
+    end = today + datetime.timedelta(days=config.reminder_window_days)
+    result = SweepResult()
+    started = time.perf_counter()
+    async with SMTPPool(config) as pool:
+        with session_factory() as db:
+            by_member: dict[int, list] = {}
+            for page in due_pages(db, today, end, config.reminder_batch_size):
+                claimed = claim(db, [row.id for row in page], models.utcnow())
+                for row in page:
+                    if row.id in claimed:
+                        by_member.setdefault(row.assignee_id, []).append(row)
+            messages = [
+                (member_id, build_message(config.smtp_from, rows[0].name, rows[0].email, rows))
+                for member_id, rows in by_member.items()
+            ]
+            failed = await pool.send(messages)
+            failed_members = {member_id for member_id, _ in failed}
+            release(db, [row.id for member_id in failed_members for row in by_member[member_id]])
+
+            result.tasks = sum(len(rows) for member_id, rows in by_member.items() if member_id not in failed_members)
+            result.members = len(by_member)
+            result.sent = len(messages) - len(failed)
+            result.failed = len(failed)
+            result.errors = [f"member {member_id}: {exc}" for member_id, exc in failed[:MAX_ERRORS]]
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def run_sweep(**kwargs) -> SweepResult:
+    return asyncio.run(sweep(**kwargs))
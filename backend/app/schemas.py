@@ -1,5 +1,17 @@
-from pydantic import BaseModel
-from typing import Optional
+import datetime
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from typing import Generic, Optional, TypeVar
+
+from .models import TaskPriority, TaskStatus, VoteChoice
+
+class CooperativeCreate(BaseModel):
+    name: str
+
+class Cooperative(CooperativeCreate):
+    id: int
+
+    model_config = ConfigDict(from_attributes=True)
 
 class UnitBase(BaseModel):
     name: str
@@ -10,11 +22,22 @@ class UnitCreate(UnitBase):
 class UnitUpdate(UnitBase):
     pass
 
+class UnitBulkUpdate(BaseModel):
+    id: int
+    name: Optional[str] = None
+
+    @field_validator("name")
+    @classmethod
+    def _not_null(cls, value):
+        if value is None:
+            raise ValueError("can be left out but not set to null")
+        return value
+
 class Unit(UnitBase):
     id: int
+    version: int = 1  # sent back in If-Match; see app.concurrency
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class MemberBase(BaseModel):
     name: str
@@ -27,27 +50,212 @@ class MemberCreate(MemberBase):
 class MemberUpdate(MemberBase):
     pass
 
+class MemberBulkUpdate(BaseModel):
+    id: int
+    name: Optional[str] = None
+    email: Optional[str] = None
+    unit_id: Optional[int] = None
+
+    @field_validator("name", "email")
+    @classmethod
+    def _not_null(cls, value):
+        if value is None:
+            raise ValueError("can be left out but not set to null")
+        return value
+
 class Member(MemberBase):
     id: int
+    version: int = 1
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class LaneBase(BaseModel):
+    name: str
+    sort_index: Optional[float] = None  # appended after the last lane if omitted
+
+class LaneCreate(LaneBase):
+    pass
+
+class LaneUpdate(LaneBase):
+    pass
+
+class Lane(LaneBase):
+    id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class TaskBase(BaseModel):
     title: str
     status: Optional[str] = None
     priority: Optional[str] = None
-    due_date: Optional[str] = None  # ISO format
+    due_date: Optional[datetime.date] = None
     assignee_id: Optional[int] = None
+    lane_id: Optional[int] = None
+    sort_index: Optional[float] = None  # appended to the end of the lane if omitted
 
 
 class TaskCreate(TaskBase):
     pass
 
 
+class TaskBulkUpdate(BaseModel):
+    id: int
+    title: Optional[str] = None
+    status: Optional[TaskStatus] = None
+    priority: Optional[TaskPriority] = None
+    due_date: Optional[datetime.date] = None
+    assignee_id: Optional[int] = None
+
+    @field_validator("title", "status", "priority")
+    @classmethod
+    def _not_null(cls, value):
+        if value is None:
+            raise ValueError("can be left out but not set to null")
+        return value
+
+
+class TaskPatch(BaseModel):
+    """Partial task update: only the fields sent are changed.
+
+    Moves between and within lanes go through ``/tasks/reorder``.
+    """
+    title: Optional[str] = None
+    status: Optional[TaskStatus] = None
+    priority: Optional[TaskPriority] = None
+    due_date: Optional[datetime.date] = None
+    assignee_id: Optional[int] = None
+
+    @field_validator("title", "status", "priority")
+    @classmethod
+    def _not_null(cls, value):
+        if value is None:
+            raise ValueError("can be left out but not set to null")
+        return value
+
+
 class Task(TaskBase):
     id: int
+    version: int = 1
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class TaskReorder(BaseModel):
+    """Move a task between two neighbours, optionally into another lane.
+
+    ``before_id`` is the task that ends up directly above the moved one and
+    ``after_id`` the one directly below it; leave either out at the top or
+    bottom of a lane, and both out to append to ``lane_id``.
+    """
+    task_id: int
+    lane_id: Optional[int] = None  # defaults to the task's current lane
+    before_id: Optional[int] = None
+    after_id: Optional[int] = None
+
+
+
+class ProposalBase(BaseModel):
+    title: str
+    description: Optional[str] = None
+    quorum: int = Field(1, ge=1)  # ballots needed for the result to count
+    closes_at: Optional[datetime.datetime] = None  # open until closed by hand if omitted
+
+
+class ProposalCreate(ProposalBase):
+    pass
+
+
+class Proposal(ProposalBase):
+    id: int
+    closed_at: Optional[datetime.datetime] = None
+    yes_votes: int = 0
+    no_votes: int = 0
+    abstain_votes: int = 0
+    quorum_reached_at: Optional[datetime.datetime] = None
+    created_at: Optional[datetime.datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class VoteCreate(BaseModel):
+    member_id: int
+    choice: VoteChoice
+
+
+class ProposalResults(BaseModel):
+    proposal_id: int
+    yes: int
+    no: int
+    abstain: int
+    ballots: int
+    quorum: int
+    quorum_reached: bool
+    open: bool
+    outcome: Optional[str] = None  # "passed", "rejected" or "no_quorum" once closed
+
+
+
+class SearchHit(BaseModel):
+    id: int
+    label: Optional[str] = None  # task title or member name
+    score: Optional[float] = None  # higher is better; None for unranked broad matches
+
+
+class SearchResults(BaseModel):
+    tasks: list[SearchHit] = []
+    members: list[SearchHit] = []
+
+
+T = TypeVar("T")
+
+
+class BulkError(BaseModel):
+    index: int  # position of the item in the request
+    detail: str
+
+
+class BulkResult(BaseModel, Generic[T]):
+    items: list[T] = []
+    errors: list[BulkError] = []
+
+
+class BulkDelete(BaseModel):
+    ids: list[int]
+
+
+class BulkDeleteResult(BaseModel):
+    deleted: list[int] = []
+    errors: list[BulkError] = []
+
+
+class Change(BaseModel):
+    id: int
+    entity: str
+    entity_id: int
+    op: str  # "create", "update" or "delete"
+    actor: Optional[str] = None
+    changed_at: datetime.datetime
+    fields: Optional[dict] = None  # the values written; None for deletes
+    previous: Optional[dict] = None  # the values replaced; only from /history/{entity}/{id}
+
+
+# Nested shapes returned by ``expand=``; expanded fields are omitted from the
+# response unless requested.
+
+class UnitExpanded(Unit):
+    members: Optional[list[Member]] = None
+
+
+class MemberExpanded(Member):
+    unit: Optional[Unit] = None
+    tasks: Optional[list[Task]] = None
+
+
+class TaskAssignee(Member):
+    unit: Optional[Unit] = None
+
 
-    class Config:
-        orm_mode = True
+class TaskExpanded(Task):
+    assignee: Optional[TaskAssignee] = None
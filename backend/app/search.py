@@ -0,0 +1,175 @@
+"""Full-text and prefix search over task titles and member names.
+
+SQLite keeps an FTS5 table per searchable table (``tasks_fts``,
+``members_fts``) whose rowid is the id of the indexed row. The tables are
+created and dropped together with their base table and are kept in step by
+the CRUD write paths, which call :func:`index` and :func:`unindex` inside
+their own transaction. :func:`rebuild` refills them from scratch.
+
+PostgreSQL indexes ``to_tsvector('simple', ...)`` of the same columns with a
+GIN expression index, which the database maintains itself, so the sync calls
+do nothing there. Prefix queries use ``term:*`` against the same index.
+
+Matches are ranked with bm25 (SQLite) or ts_rank (PostgreSQL) unless they
+are too many to score quickly; see ``RANK_LIMIT``.
+
+Every match is confined to the cooperative of a scoped session (see
+``app.tenancy``). The FTS tables carry the cooperative as a ``tenant`` token
+(``t1``) that each query ANDs in, and the PostgreSQL query filters on
+``tenant_id``.
+
+Queries are split into words and each word is quoted before it reaches the
+FTS syntax, so user input cannot inject operators. All words must match; in
+prefix mode each word matches as a prefix ("ali smi" finds "Alice Smith").
+"""
+import re
+
+from sqlalchemy import DDL, event, text
+from sqlalchemy.orm import Session
+
+SEARCHABLE = {
+    "tasks": ("title",),
+    "members": ("name", "email"),
+}
+# FTS5 column weights for bm25() after the ``tenant`` column, which scores
+# nothing; a hit in the first searchable column counts most.
+WEIGHTS = {"tasks": (1.0,), "members": (10.0, 1.0)}
+MAX_TERMS = 8
+# Ranking scores every match. A query matching more rows than this (a common
+# word, a one-letter prefix) returns the newest matches unranked instead, so
+# its cost stays bounded however many rows match.
+RANK_LIMIT = 2000
+WORD = re.compile(r"\w+")
+
+
+class SearchError(ValueError):
+    pass
+
+
+def _document(columns) -> str:
+    return " || ' ' || ".join(f"coalesce({column}, '')" for column in columns)
+
+
+def install(table) -> None:
+    """Create and drop the search index of ``table`` along with it."""
+    name, columns = table.name, SEARCHABLE[table.name]
+    event.listen(table, "after_create", DDL(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {name}_fts USING fts5("
+        f"tenant, {', '.join(columns)}, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    ).execute_if(dialect="sqlite"))
+    event.listen(table, "after_drop", DDL(f"DROP TABLE IF EXISTS {name}_fts").execute_if(dialect="sqlite"))
+    event.listen(table, "after_create", DDL(
+        f"CREATE INDEX IF NOT EXISTS ix_{name}_search ON {name} "
+        f"USING gin (to_tsvector('simple', {_document(columns)}))"
+    ).execute_if(dialect="postgresql"))
+
+
+def _fts(db: Session) -> bool:
+    return db.get_bind().dialect.name == "sqlite"
+
+
+def _tenant_token(tenant_id: int) -> str:
+    return f"t{tenant_id}"
+
+
+def index(db: Session, table: str, rows) -> None:
+    """(Re)index ``rows`` of ``table``; the caller commits."""
+    if table not in SEARCHABLE or not rows or not _fts(db):
+        return
+    columns = SEARCHABLE[table]
+    unindex(db, table, [row.id for row in rows])
+    db.execute(
+        text(f"INSERT INTO {table}_fts (rowid, tenant, {', '.join(columns)}) "
+             f"VALUES (:id, :tenant, {', '.join(':' + column for column in columns)})"),
+        [
+            {"id": row.id, "tenant": _tenant_token(row.tenant_id), **{column: getattr(row, column) for column in columns}}
+            for row in rows
+        ],
+    )
+
+
+def unindex(db: Session, table: str, ids) -> None:
+    ids = list(ids)
+    if table not in SEARCHABLE or not ids or not _fts(db):
+        return
+    db.execute(text(f"DELETE FROM {table}_fts WHERE rowid = :id"), [{"id": row_id} for row_id in ids])
+
+
+def rebuild(db: Session) -> None:
+    """Refill every FTS table from its base table; the caller commits."""
+    if not _fts(db):
+        return
+    for table, columns in SEARCHABLE.items():
+        db.execute(text(f"DELETE FROM {table}_fts"))
+        db.execute(text(
+            f"INSERT INTO {table}_fts (rowid, tenant, {', '.join(columns)}) "
+            f"SELECT id, 't' || tenant_id, {', '.join(columns)} FROM {table} WHERE deleted_at IS NULL"
+        ))
+
+
+def terms(query: str) -> list[str]:
+    words = WORD.findall(query.lower())
+    if not words:
+        raise SearchError("search query has no words")
+    return words[:MAX_TERMS]
+
+
+def _fts_query(db: Session, table: str, words: list[str], prefix: bool, limit: int) -> list[dict]:
+    star = "*" if prefix else ""
+    match = " ".join(f'"{word}"{star}' for word in words)
+    # The column filter keeps user words from matching the tenant tokens.
+    match = f"{{{' '.join(SEARCHABLE[table])}}} : ({match})"
+    tenant_id = db.info.get("tenant_id")
+    if tenant_id is not None:
+        match = f'tenant : "{_tenant_token(tenant_id)}" AND {match}'
+    params = {"match": match, "limit": limit}
+    source = f"FROM {table}_fts WHERE {table}_fts MATCH :match"
+    label = SEARCHABLE[table][0]
+    if _broad(db, f"SELECT 1 {source}", params):
+        rows = db.execute(text(f"SELECT rowid AS id, {label} AS label {source} ORDER BY rowid DESC LIMIT :limit"), params)
+        return [{"id": row.id, "label": row.label, "score": None} for row in rows]
+    weights = ", ".join(str(weight) for weight in (0.0, *WEIGHTS[table]))
+    rows = db.execute(
+        text(f"SELECT rowid AS id, {label} AS label, bm25({table}_fts, {weights}) AS rank {source} "
+             f"ORDER BY rank, rowid LIMIT :limit"),
+        params,
+    )
+    # bm25() is lower-is-better; report a score where higher is better.
+    return [{"id": row.id, "label": row.label, "score": -row.rank} for row in rows]
+
+
+def _tsvector_query(db: Session, table: str, words: list[str], prefix: bool, limit: int) -> list[dict]:
+    columns = SEARCHABLE[table]
+    vector = f"to_tsvector('simple', {_document(columns)})"
+    star = ":*" if prefix else ""
+    params = {"query": " & ".join(word + star for word in words), "limit": limit}
+    source = f"FROM {table}, to_tsquery('simple', :query) AS query WHERE {vector} @@ query AND deleted_at IS NULL"
+    tenant_id = db.info.get("tenant_id")
+    if tenant_id is not None:
+        source += " AND tenant_id = :tenant"
+        params["tenant"] = tenant_id
+    if _broad(db, f"SELECT 1 {source}", params):
+        rows = db.execute(text(f"SELECT id, {columns[0]} AS label {source} ORDER BY id DESC LIMIT :limit"), params)
+        return [{"id": row.id, "label": row.label, "score": None} for row in rows]
+    rows = db.execute(
+        text(f"SELECT id, {columns[0]} AS label, ts_rank({vector}, query) AS score {source} "
+             f"ORDER BY score DESC, id LIMIT :limit"),
+        params,
+    )
+    return [{"id": row.id, "label": row.label, "score": row.score} for row in rows]
+
+
+def _broad(db: Session, matches: str, params: dict) -> bool:
+    """Whether a query matches more than ``RANK_LIMIT`` rows, counting no further."""
+    found = db.scalar(text(f"SELECT count(*) FROM ({matches} LIMIT :cap) AS probe"), {**params, "cap": RANK_LIMIT + 1})
+    return found > RANK_LIMIT
+
+
+def search(db: Session, query: str, tables=tuple(SEARCHABLE), prefix: bool = False, limit: int = 20) -> dict:
+    """Best matches per table, e.g. ``{"tasks": [{"id", "label", "score"}], ...}``.
+
+    ``score`` is None for the newest-first results of a broad query.
+    """
+    words = terms(query)
+    run = _fts_query if _fts(db) else _tsvector_query
+    return {table: run(db, table, words, prefix, limit) for table in tables}
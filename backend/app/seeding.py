@@ -0,0 +1,269 @@
+"""Synthetic datasets and fast database resets.
+
+:func:`generate` fills empty tables with a :class:`Dataset`: any number of
+cooperatives, each with the same number of units, members, lanes, tasks and
+proposals. The output is deterministic for a given spec and ``seed``. Rows
+are inserted with Core ``executemany`` in chunks of :data:`CHUNK`, and the
+whole dataset is one transaction. :data:`PRESETS` names a few sizes::
+
+    python -m app.cli generate --preset medium --seed 7
+
+:func:`reset` empties the database and loads it again without DDL. On SQLite
+the first reset for a key builds the data and keeps an in-memory copy of the
+whole file, and each later reset copies it back with the ``sqlite3`` backup
+API. That takes about a millisecond for the demo data. Other databases are
+emptied with :func:`truncate` and loaded again. :func:`snapshot` and
+:func:`restore` do the same copy to and from a file, so a staging database
+can be refreshed from another process.
+"""
+import datetime
+import random
+import sqlite3
+from dataclasses import dataclass
+from typing import Callable
+
+from sqlalchemy import insert, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from . import aggregates, models, search
+from .db import Base
+
+CHUNK = 50000
+LANES = ("Backlog", "In Progress", "Done")
+VERBS = ["Fix", "Paint", "Clean", "Replace", "Inspect", "Order", "Repair", "Check"]
+THINGS = ["sink", "hallway", "boiler", "gutters", "roof", "lobby door", "window", "laundry dryer", "bike shed"]
+FIRST = ["Alice", "Bob", "Chloé", "Dev", "Emeka", "Fatima", "Goran", "Hana", "Ines", "Jun", "Kofi", "Lea"]
+LAST = ["Smith", "Tremblay", "Nguyen", "Okafor", "Müller", "Rossi", "Kowalski", "Haddad", "Silva", "Ito"]
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """Size and shape of a synthetic dataset; the counts are per cooperative.
+
+    ``status_weights`` and ``priority_weights`` follow the order of
+    ``TaskStatus`` and ``TaskPriority``. ``assigned`` and ``due`` are the
+    shares of tasks with an assignee and a due date. Due dates fall within
+    ``due_window`` days of ``today``. ``skew`` sets how unevenly tasks are
+    spread over members: 1 is uniform, and higher values give the first
+    members most of the work.
+    """
+
+    units: int = 50
+    members: int = 500
+    tasks: int = 10_000
+    proposals: int = 20
+    cooperatives: int = 1
+    seed: int = 0
+    status_weights: tuple[float, ...] = (5, 2, 3)
+    priority_weights: tuple[float, ...] = (3, 5, 2)
+    assigned: float = 0.8
+    due: float = 0.7
+    skew: float = 2.0
+    due_window: tuple[int, int] = (-60, 120)
+    today: datetime.date = datetime.date(2026, 1, 1)
+
+    def __post_init__(self):
+        if min(self.units, self.members, self.tasks, self.proposals) < 0 or self.cooperatives < 1:
+            raise ValueError("counts must not be negative and there must be a cooperative")
+        if len(self.status_weights) != len(models.TaskStatus):
+            raise ValueError(f"status_weights needs {len(models.TaskStatus)} values")
+        if len(self.priority_weights) != len(models.TaskPriority):
+            raise ValueError(f"priority_weights needs {len(models.TaskPriority)} values")
+
+
+PRESETS = {
+    "tiny": Dataset(units=5, members=20, tasks=200, proposals=5),
+    "small": Dataset(units=50, members=500, tasks=10_000, proposals=20),
+    "medium": Dataset(units=500, members=10_000, tasks=200_000, proposals=100),
+    "large": Dataset(units=5_000, members=100_000, tasks=2_000_000, proposals=500),
+}
+
+
+def skewed(rng: random.Random, n: int, skew: float = 2.0) -> int:
+    """An id in 1..n where, for ``skew`` above 1, low ids are picked far more often."""
+    return 1 + int(n * rng.random() ** skew)
+
+
+def _chunked(db: Session, model, rows) -> None:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == CHUNK:
+            db.execute(insert(model.__table__), batch)
+            batch = []
+    if batch:
+        db.execute(insert(model.__table__), batch)
+
+
+def _tasks(rng: random.Random, spec: Dataset, tenant: int, first_lane: int):
+    statuses, priorities = list(models.TaskStatus), list(models.TaskPriority)
+    members = (tenant - 1) * spec.members
+    ends = [0.0] * len(LANES)
+    for _ in range(spec.tasks):
+        lane = rng.randrange(len(LANES))
+        ends[lane] += 1024.0
+        assigned = spec.members and rng.random() < spec.assigned
+        due = rng.random() < spec.due
+        yield {
+            "tenant_id": tenant,
+            "title": f"{rng.choice(VERBS)} {rng.choice(THINGS)} in unit {rng.randint(1, max(spec.units, 1))}",
+            "status": rng.choices(statuses, spec.status_weights)[0],
+            "priority": rng.choices(priorities, spec.priority_weights)[0],
+            "due_date": spec.today + datetime.timedelta(days=rng.randint(*spec.due_window)) if due else None,
+            "assignee_id": members + skewed(rng, spec.members, spec.skew) if assigned else None,
+            "lane_id": first_lane + lane,
+            "sort_index": ends[lane],
+        }
+
+
+def generate(db: Session, spec: Dataset) -> None:
+    """Fill empty tables with ``spec`` in one transaction and commit.
+
+    Ids are explicit, so references can be computed instead of read back.
+    Timestamps are midnight of ``spec.today``, so every column is the same
+    from run to run.
+    """
+    rng = random.Random(spec.seed)
+    tenants = range(1, spec.cooperatives + 1)
+    now = datetime.datetime.combine(spec.today, datetime.time())
+    db.execute(insert(models.Cooperative.__table__), [
+        {
+            "id": t,
+            "name": "Default cooperative" if t == models.DEFAULT_TENANT else f"Cooperative {t}",
+            "created_at": now,
+        }
+        for t in tenants
+    ])
+    _chunked(db, models.Unit, (
+        {"id": (t - 1) * spec.units + i + 1, "tenant_id": t, "name": f"{100 + i}", "updated_at": now}
+        for t in tenants for i in range(spec.units)
+    ))
+    _chunked(db, models.Member, (
+        {
+            "id": (t - 1) * spec.members + i + 1,
+            "tenant_id": t,
+            "name": f"{rng.choice(FIRST)} {rng.choice(LAST)}",
+            "email": f"member{i}@example.com",
+            "unit_id": (t - 1) * spec.units + rng.randint(1, spec.units) if spec.units else None,
+            "updated_at": now,
+        }
+        for t in tenants for i in range(spec.members)
+    ))
+    db.execute(insert(models.Lane.__table__), [
+        {
+            "id": (t - 1) * len(LANES) + i + 1,
+            "tenant_id": t,
+            "name": name,
+            "sort_index": 1024.0 * (i + 1),
+            "updated_at": now,
+        }
+        for t in tenants for i, name in enumerate(LANES)
+    ])
+    _chunked(db, models.Task, (
+        {"id": (t - 1) * spec.tasks + i + 1, **row, "updated_at": now}
+        for t in tenants
+        for i, row in enumerate(_tasks(rng, spec, t, (t - 1) * len(LANES) + 1))
+    ))
+    _chunked(db, models.Proposal, (
+        {
+            "id": (t - 1) * spec.proposals + i + 1,
+            "tenant_id": t,
+            "title": f"Proposal {i}",
+            "quorum": max(1, spec.members // 10),
+            "created_at": now,
+            "updated_at": now,
+        }
+        for t in tenants for i in range(spec.proposals)
+    ))
+    finish(db)
+
+
+def finish(db: Session) -> None:
+    """Derive the aggregate and search tables from rows inserted in bulk, then commit."""
+    aggregates.recompute(db)
+    search.rebuild(db)
+    sync_sequences(db)
+    db.commit()
+
+
+def sync_sequences(db: Session) -> None:
+    """Move PostgreSQL id sequences past rows that were inserted with explicit ids."""
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    for table in Base.metadata.sorted_tables:
+        if "id" in table.c and table.c.id.primary_key and table.c.id.autoincrement:
+            db.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f"coalesce(max(id), 0) + 1, false) FROM {table.name}"
+            ))
+
+
+def truncate(db: Session) -> None:
+    """Delete every row and restart the ids; the caller commits."""
+    tables = Base.metadata.sorted_tables
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text(f"TRUNCATE {', '.join(t.name for t in tables)} RESTART IDENTITY CASCADE"))
+        return
+    for table in reversed(tables):
+        db.execute(table.delete())
+    for table in search.SEARCHABLE:
+        db.execute(text(f"DELETE FROM {table}_fts"))
+    if db.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_sequence'")).first():
+        db.execute(text("DELETE FROM sqlite_sequence"))
+
+
+def snapshot(engine: Engine, path: str = ":memory:") -> sqlite3.Connection:
+    """Copy the SQLite database behind ``engine`` to ``path`` and return that copy."""
+    copy = sqlite3.connect(path, check_same_thread=False)
+    connection = engine.raw_connection()
+    try:
+        connection.driver_connection.backup(copy)
+    finally:
+        connection.close()
+    return copy
+
+
+def restore(engine: Engine, source: sqlite3.Connection | str) -> None:
+    """Overwrite the SQLite database behind ``engine``, schema included, with ``source``."""
+    copy = sqlite3.connect(source) if isinstance(source, str) else source
+    connection = engine.raw_connection()
+    try:
+        copy.backup(connection.driver_connection)
+    finally:
+        connection.close()
+        if copy is not source:
+            copy.close()
+
+
+# (database URL, key) -> in-memory copy made right after the first fill.
+_templates: dict[tuple[str, str], sqlite3.Connection] = {}
+# URLs whose tables this process has already recreated once.
+_built: set[str] = set()
+
+
+def reset(engine: Engine, key: str, fill: Callable[[Session], None]) -> None:
+    """Empty the database behind ``engine`` and load it with ``fill``, which commits.
+
+    The first reset of a process recreates the tables, so a stale schema
+    does not survive it. On SQLite the result is kept as the template for
+    ``key`` and later resets restore it. Elsewhere they truncate and run
+    ``fill`` again.
+    """
+    url = engine.url.render_as_string()
+    template = _templates.get((url, key))
+    if template is not None:
+        restore(engine, template)
+        return
+    if url in _built:
+        with Session(bind=engine) as db:
+            truncate(db)
+            db.commit()
+    else:
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        _built.add(url)
+    with Session(bind=engine) as db:
+        fill(db)
+    if engine.dialect.name == "sqlite" and engine.url.database not in (None, "", ":memory:"):
+        _templates[(url, key)] = snapshot(engine)
@@ -0,0 +1,175 @@
+"""Delta sync for clients that keep a local copy of the board.
+
+``GET /sync`` without a token returns every live unit, member, lane and task
+and a token. Passing that token back returns only the rows created, updated
+or deleted since, and a new token::
+
+    {"token": "812",
+     "tasks": {"columns": ["title", ..., "id", "version"],
+               "rows": [["Fix sink", ..., 2, 4]],
+               "deleted": [7]},
+     ...}
+
+The token is a position in ``changes``, whose ids every CRUD write takes
+from one sequence (``app.history``). A delta reads the distinct rows
+changed after the token, then the current state of those rows. A row that
+is no longer live, such as a soft-deleted task or a removed lane, comes back
+as a tombstone in ``deleted``. A row changed several times is sent once, so
+a delta is never larger than the full data. Rows are sent as lists under
+one ``columns`` header instead of repeating every key.
+
+Responses are compressed with brotli or gzip, whichever the client accepts
+(brotli needs the optional ``brotli`` package).
+
+On PostgreSQL a transaction can take a lower id than one that commits before
+it, so each delta also reads the last ``OVERLAP`` of changes again. Rows
+sent twice are simply upserted twice. A token that does not fit the table,
+either older than the retained history or from before a reset, fails with
+410 Gone. The client then starts over without a token.
+"""
+import datetime
+import gzip
+
+from fastapi import Response
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+
+from . import models, schemas
+from .config import settings
+from .models import Change, utcnow
+
+try:
+    import brotli
+except ImportError:  # optional; clients are sent gzip instead
+    brotli = None
+
+MODELS = {"units": models.Unit, "members": models.Member, "lanes": models.Lane, "tasks": models.Task}
+FIELDS = {
+    "units": tuple(schemas.Unit.model_fields),
+    "members": tuple(schemas.Member.model_fields),
+    "lanes": tuple(schemas.Lane.model_fields),
+    "tasks": tuple(schemas.Task.model_fields),
+}
+OVERLAP = datetime.timedelta(seconds=10)
+CHUNK = 500
+# Bodies smaller than this are sent as they are; compressing them saves
+# less than the headers cost.
+MIN_SIZE = 500
+
+
+class SyncError(ValueError):
+    status_code = 400
+
+
+class TokenExpired(SyncError):
+    status_code = 410
+
+
+def parse_token(token: str | None) -> int | None:
+    if token is None:
+        return None
+    if not token.isdigit():
+        raise SyncError("malformed sync token")
+    return int(token)
+
+
+def parse_entities(value: str | None) -> tuple[str, ...]:
+    """``"tasks,lanes"`` as a tuple of entity names; all of them for None."""
+    if value is None:
+        return tuple(MODELS)
+    names = tuple(dict.fromkeys(name.strip() for name in value.split(",") if name.strip()))
+    unknown = [name for name in names if name not in MODELS]
+    if unknown or not names:
+        raise SyncError(f"unsupported entities {unknown}, expected some of {sorted(MODELS)}")
+    return names
+
+
+def _bounds(db: Session) -> tuple[int | None, int | None]:
+    """The lowest and highest change ids of all cooperatives.
+
+    Read from the table, not through the ORM, so that another cooperative's
+    entries still count.
+    """
+    table = Change.__table__
+    return db.execute(select(func.min(table.c.id), func.max(table.c.id))).one()
+
+
+def _changed(db: Session, since: int, entities) -> dict[str, set[int]]:
+    stmt = select(Change.entity, Change.entity_id).where(Change.entity.in_(entities)).distinct()
+    if db.get_bind().dialect.name == "postgresql":
+        stmt = stmt.where(or_(Change.id > since, Change.changed_at >= utcnow() - OVERLAP))
+    else:
+        stmt = stmt.where(Change.id > since)
+    changed: dict[str, set[int]] = {entity: set() for entity in entities}
+    for entity, row_id in db.execute(stmt):
+        changed[entity].add(row_id)
+    return changed
+
+
+def _rows(db: Session, entity: str, ids) -> list:
+    model = MODELS[entity]
+    stmt = select(*(getattr(model, name) for name in FIELDS[entity]))
+    if ids is None:
+        return db.execute(stmt.order_by(model.id)).all()
+    ids = sorted(ids)
+    rows = []
+    for start in range(0, len(ids), CHUNK):
+        rows.extend(db.execute(stmt.where(model.id.in_(ids[start:start + CHUNK])).order_by(model.id)))
+    return rows
+
+
+def delta(db: Session, token: int | None, entities=tuple(MODELS)) -> dict:
+    """Everything in ``entities`` with ``token`` None, else what changed after it."""
+    if not settings.history:
+        raise SyncError("sync needs the change history; it is switched off (HISTORY=0)")
+    lowest, highest = _bounds(db)
+    if token is not None and (token > (highest or 0) or (lowest is not None and token < lowest - 1)):
+        raise TokenExpired("sync token is no longer valid; sync again without one")
+    # Taken before the rows are read: a write that lands in between is sent
+    # now and again next time, never missed.
+    body: dict = {"token": str(highest or 0)}
+    changed = _changed(db, token, entities) if token is not None else dict.fromkeys(entities)
+    for entity in entities:
+        index = FIELDS[entity].index("id")
+        rows = _rows(db, entity, changed[entity])
+        live = {row[index] for row in rows}
+        body[entity] = {
+            "columns": FIELDS[entity],
+            "rows": [list(row) for row in rows],
+            "deleted": sorted(changed[entity] - live) if changed[entity] is not None else [],
+        }
+    return body
+
+
+def accepted_encoding(header: str | None) -> str | None:
+    """``br``, ``gzip`` or None, by the client's ``Accept-Encoding`` and what is installed."""
+    offered = {}
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        offered[name.strip().lower()] = quality
+    for encoding in ("br", "gzip"):
+        if encoding == "br" and brotli is None:
+            continue
+        if offered.get(encoding, offered.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compressed(body: bytes, accept_encoding: str | None, media_type: str = "application/json") -> Response:
+    """``body`` in the best encoding the client accepts."""
+    headers = {"Vary": "Accept-Encoding"}
+    encoding = accepted_encoding(accept_encoding) if len(body) >= MIN_SIZE else None
+    if encoding == "br":
+        # Quality 5 matches gzip's ratio; higher qualities cost far more CPU.
+        body = brotli.compress(body, quality=5)
+    elif encoding == "gzip":
+        body = gzip.compress(body, compresslevel=6)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type=media_type, headers=headers)
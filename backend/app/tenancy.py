@@ -0,0 +1,168 @@
+"""Per-cooperative data partitioning.
+
+Units, members, lanes, tasks and proposals belong to one cooperative, their
+``tenant_id``. A request names its cooperative with the ``X-Cooperative-Id``
+header. Without the header it uses the default cooperative (id 1), so
+deployments that host a single cooperative need no changes.
+
+Scoping is automatic. :func:`use` puts the cooperative in ``Session.info``,
+and a ``do_orm_execute`` hook adds ``tenant_id = :tenant`` to every ORM
+SELECT, UPDATE and DELETE on a tenant-scoped model, including
+``Session.get``. A ``before_flush`` hook stamps new objects with the
+cooperative. Statements built on ``Model.__table__`` are plain Core and are
+*not* scoped, so the CRUD layer selects whole rows with :func:`columns`
+instead. Sessions without a cooperative (Celery jobs, the CLI, migrations)
+see all of them.
+
+Every index that the scoped queries use leads with ``tenant_id``. A
+cooperative's queries therefore seek straight to its own rows, and their cost
+does not grow with the number of cooperatives. On PostgreSQL, ``tasks`` can
+also be hash-partitioned by cooperative with
+``python -m app.cli partition-tasks``.
+"""
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, with_loader_criteria
+from sqlalchemy.schema import AddConstraint, CreateIndex
+
+from .models import DEFAULT_TENANT, Cooperative, Task, TenantScoped
+
+HEADER = "X-Cooperative-Id"
+
+# Cooperatives are never deleted, so one that exists once can be trusted for
+# the life of the process.
+_known: set[int] = set()
+
+
+class TenantError(ValueError):
+    status_code = 400
+
+
+class UnknownTenant(TenantError):
+    status_code = 404
+
+
+def use(db: Session, header: str | None) -> int:
+    """Scope ``db`` to the cooperative named by ``header`` and return its id."""
+    if header is None:
+        tenant_id = DEFAULT_TENANT
+    else:
+        try:
+            tenant_id = int(header)
+        except ValueError:
+            raise TenantError(f"{HEADER} must be an integer") from None
+    if tenant_id not in _known:
+        if db.scalar(select(Cooperative.id).where(Cooperative.id == tenant_id)) is None:
+            raise UnknownTenant(f"cooperative {tenant_id} does not exist")
+        _known.add(tenant_id)
+    db.info["tenant_id"] = tenant_id
+    return tenant_id
+
+
+def forget() -> None:
+    """Drop the cache of known cooperatives, e.g. after the tables are recreated."""
+    _known.clear()
+
+
+def current(db: Session) -> int | None:
+    return db.info.get("tenant_id")
+
+
+def owners(db: Session, table_name: str, ids) -> dict[int, int]:
+    """The cooperative of each of ``ids`` in ``table_name``.
+
+    Scoped sessions own every row they wrote. Others, such as Celery jobs and
+    the CLI, look the rows up; ids with no row left are missing from the result.
+    """
+    tenant_id = current(db)
+    if tenant_id is not None:
+        return dict.fromkeys(ids, tenant_id)
+    table = Cooperative.metadata.tables[table_name]
+    ids = list(dict.fromkeys(ids))
+    found: dict[int, int] = {}
+    for start in range(0, len(ids), 500):
+        found.update(db.execute(
+            select(table.c.id, table.c.tenant_id).where(table.c.id.in_(ids[start:start + 500]))
+        ).all())
+    return found
+
+
+def columns(model) -> list:
+    """Every column of ``model`` as ORM attributes, so selecting them is scoped."""
+    return [getattr(model, column.key) for column in model.__mapper__.columns]
+
+
+def stamp(db: Session, items: list[dict]) -> list[dict]:
+    """Set the session's cooperative on rows about to be inserted with Core."""
+    tenant_id = current(db)
+    if tenant_id is None:
+        return items
+    return [{**item, "tenant_id": tenant_id} for item in items]
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _scope(state) -> None:
+    tenant_id = state.session.info.get("tenant_id")
+    if tenant_id is None or state.is_column_load or state.is_relationship_load:
+        # Lazy loads follow a parent that was itself loaded in scope.
+        return
+    if state.is_select or state.is_update or state.is_delete:
+        state.statement = state.statement.options(with_loader_criteria(
+            TenantScoped, lambda cls: cls.tenant_id == tenant_id, include_aliases=True,
+        ))
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp(session, flush_context, instances) -> None:
+    tenant_id = session.info.get("tenant_id")
+    if tenant_id is None:
+        return
+    for obj in session.new:
+        if isinstance(obj, TenantScoped) and obj.tenant_id is None:
+            obj.tenant_id = tenant_id
+
+
+def partition_statements(partitions: int) -> list[str]:
+    """PostgreSQL DDL that turns ``tasks`` into ``partitions`` HASH(tenant_id) partitions.
+
+    A partitioned table's primary key must contain the partition key, so it
+    becomes ``(tenant_id, id)``. Ids still come from the same sequence and
+    stay unique. Indexes and foreign keys are recreated from the model
+    metadata, and the rows are copied inside the same transaction.
+    """
+    from sqlalchemy.dialects import postgresql
+
+    from .search import SEARCHABLE, _document
+
+    if partitions < 2:
+        raise ValueError("partitions must be at least 2")
+    dialect = postgresql.dialect()
+    table = Task.__table__
+    statements = [
+        "ALTER TABLE tasks RENAME TO tasks_unpartitioned",
+        "CREATE TABLE tasks (LIKE tasks_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        "PARTITION BY HASH (tenant_id)",
+    ]
+    statements += [
+        f"CREATE TABLE tasks_p{remainder} PARTITION OF tasks "
+        f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})"
+        for remainder in range(partitions)
+    ]
+    statements += [
+        "INSERT INTO tasks SELECT * FROM tasks_unpartitioned",
+        # Otherwise dropping the old table would drop the id sequence with it.
+        "ALTER SEQUENCE tasks_id_seq OWNED BY tasks.id",
+        "DROP TABLE tasks_unpartitioned",
+        "ALTER TABLE tasks ADD PRIMARY KEY (tenant_id, id)",
+    ]
+    statements += [
+        str(CreateIndex(index).compile(dialect=dialect))
+        for index in sorted(table.indexes, key=lambda index: index.name)
+    ]
+    statements += [
+        str(AddConstraint(constraint).compile(dialect=dialect))
+        for constraint in sorted(table.foreign_key_constraints, key=lambda fk: fk.column_keys)
+    ]
+    statements.append(
+        f"CREATE INDEX ix_tasks_search ON tasks USING gin (to_tsvector('simple', {_document(SEARCHABLE['tasks'])}))"
+    )
+    return statements
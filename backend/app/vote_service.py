@@ -0,0 +1,186 @@
+"""Ballot ingestion and live tallies for proposals.
+
+Casting a ballot is two writes in one transaction, with nothing read first:
+
+1. ``INSERT INTO votes ... ON CONFLICT DO NOTHING RETURNING id``. The unique
+   ``(proposal_id, member_id)`` constraint decides whether this is the
+   member's first ballot, so two simultaneous submissions cannot both pass a
+   check and both get in.
+2. ``UPDATE proposals SET <choice>_votes = <choice>_votes + 1 ... RETURNING``
+   on an open proposal only. The same statement stamps ``quorum_reached_at``
+   when this ballot brings the total to the quorum.
+
+If either write matches nothing, the transaction is rolled back, so the
+counters always agree with the rows in ``votes``. Reading the results is a
+primary-key lookup whatever the turnout. :func:`recount` rebuilds the counters
+from ``votes`` in case they ever need repair.
+"""
+import datetime
+
+from sqlalchemy import DateTime, Integer, and_, case, func, literal, or_, select, update
+from sqlalchemy.orm import Session
+
+from . import history, outbox
+from .db import dialect_insert
+from .events import notify
+from .models import Member, Proposal, Vote, VoteChoice, utcnow
+
+COUNTERS = {
+    VoteChoice.yes: Proposal.yes_votes,
+    VoteChoice.no: Proposal.no_votes,
+    VoteChoice.abstain: Proposal.abstain_votes,
+}
+
+
+class VoteError(ValueError):
+    status_code = 400
+
+
+class ProposalNotFound(VoteError):
+    status_code = 404
+
+
+class VotingClosed(VoteError):
+    status_code = 409
+
+
+class DuplicateVote(VoteError):
+    status_code = 409
+
+
+def _open(now: datetime.datetime):
+    return and_(Proposal.closed_at.is_(None), or_(Proposal.closes_at.is_(None), Proposal.closes_at > now))
+
+
+def is_open(proposal: Proposal, now: datetime.datetime | None = None) -> bool:
+    now = now or utcnow()
+    return proposal.closed_at is None and (proposal.closes_at is None or proposal.closes_at > now)
+
+
+def results(proposal: Proposal, now: datetime.datetime | None = None) -> dict:
+    ballots = proposal.yes_votes + proposal.no_votes + proposal.abstain_votes
+    quorum_reached = proposal.quorum_reached_at is not None
+    open_ = is_open(proposal, now)
+    if open_:
+        outcome = None
+    elif not quorum_reached:
+        outcome = "no_quorum"
+    else:
+        outcome = "passed" if proposal.yes_votes > proposal.no_votes else "rejected"
+    return {
+        "proposal_id": proposal.id,
+        "yes": proposal.yes_votes,
+        "no": proposal.no_votes,
+        "abstain": proposal.abstain_votes,
+        "ballots": ballots,
+        "quorum": proposal.quorum,
+        "quorum_reached": quorum_reached,
+        "open": open_,
+        "outcome": outcome,
+    }
+
+
+def get_results(db: Session, proposal_id: int) -> dict:
+    proposal = db.get(Proposal, proposal_id)
+    if proposal is None:
+        raise ProposalNotFound(f"proposal {proposal_id} does not exist")
+    return results(proposal)
+
+
+def _rejected(db: Session, proposal_id: int, member_id: int) -> VoteError:
+    """Work out why a ballot matched nothing; the caller has rolled back."""
+    if db.get(Proposal, proposal_id) is None:
+        return ProposalNotFound(f"proposal {proposal_id} does not exist")
+    if db.get(Member, member_id) is None:
+        return VoteError(f"member {member_id} does not exist")
+    return DuplicateVote(f"member {member_id} has already voted on proposal {proposal_id}")
+
+
+def cast_vote(
+    db: Session, proposal_id: int, member_id: int, choice: VoteChoice, now: datetime.datetime | None = None,
+) -> dict:
+    """Record one ballot and return the updated results."""
+    now = now or utcnow()
+    choice = VoteChoice(choice)
+    # The INSERT is Core and not scoped by ``app.tenancy``, so the member
+    # is checked against the proposal's cooperative, and for not being
+    # deleted, here.
+    tenant = select(Proposal.tenant_id).where(Proposal.id == proposal_id).scalar_subquery()
+    ballot = select(
+        literal(proposal_id, Integer), Member.id, literal(choice, Vote.choice.type), literal(now, DateTime),
+    ).where(Member.id == member_id, Member.tenant_id == tenant, Member.deleted_at.is_(None))
+    insert = dialect_insert(db, Vote.__table__).from_select(["proposal_id", "member_id", "choice", "cast_at"], ballot)
+    insert = insert.on_conflict_do_nothing(index_elements=["proposal_id", "member_id"]).returning(Vote.id)
+    if db.execute(insert).first() is None:
+        db.rollback()
+        raise _rejected(db, proposal_id, member_id)
+
+    counter = COUNTERS[choice]
+    total = Proposal.yes_votes + Proposal.no_votes + Proposal.abstain_votes
+    # SET expressions see the row before this update, hence ``total + 1``.
+    reached = case(
+        (and_(Proposal.quorum_reached_at.is_(None), total + 1 >= Proposal.quorum), now),
+        else_=Proposal.quorum_reached_at,
+    )
+    bump = (
+        update(Proposal)
+        .where(Proposal.id == proposal_id, _open(now))
+        .values({counter: counter + 1, Proposal.quorum_reached_at: reached, Proposal.updated_at: now})
+        .returning(Proposal)
+        .execution_options(synchronize_session=False)
+    )
+    proposal = db.scalars(bump).first()
+    if proposal is None:
+        db.rollback()
+        if db.get(Proposal, proposal_id) is None:
+            raise ProposalNotFound(f"proposal {proposal_id} does not exist")
+        raise VotingClosed(f"voting on proposal {proposal_id} is closed")
+    tally = results(proposal, now)  # from the RETURNING row, before commit expires it
+    outbox.record(db, "proposals", "update", [proposal_id])
+    db.commit()
+    notify(db, "proposals", "update", [proposal_id])
+    return tally
+
+
+def close_proposal(db: Session, proposal_id: int, now: datetime.datetime | None = None) -> dict:
+    """Stop accepting ballots; closing twice keeps the first ``closed_at``."""
+    now = now or utcnow()
+    proposal = db.get(Proposal, proposal_id)
+    if proposal is None:
+        raise ProposalNotFound(f"proposal {proposal_id} does not exist")
+    if proposal.closed_at is None:
+        db.execute(
+            update(Proposal)
+            .where(Proposal.id == proposal_id, Proposal.closed_at.is_(None))
+            .values(closed_at=now, updated_at=now)
+        )
+        outbox.record(db, "proposals", "update", [proposal_id])
+        history.record(db, "proposals", "update", {proposal_id: {"closed_at": now}})
+        db.commit()
+        db.refresh(proposal)
+        notify(db, "proposals", "update", [proposal_id])
+    return results(proposal, now)
+
+
+def recount(db: Session, proposal_id: int) -> dict:
+    """Rebuild the counters and quorum stamp of one proposal from its ballots."""
+    proposal = db.get(Proposal, proposal_id)
+    if proposal is None:
+        raise ProposalNotFound(f"proposal {proposal_id} does not exist")
+    counts = dict(db.execute(
+        select(Vote.choice, func.count()).where(Vote.proposal_id == proposal_id).group_by(Vote.choice)
+    ).all())
+    # The quorum was reached when the quorum-th ballot came in.
+    reached_at = db.scalar(
+        select(Vote.cast_at)
+        .where(Vote.proposal_id == proposal_id)
+        .order_by(Vote.cast_at, Vote.id)
+        .offset(proposal.quorum - 1)
+        .limit(1)
+    )
+    for choice, column in COUNTERS.items():
+        setattr(proposal, column.key, counts.get(choice, 0))
+    proposal.quorum_reached_at = reached_at
+    db.commit()
+    db.refresh(proposal)
+    return results(proposal)
@@ -0,0 +1,105 @@
+"""Compare throughput and latency of the sync and async request paths.
+
+Starts one uvicorn worker per mode against a scratch SQLite database and
+drives ``GET /tasks/`` with a fixed number of concurrent clients::
+
+    python benchmarks/bench_async.py --concurrency 200 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def wait_ready(base_url: str) -> None:
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        for _ in range(100):
+            try:
+                await client.get("/units/")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"server at {base_url} did not start")
+
+
+async def drive(base_url: str, concurrency: int, duration: float, path: str) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                r = await client.get(path)
+                latencies.append(time.perf_counter() - start)
+                errors += r.status_code != 200
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def run_mode(db_async: bool, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{tmp}/bench.db",
+            DB_ASYNC="1" if db_async else "0",
+        )
+        subprocess.run([sys.executable, "-m", "app.cli", "init-db", "--seed"], cwd=BACKEND_DIR, env=env, check=True)
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.api:app", "--port", str(args.port), "--log-level", "warning"],
+            cwd=BACKEND_DIR,
+            env=env,
+        )
+        try:
+            base_url = f"http://127.0.0.1:{args.port}"
+            asyncio.run(wait_ready(base_url))
+            return asyncio.run(drive(base_url, args.concurrency, args.duration, args.path))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--path", default="/tasks/?limit=20")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    for label, db_async in (("sync", False), ("async", True)):
+        stats = run_mode(db_async, args)
+        print(
+            f"{label:>5}: {stats['rps']:8.1f} req/s  p50 {stats['p50_ms']:7.1f} ms  "
+            f"p99 {stats['p99_ms']:7.1f} ms  ({stats['requests']} requests, {stats['errors']} errors)"
+        )
+
+
+if __name__ == "__main__":
+    main()
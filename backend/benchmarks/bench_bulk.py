@@ -0,0 +1,67 @@
+"""Compare the per-row ``crud.create_*`` path with the bulk path.
+
+Inserts ``--count`` members and as many tasks into a scratch SQLite
+database both ways::
+
+    python benchmarks/bench_bulk.py --count 30000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app import crud, schemas  # noqa: E402
+from app.db import Base, create_db_engine  # noqa: E402
+
+
+def members(count: int, prefix: str) -> list[schemas.MemberCreate]:
+    return [schemas.MemberCreate(name=f"Member {i}", email=f"{prefix}{i}@example.com") for i in range(count)]
+
+
+def tasks(count: int) -> list[schemas.TaskCreate]:
+    return [schemas.TaskCreate(title=f"Task {i}") for i in range(count)]
+
+
+def per_row(Session, count: int) -> float:
+    start = time.perf_counter()
+    with Session() as db:
+        for member in members(count, "row"):
+            crud.create_member(db, member)
+        for task in tasks(count):
+            crud.create_task(db, task)
+    return time.perf_counter() - start
+
+
+def bulk(Session, count: int) -> float:
+    start = time.perf_counter()
+    with Session() as db:
+        errors: list = []
+        crud.bulk_create_members(db, list(enumerate(members(count, "bulk"))), errors)
+        crud.bulk_create_tasks(db, list(enumerate(tasks(count))), errors)
+        assert not errors, errors[:3]
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{tmp}/bench.db")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+
+        rows = 2 * args.count
+        for label, run in (("per-row", per_row), ("bulk", bulk)):
+            elapsed = run(Session, args.count)
+            print(f"{label:>8}: {rows} rows in {elapsed:7.2f} s  ({rows / elapsed:9.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Measure broadcast latency of the event hub at 1k and 10k subscribers.
+
+Subscribers are in-process queues drained by one task each, which is what a
+WebSocket handler does minus the socket write; opening 10k real sockets from
+one machine mostly measures the client side. Latency is from ``publish`` to
+the moment the last subscriber has the message::
+
+    python benchmarks/bench_events.py --subscribers 1000 10000 --rounds 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.events import EventHub, MemoryBroker  # noqa: E402
+
+
+async def run(subscribers: int, rounds: int) -> list[float]:
+    hub = EventHub(MemoryBroker(), flush_interval=0, queue_size=100)
+    await hub.ensure_started()
+    remaining = 0
+    done = asyncio.Event()
+
+    async def consume(subscriber):
+        nonlocal remaining
+        while True:
+            await subscriber.queue.get()
+            remaining -= 1
+            if remaining == 0:
+                done.set()
+
+    consumers = [
+        asyncio.create_task(consume(hub.subscribe({"tasks.updated"}, 1))) for _ in range(subscribers)
+    ]
+    await asyncio.sleep(0)
+
+    latencies = []
+    for task_id in range(rounds):
+        remaining = subscribers
+        done.clear()
+        start = time.perf_counter()
+        hub.publish(1, "tasks", "update", [task_id])
+        await done.wait()
+        latencies.append(time.perf_counter() - start)
+
+    for consumer in consumers:
+        consumer.cancel()
+    await hub.stop()
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    for count in args.subscribers:
+        latencies = sorted(asyncio.run(run(count, args.rounds)))
+        p50 = statistics.median(latencies) * 1000
+        p95 = latencies[int(0.95 * (len(latencies) - 1))] * 1000
+        print(f"{count:>6} subscribers: p50 {p50:7.2f} ms  p95 {p95:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Check that the change history stays within its budget on the write path.
+
+Times task creates, updates and deletes against a ``small`` synthetic
+dataset, in alternating rounds with the history off and on. Then prints the
+median added per write, and the size of an average ``changes`` row::
+
+    python benchmarks/bench_history.py --budget-ms 0.5
+
+Exits with status 1 if any operation's median overhead exceeds
+``--budget-ms``, so it can gate a change to the write path.
+"""
+import argparse
+import dataclasses
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app import crud, history, models, schemas, seeding  # noqa: E402
+from app.db import Base, create_db_engine  # noqa: E402
+
+
+def timed(samples: list, action) -> None:
+    started = time.perf_counter()
+    action()
+    samples.append((time.perf_counter() - started) * 1000)
+
+
+def run(Session, writes: int, first_id: int, samples: dict) -> None:
+    """Create, update and delete ``writes`` tasks, adding the timings to ``samples``."""
+    with Session() as db:
+        created = []
+        for i in range(writes):
+            timed(samples["create"], lambda: created.append(
+                crud.create_task(db, schemas.TaskCreate(title=f"Task {i}", lane_id=1)).id
+            ))
+            timed(samples["update"], lambda: crud.update_task(
+                db, first_id + i, schemas.TaskPatch(title=f"Renamed {i}", status="done"),
+            ))
+        for task_id in created:
+            timed(samples["delete"], lambda: crud.delete_task(db, task_id))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writes", type=int, default=100, help="tasks written per round")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=0.5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{tmp}/history.db")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        with Session() as db:
+            seeding.generate(db, seeding.PRESETS["small"])
+
+        # Short alternating rounds, so both sides see the same table sizes.
+        enabled = history.settings
+        samples = {mode: {"create": [], "update": [], "delete": []} for mode in (False, True)}
+        for round_number in range(args.rounds):
+            for mode in (False, True):
+                history.settings = dataclasses.replace(enabled, history=mode)
+                first_id = 1 + (2 * round_number + mode) * args.writes
+                run(Session, args.writes, first_id, samples[mode])
+        history.settings = enabled
+        off, on = ({op: statistics.median(times) for op, times in samples[mode].items()} for mode in (False, True))
+
+        over = False
+        for op in ("create", "update", "delete"):
+            overhead = on[op] - off[op]
+            over |= overhead > args.budget_ms
+            print(f"task {op:<6}: {off[op]:.3f} ms without history, {on[op]:.3f} ms with "
+                  f"(+{overhead:.3f} ms, budget {args.budget_ms} ms)")
+        with Session() as db:
+            rows, size = db.execute(select(func.count(), func.avg(func.length(models.Change.fields)))).one()
+        print(f"changes: {rows:,} rows, {size or 0:.0f} bytes of JSON on average")
+        if over:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Per-request CPU time of cheap routes with and without instrumentation.
+
+Runs the app in-process against a scratch SQLite database seeded with the
+demo data, building one app with ``INSTRUMENTATION`` off and one with it on,
+and clears the response cache before every request so each one reaches the
+database::
+
+    python benchmarks/bench_instrumentation.py --runs 500
+"""
+import argparse
+import dataclasses
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TMP = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{TMP.name}/bench.db"
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.api import create_app, reset_demo_db  # noqa: E402
+from app.cache import response_cache  # noqa: E402
+from app.config import settings  # noqa: E402
+
+URLS = ("/units/", "/tasks/1", "/metrics/dashboard")
+
+
+def measure(client: TestClient, url: str, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        response_cache.invalidate("units", "tasks")
+        started = time.process_time()
+        client.get(url).raise_for_status()
+        samples.append((time.process_time() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=300)
+    args = parser.parse_args()
+
+    reset_demo_db()
+    clients = {
+        label: TestClient(create_app(dataclasses.replace(settings, instrumentation=enabled)))
+        for label, enabled in (("off", False), ("on", True))
+    }
+    for url in URLS:
+        for client in clients.values():
+            measure(client, url, 20)  # warm up
+        off, on = (measure(clients[label], url, args.runs) for label in ("off", "on"))
+        print(f"{url:>20}: off {off:6.3f} ms  on {on:6.3f} ms  ({(on - off) / off:+.1%})")
+    TMP.cleanup()
+
+
+if __name__ == "__main__":
+    main()
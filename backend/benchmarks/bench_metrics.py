@@ -0,0 +1,104 @@
+"""Compare dashboard queries on the aggregate tables with a GROUP BY over ``tasks``.
+
+Fills a scratch SQLite database with ``--tasks`` tasks spread over
+``--members`` members, rebuilds the aggregates once and then times both ways
+of answering the dashboard and the member scorecards::
+
+    python benchmarks/bench_metrics.py --tasks 1000000 --runs 20
+"""
+import argparse
+import datetime
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import case, func, insert, select  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app import aggregates, models  # noqa: E402
+from app.db import Base, create_db_engine  # noqa: E402
+
+CHUNK = 50000
+
+
+def fill(Session, tasks: int, members: int, today: datetime.date) -> None:
+    rng = random.Random(0)
+    statuses, priorities = list(models.TaskStatus), list(models.TaskPriority)
+    with Session() as db:
+        db.execute(insert(models.Member), [
+            {"name": f"Member {i}", "email": f"member{i}@example.com"} for i in range(members)
+        ])
+        for start in range(0, tasks, CHUNK):
+            db.execute(insert(models.Task), [
+                {
+                    "title": f"Task {i}",
+                    "status": rng.choice(statuses),
+                    "priority": rng.choice(priorities),
+                    "assignee_id": rng.randint(0, members) or None,
+                    "due_date": today + datetime.timedelta(days=rng.randint(-60, 60)),
+                }
+                for i in range(start, min(start + CHUNK, tasks))
+            ])
+        aggregates.recompute(db)
+        db.commit()
+
+
+def naive(db, today: datetime.date) -> None:
+    """What the endpoints would run without the aggregate tables."""
+    Task = models.Task
+    open_ = Task.status.in_(aggregates.OPEN_STATUSES)
+    overdue = func.sum(case((open_ & (Task.due_date < today), 1), else_=0))
+    db.execute(select(Task.status, Task.priority, func.count()).group_by(Task.status, Task.priority)).all()
+    db.execute(select(overdue)).all()
+    db.execute(
+        select(Task.assignee_id, Task.status, Task.priority, func.count(), overdue)
+        .group_by(Task.assignee_id, Task.status, Task.priority)
+    ).all()
+
+
+def precomputed(db, today: datetime.date) -> None:
+    aggregates.dashboard(db, today)
+    aggregates.member_cards(db, today)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=1000000)
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+    today = models.utcnow().date()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{tmp}/bench.db")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        start = time.perf_counter()
+        fill(Session, args.tasks, args.members, today)
+        print(f"{'fill':>11}: {args.tasks} tasks in {time.perf_counter() - start:7.2f} s")
+
+        start = time.perf_counter()
+        with Session() as db:
+            aggregates.recompute(db)
+            db.commit()
+        print(f"{'recompute':>11}: {time.perf_counter() - start:7.2f} s")
+
+        with Session() as db:
+            for label, run in (("group by", naive), ("aggregates", precomputed)):
+                samples = []
+                for _ in range(args.runs):
+                    started = time.perf_counter()
+                    run(db, today)
+                    samples.append((time.perf_counter() - started) * 1000)
+                samples.sort()
+                p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+                print(f"{label:>11}: median {statistics.median(samples):8.2f} ms  p95 {p95:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
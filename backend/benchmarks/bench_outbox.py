@@ -0,0 +1,69 @@
+"""Measure what the outbox costs a write and how fast the relay drains it.
+
+Times single task updates, which each queue one outbox event in their own
+transaction, then fills the outbox with ``--events`` events and drains it
+with a local dispatcher at each ``--batch-sizes``::
+
+    python benchmarks/bench_outbox.py
+    OUTBOX=0 python benchmarks/bench_outbox.py   # the same writes without the outbox
+
+Updates to the same few tasks are coalesced, so the relay sends fewer
+changes than it reads; ``--distinct`` sets how many tasks are touched.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app import crud, models, outbox, schemas, seeding  # noqa: E402
+from app.db import Base, create_db_engine  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--distinct", type=int, default=100)
+    parser.add_argument("--batch-sizes", default="50,500,2000")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{tmp}/outbox.db")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        with Session() as db:
+            seeding.generate(db, seeding.PRESETS["small"])
+
+        samples = []
+        with Session() as db:
+            for i in range(args.writes):
+                started = time.perf_counter()
+                crud.update_task(db, 1 + i % 1000, schemas.TaskPatch(title=f"Renamed {i}"))
+                samples.append((time.perf_counter() - started) * 1000)
+        print(f"task update, outbox {'on' if outbox.settings.outbox else 'off'}: "
+              f"median {statistics.median(samples):.3f} ms")
+
+        for batch_size in (int(size) for size in args.batch_sizes.split(",")):
+            with Session() as db:
+                db.execute(insert(models.OutboxEvent.__table__), [
+                    {"tenant_id": 1, "entity": "tasks", "entity_id": 1 + i % args.distinct, "op": "update",
+                     "created_at": models.utcnow()}
+                    for i in range(args.events)
+                ])
+                db.commit()
+            relay = outbox.Relay(outbox.MemoryDispatcher(), batch_size)
+            relay.drain(Session)
+            stats = relay.metrics.snapshot()
+            print(f"relay, batch {batch_size:>5}: {stats['events_per_second']:>9,.0f} events/s in "
+                  f"{stats['batches']} batches, {stats['coalesced']:,} coalesced")
+
+
+if __name__ == "__main__":
+    main()
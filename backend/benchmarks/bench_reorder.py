@@ -0,0 +1,85 @@
+"""Compare fractional-key moves with renumbering a lane on every move.
+
+Fills one lane of a scratch SQLite database with ``--tasks`` tasks, then
+moves random tasks to random positions both ways, and times a full
+rebalance of the lane::
+
+    python benchmarks/bench_reorder.py --tasks 10000 --moves 500
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, update  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app import crud, models, schemas  # noqa: E402
+from app.db import Base, create_db_engine  # noqa: E402
+from app.ordering import spaced_keys  # noqa: E402
+
+
+def lane_ids(db, lane_id: int) -> list[int]:
+    stmt = select(models.Task.id).where(models.Task.lane_id == lane_id).order_by(models.Task.sort_index, models.Task.id)
+    return list(db.scalars(stmt))
+
+
+def fractional(Session, lane_id: int, moves: list[tuple[int, int]]) -> float:
+    start = time.perf_counter()
+    with Session() as db:
+        for task_id, before_id in moves:
+            crud.reorder_task(db, schemas.TaskReorder(task_id=task_id, before_id=before_id))
+    return time.perf_counter() - start
+
+
+def renumber(Session, lane_id: int, moves: list[tuple[int, int]]) -> float:
+    """The naive approach: splice the id list and rewrite every key."""
+    start = time.perf_counter()
+    with Session() as db:
+        for task_id, before_id in moves:
+            order = lane_ids(db, lane_id)
+            order.remove(task_id)
+            order.insert(order.index(before_id) + 1, task_id)
+            values = [{"id": row_id, "sort_index": key} for row_id, key in zip(order, spaced_keys(len(order)))]
+            db.execute(update(models.Task), values)
+            db.commit()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--moves", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{tmp}/bench.db")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        with Session() as db:
+            lane_id = crud.create_lane(db, schemas.LaneCreate(name="Bench")).id
+            tasks = [(i, schemas.TaskCreate(title=f"Task {i}", lane_id=lane_id)) for i in range(args.tasks)]
+            ids = [row.id for row in crud.bulk_create_tasks(db, tasks, [])]
+
+        rng = random.Random(0)
+        moves = []
+        for _ in range(args.moves):
+            task_id, before_id = rng.sample(ids, 2)
+            moves.append((task_id, before_id))
+
+        for label, run in (("fractional", fractional), ("renumber", renumber)):
+            elapsed = run(Session, lane_id, moves)
+            print(f"{label:>10}: {args.moves} moves in {elapsed:7.2f} s  ({elapsed / args.moves * 1000:8.2f} ms/move)")
+
+        start = time.perf_counter()
+        with Session() as db:
+            crud.rebalance_lane(db, lane_id)
+        print(f"{'rebalance':>10}: {args.tasks} tasks in {time.perf_counter() - start:7.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Compare FTS5 search with ``LIKE '%term%'`` on a large tasks table.
+
+Fills a scratch SQLite database with ``--tasks`` generated task titles, then
+times word and prefix lookups through :func:`app.search.search` against the
+equivalent ``LIKE`` scans::
+
+    python benchmarks/bench_search.py --tasks 500000 --runs 20
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, select  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app import models, search  # noqa: E402
+from app.db import Base, create_db_engine  # noqa: E402
+
+CHUNK = 50000
+VERBS = ["Fix", "Paint", "Clean", "Replace", "Inspect", "Order", "Repair", "Check"]
+THINGS = ["sink", "hallway", "boiler", "gutters", "roof", "lobby door", "window", "laundry dryer", "bike shed", "mailbox"]
+PLACES = ["unit {n}", "building {n}", "floor {n}", "the garden", "the basement"]
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "ze", "pa", "do", "fi"]
+# A long tail of supplier/part names, so most words are rare like in real data.
+VOCABULARY = [a + b + c + d for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES for d in SYLLABLES]
+# Common words (about one title in ten), rare words, prefixes, and a miss.
+QUERIES = [
+    ("sink", False), ("laundry dryer", False), ("kalomine", False), ("zzzz", False),
+    ("boi", True), ("kalomi", True), ("bike sh", True),
+]
+
+
+def title(rng: random.Random) -> str:
+    place = rng.choice(PLACES).format(n=rng.randint(1, 400))
+    return f"{rng.choice(VERBS)} {rng.choice(THINGS)} in {place} ({rng.choice(VOCABULARY)})"
+
+
+def like(db, words: list[str], prefix: bool, limit: int) -> list:
+    stmt = select(models.Task.id, models.Task.title)
+    for word in words:
+        stmt = stmt.where(models.Task.title.ilike(f"%{word}%"))
+    return db.execute(stmt.limit(limit)).all()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=500000)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{tmp}/bench.db")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        rng = random.Random(0)
+        start = time.perf_counter()
+        with Session() as db:
+            for offset in range(0, args.tasks, CHUNK):
+                rows = [{"title": title(rng)} for _ in range(offset, min(offset + CHUNK, args.tasks))]
+                db.execute(insert(models.Task), rows)
+            search.rebuild(db)
+            db.commit()
+        print(f"fill + index: {args.tasks} tasks in {time.perf_counter() - start:.2f} s")
+
+        with Session() as db:
+            for query, prefix in QUERIES:
+                words = search.terms(query)
+                for label, run in (
+                    ("fts", lambda: search.search(db, query, ("tasks",), prefix=prefix, limit=args.limit)),
+                    ("like", lambda: like(db, words, prefix, args.limit)),
+                ):
+                    samples = []
+                    for _ in range(args.runs):
+                        started = time.perf_counter()
+                        run()
+                        samples.append((time.perf_counter() - started) * 1000)
+                    mode = "prefix" if prefix else "full"
+                    print(f"{query!r:>15} {mode:>6} {label:>4}: median {statistics.median(samples):8.2f} ms"
+                          f"  max {max(samples):8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
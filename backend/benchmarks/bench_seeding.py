@@ -0,0 +1,78 @@
+"""Time database resets and synthetic data generation.
+
+Resets a scratch SQLite database to the demo data three ways: dropping and
+recreating the tables, truncating, and restoring the in-memory template
+that ``app.seeding.reset`` keeps. It then generates each ``--presets`` size
+into an empty database::
+
+    python benchmarks/bench_seeding.py --presets tiny,small,medium
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app import seeding  # noqa: E402
+from app.db import Base, create_db_engine  # noqa: E402
+from app.demo import seed_demo_data  # noqa: E402
+
+
+def median_ms(action, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        action()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--presets", default="tiny,small")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{tmp}/reset.db")
+
+        def recreate():
+            Base.metadata.drop_all(bind=engine)
+            Base.metadata.create_all(bind=engine)
+            with Session(bind=engine) as db:
+                seed_demo_data(db)
+
+        def truncate():
+            with Session(bind=engine) as db:
+                seeding.truncate(db)
+                seed_demo_data(db)
+
+        def restore():
+            seeding.reset(engine, "demo", seed_demo_data)
+
+        restore()
+        for name, action in (("drop and create", recreate), ("truncate", truncate), ("template", restore)):
+            print(f"{'reset, ' + name:>22}: {median_ms(action, args.runs):8.2f} ms")
+
+        for preset in args.presets.split(","):
+            engine = create_db_engine(f"sqlite:///{tmp}/{preset}.db")
+            Base.metadata.create_all(bind=engine)
+            spec = seeding.PRESETS[preset]
+            started = time.perf_counter()
+            with Session(bind=engine) as db:
+                seeding.generate(db, spec)
+            elapsed = time.perf_counter() - started
+            print(f"{'generate ' + preset:>22}: {elapsed * 1000:8.0f} ms  ({spec.tasks / elapsed:,.0f} tasks/s)")
+            started = time.perf_counter()
+            template = seeding.snapshot(engine)
+            seeding.restore(engine, template)
+            print(f"{'snapshot+restore ' + preset:>22}: {(time.perf_counter() - started) * 1000:8.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Per-request CPU time of ``GET /tasks/`` with and without the fast path.
+
+Runs the app in-process against a scratch SQLite database holding
+``--tasks`` tasks and requests pages of 100, 1k and 10k rows with
+``FAST_SERIALIZATION`` off and on, clearing the response cache before every
+request::
+
+    python benchmarks/bench_serialization.py --runs 20
+"""
+import argparse
+import dataclasses
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TMP = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{TMP.name}/bench.db"
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app import fast_rows, models  # noqa: E402
+from app.api import app  # noqa: E402
+from app.cache import response_cache  # noqa: E402
+from app.db import Base, SessionLocal, engine  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        db.execute(insert(models.Task), [
+            {"title": f"Task {i}", "lane_id": 1, "sort_index": i * 1024.0, "due_date": None} for i in range(args.tasks)
+        ])
+        db.commit()
+
+    client = TestClient(app)
+    default = fast_rows.settings
+    for size in (100, 1000, 10000):
+        url = f"/tasks/?limit={size}"
+        results = {}
+        for label, fast in (("orm", False), ("fast", True)):
+            fast_rows.settings = dataclasses.replace(default, fast_serialization=fast)
+            samples = []
+            for _ in range(args.runs):
+                response_cache.invalidate("tasks")
+                started = time.process_time()
+                client.get(url).raise_for_status()
+                samples.append((time.process_time() - started) * 1000)
+            results[label] = statistics.median(samples)
+        print(f"{size:>6} rows: orm {results['orm']:8.2f} ms  fast {results['fast']:8.2f} ms"
+              f"  ({results['orm'] / results['fast']:.1f}x)")
+    fast_rows.settings = default
+    TMP.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Measure worker startup: import time and time to the first response.
+
+Each run is a fresh interpreter against a scratch SQLite database that was
+initialised once with ``python -m app.cli init-db --seed``::
+
+    python benchmarks/bench_startup.py --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, time
+start = time.perf_counter()
+from app.api import app
+imported = time.perf_counter() - start
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    client.get("/units/")
+print(json.dumps({"import_s": imported, "first_request_s": time.perf_counter() - start}))
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp}/bench.db")
+        subprocess.run([sys.executable, "-m", "app.cli", "init-db", "--seed"], cwd=BACKEND_DIR, env=env, check=True)
+        samples = []
+        for _ in range(args.runs):
+            out = subprocess.run(
+                [sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=env, check=True, capture_output=True, text=True,
+            ).stdout
+            samples.append(json.loads(out))
+
+    for key, label in (("import_s", "import"), ("first_request_s", "first request")):
+        values = [sample[key] * 1000 for sample in samples]
+        print(f"{label:>14}: median {statistics.median(values):7.1f} ms  max {max(values):7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Compare what a client downloads to refresh with and without delta sync.
+
+Generates a ``--preset`` dataset, takes a full sync, then changes
+``--changes`` tasks (updates, plus a few deletes) and takes a delta. Prints
+the bytes of each, raw and compressed, next to re-fetching every unit,
+member and task as the list routes encode them, and the time taken::
+
+    python benchmarks/bench_sync.py --preset small --changes 50
+"""
+import argparse
+import gzip
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app import crud, fast_rows, schemas, seeding, sync, tenancy  # noqa: E402
+from app.db import Base, create_db_engine  # noqa: E402
+
+
+def sizes(body: bytes) -> str:
+    text = f"{len(body):>10,} B raw {len(gzip.compress(body, compresslevel=6)):>9,} B gzip"
+    if sync.brotli is not None:
+        text += f" {len(sync.brotli.compress(body, quality=5)):>9,} B br"
+    return text
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--preset", default="small")
+    parser.add_argument("--changes", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{tmp}/sync.db")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        with Session() as db:
+            seeding.generate(db, seeding.PRESETS[args.preset])
+
+        with Session() as db:
+            tenancy.use(db, None)
+            lists = b"".join(
+                fast_rows.encode(entity, db.execute(crud._select(entity, frozenset(), True)).all())
+                for entity in ("units", "members", "tasks")
+            )
+            started = time.perf_counter()
+            full = sync.delta(db, None)
+            full_ms = (time.perf_counter() - started) * 1000
+            for task_id in range(1, args.changes + 1):
+                if task_id % 10:
+                    crud.update_task(db, task_id, schemas.TaskPatch(status="done"))
+                else:
+                    crud.delete_task(db, task_id)
+            started = time.perf_counter()
+            changes = sync.delta(db, int(full["token"]))
+            delta_ms = (time.perf_counter() - started) * 1000
+
+        print(f"{'all lists':>12}: {sizes(lists)}")
+        print(f"{'full sync':>12}: {sizes(fast_rows.dumps(full))}  {full_ms:7.1f} ms")
+        print(f"{'delta':>12}: {sizes(fast_rows.dumps(changes))}  {delta_ms:7.1f} ms "
+              f"({len(changes['tasks']['rows'])} rows, {len(changes['tasks']['deleted'])} tombstones)")
+
+
+if __name__ == "__main__":
+    main()
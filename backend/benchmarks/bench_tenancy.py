@@ -0,0 +1,103 @@
+"""Show that a cooperative's query latency does not depend on how many there are.
+
+For each ``--tenants`` count, fills a scratch SQLite database with that many
+cooperatives of ``--tasks-per-tenant`` tasks each, so the total grows with
+the count while each cooperative stays the same size. It then times the
+common reads in sessions scoped to sampled cooperatives::
+
+    python benchmarks/bench_tenancy.py --tenants 1,10,100,1000 --tasks-per-tenant 500
+
+With the ``(tenant_id, ...)`` indexes the list, get and dashboard medians stay
+flat as the table grows a thousandfold. Search matching is flat too, but
+bm25 ranking reads how many rows in the whole table contain each word, so
+ranked search slows somewhat with the total size.
+"""
+import argparse
+import datetime
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app import aggregates, crud, models, search, tenancy  # noqa: E402
+from app.db import Base, create_db_engine  # noqa: E402
+
+CHUNK = 50000
+MEMBERS_PER_TENANT = 10
+THINGS = ["sink", "hallway", "boiler", "gutters", "roof", "window", "mailbox"]
+
+
+def fill(Session, tenants: int, tasks_per_tenant: int, today: datetime.date) -> None:
+    rng = random.Random(0)
+    statuses, priorities = list(models.TaskStatus), list(models.TaskPriority)
+    with Session() as db:
+        db.execute(insert(models.Cooperative), [{"id": t, "name": f"Cooperative {t}"} for t in range(1, tenants + 1)])
+        db.execute(insert(models.Member), [
+            {"tenant_id": t, "name": f"Member {t}.{i}", "email": f"m{i}@coop{t}.example.com"}
+            for t in range(1, tenants + 1) for i in range(MEMBERS_PER_TENANT)
+        ])
+        rows = [
+            {
+                "tenant_id": t,
+                "title": f"Fix {rng.choice(THINGS)} {i}",
+                "status": rng.choice(statuses),
+                "priority": rng.choice(priorities),
+                "due_date": today + datetime.timedelta(days=rng.randint(-30, 60)),
+                "assignee_id": (t - 1) * MEMBERS_PER_TENANT + rng.randint(1, MEMBERS_PER_TENANT),
+            }
+            for t in range(1, tenants + 1) for i in range(tasks_per_tenant)
+        ]
+        for start in range(0, len(rows), CHUNK):
+            db.execute(insert(models.Task), rows[start:start + CHUNK])
+        aggregates.recompute(db)
+        search.rebuild(db)
+        db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tenants", default="1,10,100,1000")
+    parser.add_argument("--tasks-per-tenant", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+    today = models.utcnow().date()
+
+    print(f"{'tenants':>8} {'tasks':>9}  " + "  ".join(f"{name:>10}" for name in ("list", "get", "search", "dashboard")))
+    for tenants in (int(count) for count in args.tenants.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_db_engine(f"sqlite:///{tmp}/bench.db")
+            Base.metadata.create_all(bind=engine)
+            Session = sessionmaker(bind=engine, autoflush=False)
+            fill(Session, tenants, args.tasks_per_tenant, today)
+            rng = random.Random(1)
+            queries = {
+                "list": lambda db, tenant: crud.get_tasks(db, limit=50, sort="due_date", status=models.TaskStatus.todo),
+                "get": lambda db, tenant: crud.get_task(db, (tenant - 1) * args.tasks_per_tenant + 1),
+                "search": lambda db, tenant: search.search(db, "sink", ("tasks",)),
+                "dashboard": lambda db, tenant: aggregates.dashboard(db, today),
+            }
+            medians = {}
+            for name, query in queries.items():
+                samples = []
+                for _ in range(args.runs):
+                    tenant = rng.randint(1, tenants)
+                    with Session() as db:
+                        tenancy.use(db, str(tenant))
+                        started = time.perf_counter()
+                        query(db, tenant)
+                        samples.append((time.perf_counter() - started) * 1000)
+                medians[name] = statistics.median(samples)
+            tenancy.forget()
+            print(f"{tenants:>8} {tenants * args.tasks_per_tenant:>9}  "
+                  + "  ".join(f"{medians[name]:>7.2f} ms" for name in queries))
+
+
+if __name__ == "__main__":
+    main()
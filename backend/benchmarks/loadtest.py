@@ -0,0 +1,345 @@
+"""Load test every API route and compare the results with a stored baseline.
+
+Fills a scratch SQLite database with an ``app.seeding`` preset, then
+drives one scenario per route for ``--duration`` seconds with
+``--concurrency`` clients and reports throughput, p50/p99 latency and peak
+memory per scenario::
+
+    python benchmarks/loadtest.py --scale small
+    python benchmarks/loadtest.py --scale medium --mode server --workers 4
+    python benchmarks/loadtest.py --scale small --save-baseline
+    python benchmarks/loadtest.py --scale small --threshold 0.25   # exit 1 on regression
+
+``--mode inprocess`` (the default) calls the ASGI app directly through
+httpx, so the numbers leave out the network and HTTP parsing.
+``--mode server`` starts ``uvicorn --workers N`` against the same database
+and drives it over HTTP. ``--url`` targets a server that is already running
+and skips the data generation; that server's database must hold the same
+``--scale`` dataset, e.g. from ``python -m app.cli generate --preset small``.
+``--env NAME=VALUE`` sets app settings for the run, e.g. ``--env DB_ASYNC=1``.
+
+Results are written as JSON with ``--output``. Baselines live in
+``benchmarks/baselines/<scale>-<mode>.json``. A later run fails if, in any
+scenario, throughput drops or p99 latency or peak memory grows by more than
+``--threshold``, or if any request gets an unexpected status. Compare runs
+from the same machine only.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import random
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Callable
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_DIR = os.path.join(BACKEND_DIR, "benchmarks", "baselines")
+sys.path.insert(0, BACKEND_DIR)
+
+
+
+def _seeding():
+    # Imported on first use: the app reads its settings at import, so this
+    # has to wait until main() has applied --env and DATABASE_URL.
+    from app import seeding
+
+    return seeding
+
+
+def _skewed(rng: random.Random, s) -> int:
+    return _seeding().skewed(rng, s.members, s.skew)
+
+
+# Scenarios
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    method: str
+    path: Callable[[random.Random, Any], str]
+    body: Callable[[random.Random, Any], Any] | None = None
+    ok: tuple = (200,)
+
+
+def _task_patch(rng, s):
+    return {"status": rng.choice(["todo", "in_progress", "done"]), "priority": rng.choice(["low", "medium", "high"])}
+
+
+SCENARIOS = [
+    Scenario("units.list", "GET", lambda rng, s: f"/units/?limit=50&skip={rng.randrange(max(1, s.units - 50))}"),
+    Scenario("units.get", "GET", lambda rng, s: f"/units/{rng.randint(1, s.units)}?expand=members"),
+    Scenario("units.create", "POST", lambda rng, s: "/units/",
+             lambda rng, s: {"name": f"bench-{rng.getrandbits(64):x}"}),
+    Scenario("members.list", "GET", lambda rng, s: "/members/?limit=100&sort=name"),
+    Scenario("members.get", "GET", lambda rng, s: f"/members/{_skewed(rng, s)}?expand=unit,tasks"),
+    Scenario("members.update", "PUT", lambda rng, s: f"/members/{rng.randint(1, s.members)}",
+             lambda rng, s: {"name": "Renamed", "email": f"renamed-{rng.getrandbits(64):x}@example.com"}),
+    Scenario("lanes.list", "GET", lambda rng, s: "/lanes/"),
+    Scenario("tasks.list", "GET", lambda rng, s: "/tasks/?limit=100"),
+    Scenario("tasks.filter", "GET", lambda rng, s: (
+        f"/tasks/?status=todo&assignee_id={_skewed(rng, s)}&sort=due_date&limit=50"
+    )),
+    Scenario("tasks.lane", "GET", lambda rng, s: f"/tasks/?lane_id={rng.randint(1, len(_seeding().LANES))}&sort=sort_index&limit=50"),
+    Scenario("tasks.get", "GET", lambda rng, s: f"/tasks/{rng.randint(1, s.tasks)}?expand=assignee"),
+    Scenario("tasks.create", "POST", lambda rng, s: "/tasks/",
+             lambda rng, s: {"title": "Load test task", "assignee_id": _skewed(rng, s), "lane_id": 1}),
+    Scenario("tasks.patch", "PATCH", lambda rng, s: f"/tasks/{rng.randint(1, s.tasks)}", _task_patch),
+    Scenario("tasks.reorder", "PATCH", lambda rng, s: "/tasks/reorder",
+             lambda rng, s: {"task_id": rng.randint(1, s.tasks), "lane_id": rng.randint(1, len(_seeding().LANES))}),
+    Scenario("tasks.bulk_create", "POST", lambda rng, s: "/tasks/bulk",
+             lambda rng, s: [{"title": f"Bulk task {i}", "lane_id": 2} for i in range(100)]),
+    Scenario("tasks.bulk_update", "PATCH", lambda rng, s: "/tasks/bulk",
+             lambda rng, s: [{"id": rng.randint(1, s.tasks), **_task_patch(rng, s)} for _ in range(100)]),
+    Scenario("search.full", "GET", lambda rng, s: f"/search?q={rng.choice(_seeding().THINGS).split()[0]}"),
+    Scenario("search.prefix", "GET", lambda rng, s: f"/search?q={rng.choice(_seeding().FIRST)[:3]}&mode=prefix&type=members"),
+    Scenario("metrics.dashboard", "GET", lambda rng, s: "/metrics/dashboard"),
+    Scenario("metrics.scorecards", "GET", lambda rng, s: f"/metrics/scorecards?group={rng.choice(['member', 'unit'])}"),
+    Scenario("proposals.results", "GET", lambda rng, s: f"/proposals/{rng.randint(1, s.proposals)}/results"),
+    Scenario("proposals.vote", "POST", lambda rng, s: f"/proposals/{rng.randint(1, s.proposals)}/votes",
+             lambda rng, s: {"member_id": rng.randint(1, s.members), "choice": rng.choice(["yes", "no", "abstain"])},
+             ok=(201, 409)),
+    Scenario("export.tasks", "GET", lambda rng, s: "/export/tasks?updated_since=2100-01-01T00:00:00"),
+]
+
+
+# Driving
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def peak_rss_mb(pids: list[int] | None) -> float | None:
+    """High-water RSS of this process, or the largest of ``pids`` (Linux only)."""
+    if pids is None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    peaks = []
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/status") as status:
+                peaks += [int(line.split()[1]) / 1024 for line in status if line.startswith("VmHWM:")]
+        except OSError:
+            continue
+    return max(peaks, default=None)
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, scenario: Scenario, scale, concurrency: int, duration: float, seed: int,
+) -> dict:
+    latencies: list[float] = []
+    unexpected: dict[int, int] = {}
+    deadline = time.perf_counter() + duration
+
+    async def worker(number: int):
+        rng = random.Random(f"{seed}:{scenario.name}:{number}")
+        while time.perf_counter() < deadline:
+            kwargs = {"json": scenario.body(rng, scale)} if scenario.body else {}
+            started = time.perf_counter()
+            r = await client.request(scenario.method, scenario.path(rng, scale), **kwargs)
+            latencies.append(time.perf_counter() - started)
+            if r.status_code not in scenario.ok:
+                unexpected[r.status_code] = unexpected.get(r.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(number) for number in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "errors": sum(unexpected.values()),
+        "statuses": {str(status): count for status, count in sorted(unexpected.items())},
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+async def drive(client: httpx.AsyncClient, scenarios: list[Scenario], args, scale, pids) -> dict:
+    results = {}
+    for scenario in scenarios:
+        stats = await run_scenario(client, scenario, scale, args.concurrency, args.duration, args.seed)
+        stats["peak_rss_mb"] = peak_rss_mb(pids)
+        results[scenario.name] = stats
+        print(
+            f"{scenario.name:>20}: {stats['rps']:8.1f} req/s  p50 {stats['p50_ms']:8.2f} ms  "
+            f"p99 {stats['p99_ms']:8.2f} ms  peak {stats['peak_rss_mb'] or 0:7.1f} MB"
+            + (f"  unexpected {stats['statuses']}" if stats["errors"] else ""),
+            flush=True,
+        )
+    return results
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_ready(client: httpx.AsyncClient) -> None:
+    for _ in range(200):
+        try:
+            await client.get("/lanes/")
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+def _children(pid: int) -> list[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as children:
+            return [int(child) for child in children.read().split()]
+    except OSError:
+        return []
+
+
+def run(args, scale, scenarios: list[Scenario]) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency)
+    if args.url:
+        async def external():
+            async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+                return await drive(client, scenarios, args, scale, pids=[])
+        return asyncio.run(external())
+
+    from sqlalchemy.orm import Session
+
+    from app.db import Base, create_db_engine
+
+    engine = create_db_engine(os.environ["DATABASE_URL"])
+    Base.metadata.create_all(bind=engine)
+    started = time.perf_counter()
+    with Session(bind=engine) as db:
+        _seeding().generate(db, scale)
+    engine.dispose()
+    print(f"generated {scale.units} units, {scale.members} members and {scale.tasks} tasks in {time.perf_counter() - started:.1f} s", flush=True)
+
+    if args.mode == "inprocess":
+        from app.api import app
+
+        async def inprocess():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60) as client:
+                return await drive(client, scenarios, args, scale, pids=None)
+        return asyncio.run(inprocess())
+
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.api:app", "--port", str(port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=os.environ.copy(),
+    )
+    try:
+        async def served():
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+                await _wait_ready(client)
+                return await drive(client, scenarios, args, scale, pids=[server.pid, *_children(server.pid)])
+        return asyncio.run(served())
+    finally:
+        server.terminate()
+        server.wait()
+
+
+# Baselines
+
+def regressions(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Why ``current`` is worse than ``baseline``, one line per scenario metric."""
+    found = []
+    for name, now in current["results"].items():
+        if now["errors"]:
+            found.append(f"{name}: unexpected statuses {now['statuses']}")
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        if now["rps"] < before["rps"] * (1 - threshold):
+            found.append(f"{name}: throughput {now['rps']:.1f} req/s, baseline {before['rps']:.1f}")
+        for metric, unit in (("p99_ms", "ms"), ("peak_rss_mb", "MB")):
+            if now.get(metric) is not None and before.get(metric) and now[metric] > before[metric] * (1 + threshold):
+                found.append(f"{name}: {metric} {now[metric]:.1f} {unit}, baseline {before[metric]:.1f}")
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=["tiny", "small", "medium", "large"], default="small")
+    parser.add_argument("--units", type=int)
+    parser.add_argument("--members", type=int)
+    parser.add_argument("--tasks", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mode", choices=["inprocess", "server"], default="inprocess")
+    parser.add_argument("--workers", type=int, default=2, help="uvicorn workers in server mode")
+    parser.add_argument("--url", help="drive an already running server instead")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per scenario")
+    parser.add_argument("--only", help="comma-separated scenario names or prefixes, e.g. tasks.,search.full")
+    parser.add_argument("--env", action="append", default=[], metavar="NAME=VALUE")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", help="baseline JSON (default benchmarks/baselines/<scale>-<mode>.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+
+    for setting in args.env:
+        name, _, value = setting.partition("=")
+        os.environ[name] = value
+    scenarios = SCENARIOS
+    if args.only:
+        wanted = args.only.split(",")
+        scenarios = [s for s in SCENARIOS if any(s.name == w or (w.endswith(".") and s.name.startswith(w)) for w in wanted)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if not args.url:
+            os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/loadtest.db"
+        sizes = {"units": args.units, "members": args.members, "tasks": args.tasks}
+        scale = replace(
+            _seeding().PRESETS[args.scale], seed=args.seed, **{name: n for name, n in sizes.items() if n},
+        )
+        results = run(args, scale, scenarios)
+    report = {
+        "meta": {
+            "scale": asdict(scale),
+            "mode": "url" if args.url else args.mode,
+            "workers": args.workers if args.mode == "server" else None,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "env": args.env,
+            "python": platform.python_version(),
+            "machine": platform.node(),
+            "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2, default=str)
+
+    baseline_path = args.baseline or os.path.join(BASELINE_DIR, f"{args.scale}-{report['meta']['mode']}.json")
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, "w") as output:
+            json.dump(report, output, indent=2, default=str)
+        print(f"baseline saved to {baseline_path}")
+        return
+    if not os.path.exists(baseline_path):
+        print(f"no baseline at {baseline_path}; run with --save-baseline to create one")
+        return
+    with open(baseline_path) as stored:
+        found = regressions(report, json.load(stored), args.threshold)
+    if found:
+        print(f"regressions beyond {args.threshold:.0%} against {baseline_path}:")
+        print("\n".join(f"  {line}" for line in found))
+        sys.exit(1)
+    print(f"no regressions beyond {args.threshold:.0%} against {baseline_path}")
+
+
+if __name__ == "__main__":
+    main()
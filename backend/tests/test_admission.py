@@ -0,0 +1,110 @@
+import asyncio
+import dataclasses
+import time
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app import admission
+from app.api import create_app, reset_demo_db
+from app.config import settings
+
+reset_demo_db()
+
+
+def test_token_bucket_refills():
+    now = [0.0]
+    backend = admission.MemoryBackend(clock=lambda: now[0])
+    taken = [asyncio.run(backend.take("a", rate=2, burst=3)) for _ in range(4)]
+    assert taken == [2, 1, 0, -1]
+    now[0] = 0.5  # one token back
+    assert asyncio.run(backend.take("a", rate=2, burst=3)) == 0
+    assert asyncio.run(backend.take("b", rate=2, burst=3)) == 2  # its own bucket
+    now[0] = 60
+    assert asyncio.run(backend.take("a", rate=2, burst=3)) == 2  # never more than the burst
+
+
+def test_abusive_client_is_throttled_per_route():
+    reset_demo_db()
+    app = create_app(dataclasses.replace(settings, rate_limit_backend="memory", rate_limit_writes=2, rate_limit_burst=2))
+    abusive = TestClient(app, client=("10.0.0.1", 1000))
+    polite = TestClient(app, client=("10.0.0.2", 1000))
+
+    statuses = [abusive.post("/tasks/", json={"title": "Spam"}).status_code for _ in range(20)]
+    assert statuses[:4] == [200] * 4
+    assert statuses.count(429) >= 15
+    r = abusive.post("/tasks/", json={"title": "Spam"})
+    assert r.status_code == 429 and int(r.headers["Retry-After"]) >= 1
+
+    # Other routes and other clients have buckets of their own.
+    assert abusive.get("/tasks/1").status_code == 200
+    assert abusive.post("/units/", json={"name": "A-1"}).status_code == 200
+    assert polite.post("/tasks/", json={"title": "Fix sink"}).status_code == 200
+    assert polite.get("/metrics/admission").json()["throttled"] >= 16
+
+
+def test_full_queue_and_long_waits_are_shed():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def busy(scope, receive, send):
+            await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"done"})
+
+        gate = admission.Admission(admission.Gate(limit=1, queue_size=1, timeout=0.05))
+        app = admission.AdmissionMiddleware(busy, gate)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app), base_url="http://test") as client:
+            first = asyncio.create_task(client.get("/"))
+            await asyncio.sleep(0.01)
+            queued = asyncio.create_task(client.get("/"))
+            await asyncio.sleep(0.01)
+            started = time.perf_counter()
+            full = await client.get("/")
+            assert full.status_code == 503 and full.headers["Retry-After"] == "1"
+            assert time.perf_counter() - started < 0.04  # no queue slot: turned away at once
+            assert (await queued).status_code == 503  # waited longer than the timeout
+
+            waiting = asyncio.create_task(client.get("/"))
+            await asyncio.sleep(0.01)
+            release.set()
+            assert (await first).status_code == 200
+            assert (await waiting).status_code == 200  # handed the slot the first one left
+        assert gate.stats() == {"active": 0, "waiting": 0, "limit": 1, "throttled": 0, "shed": 2}
+
+    asyncio.run(scenario())
+
+
+def test_a_flood_cannot_crowd_out_other_clients():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def api(scope, receive, send):
+            await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"{}"})
+
+        gate = admission.Gate(limit=2, queue_size=4, timeout=5)
+        guard = admission.Admission(gate, admission.MemoryBackend(clock=lambda: 0.0), reads=5, burst=2)
+        app = admission.AdmissionMiddleware(api, guard)
+
+        def client(host):
+            return httpx.AsyncClient(transport=httpx.ASGITransport(app, client=(host, 1000)), base_url="http://test")
+
+        async with client("10.0.0.1") as abusive, client("10.0.0.2") as polite:
+            flood = [asyncio.create_task(abusive.get("/tasks/")) for _ in range(14)]
+            while guard.throttled + guard.shed + gate.active + gate.waiting < 14:
+                await asyncio.sleep(0)
+            # Ten tokens in the bucket; of those ten, two run and two wait,
+            # half the queue. The polite client still finds a place.
+            assert (guard.throttled, guard.shed, gate.active, gate.waiting) == (4, 6, 2, 2)
+            answer = asyncio.create_task(polite.get("/tasks/"))
+            while gate.waiting < 3:
+                await asyncio.sleep(0)
+            release.set()
+            assert (await answer).status_code == 200
+            statuses = [r.status_code for r in await asyncio.gather(*flood)]
+        assert sorted(statuses) == [200] * 4 + [429] * 4 + [503] * 6
+        assert guard.stats() == {"active": 0, "waiting": 0, "limit": 2, "throttled": 4, "shed": 6}
+
+    asyncio.run(scenario())
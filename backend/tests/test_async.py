@@ -0,0 +1,54 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import reset_demo_db
+from app.async_api import router
+from app.db import async_database_url
+
+reset_demo_db()
+
+app = FastAPI()
+app.include_router(router)
+client = TestClient(app)
+
+
+def test_async_database_url():
+    assert async_database_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+    assert async_database_url("postgresql://u:p@db/coop") == "postgresql+asyncpg://u:p@db/coop"
+    assert async_database_url("postgresql+psycopg2://u:p@db/coop") == "postgresql+asyncpg://u:p@db/coop"
+
+
+def test_async_crud_routes():
+    r = client.post("/units/", json={"name": "A1"})
+    assert r.status_code == 200
+    unit_id = r.json()["id"]
+
+    r = client.post("/members/", json={"name": "Dana", "email": "dana@example.com", "unit_id": unit_id})
+    member_id = r.json()["id"]
+    r = client.post("/tasks/", json={"title": "Sweep stairs", "assignee_id": member_id, "due_date": "2026-03-01"})
+    assert r.status_code == 200
+    task_id = r.json()["id"]
+
+    r = client.get("/tasks/", params={"assignee_id": member_id})
+    assert [t["id"] for t in r.json()] == [task_id]
+
+    r = client.get("/units/", params={"limit": 1})
+    assert r.headers["X-Next-Cursor"]
+
+    r = client.put(f"/units/{unit_id}", json={"name": "A2"})
+    assert r.json()["name"] == "A2"
+    assert client.get(f"/units/{unit_id}").json()["name"] == "A2"
+
+    assert client.delete(f"/tasks/{task_id}").status_code == 200
+    assert client.get(f"/tasks/{task_id}").json() is None
+
+
+def test_async_lane_routes():
+    r = client.post("/lanes/", json={"name": "Async lane"})
+    lane_id = r.json()["id"]
+    r = client.post("/tasks/", json={"title": "Queued", "lane_id": lane_id})
+    assert r.json()["sort_index"] is not None
+    assert [t["title"] for t in client.get("/tasks/", params={"lane_id": lane_id}).json()] == ["Queued"]
+    assert client.put(f"/lanes/{lane_id}", json={"name": "Async lane 2"}).json()["name"] == "Async lane 2"
+    assert client.delete(f"/lanes/{lane_id}").json()["id"] == lane_id
+    assert client.get(f"/lanes/{lane_id}").json() is None
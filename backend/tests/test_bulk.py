@@ -0,0 +1,104 @@
+from fastapi.testclient import TestClient
+
+from app import crud
+from app.api import app, reset_demo_db
+
+reset_demo_db()
+
+client = TestClient(app)
+
+
+def test_bulk_create_reports_per_item_errors():
+    r = client.post("/units/bulk", json=[{"name": "B1"}, {"name": "B2"}, {"name": "101"}, {"name": "B1"}, {}])
+    assert r.status_code == 200
+    body = r.json()
+    assert [u["name"] for u in body["items"]] == ["B1", "B2"]
+    assert [e["index"] for e in body["errors"]] == [2, 3, 4]
+    unit_id = body["items"][0]["id"]
+
+    r = client.post("/members/bulk", json=[
+        {"name": "Eve", "email": "eve@example.com", "unit_id": unit_id},
+        {"name": "Finn", "email": "alice@example.com"},
+        {"name": "Gus", "email": "gus@example.com", "unit_id": 99999},
+        {"name": "Hana", "email": "hana@example.com"},
+    ])
+    body = r.json()
+    assert [m["name"] for m in body["items"]] == ["Eve", "Hana"]
+    assert [e["index"] for e in body["errors"]] == [1, 2]
+    member_id = body["items"][0]["id"]
+
+    r = client.post("/tasks/bulk", json=[
+        {"title": "Mow lawn", "assignee_id": member_id, "due_date": "2026-05-01"},
+        {"title": "Orphan", "assignee_id": 99999},
+    ])
+    body = r.json()
+    assert body["items"][0]["status"] == "todo" and body["items"][0]["priority"] == "medium"
+    assert [e["index"] for e in body["errors"]] == [1]
+
+
+def test_bulk_update_and_delete_tasks():
+    created = client.post("/tasks/bulk", json=[{"title": f"Job {i}"} for i in range(5)]).json()["items"]
+    ids = [t["id"] for t in created]
+
+    r = client.patch("/tasks/bulk", json=[
+        {"id": ids[0], "status": "done"},
+        {"id": ids[1], "title": "Renamed", "priority": "high"},
+        {"id": 99999, "status": "done"},
+        {"id": ids[2], "status": "bogus"},
+    ])
+    body = r.json()
+    assert [(t["id"], t["status"], t["title"]) for t in body["items"]] == [
+        (ids[0], "done", "Job 0"),
+        (ids[1], "todo", "Renamed"),
+    ]
+    assert [e["index"] for e in body["errors"]] == [2, 3]
+
+    r = client.request("DELETE", "/tasks/bulk", json={"ids": [ids[3], ids[4], 99999]})
+    body = r.json()
+    assert sorted(body["deleted"]) == [ids[3], ids[4]]
+    assert [e["index"] for e in body["errors"]] == [2]
+    assert client.get(f"/tasks/{ids[3]}").json() is None
+
+
+def test_bulk_update_keeps_own_unique_values():
+    members = client.post("/members/bulk", json=[
+        {"name": "Ivy", "email": "ivy@example.com"},
+        {"name": "Jon", "email": "jon@example.com"},
+    ]).json()["items"]
+    r = client.patch("/members/bulk", json=[
+        {"id": members[0]["id"], "name": "Ivy R", "email": "ivy@example.com"},
+        {"id": members[1]["id"], "email": "ivy@example.com"},
+    ])
+    body = r.json()
+    assert [m["name"] for m in body["items"]] == ["Ivy R"]
+    assert [e["index"] for e in body["errors"]] == [1]
+
+
+def test_bulk_update_rejects_nulls_for_required_fields():
+    reset_demo_db()
+    r = client.patch("/units/bulk", json=[{"id": 1, "name": None}, {"id": 2, "name": "102b"}])
+    assert [u["name"] for u in r.json()["items"]] == ["102b"]
+    assert [e["index"] for e in r.json()["errors"]] == [0]
+
+    r = client.patch("/members/bulk", json=[{"id": 1, "email": None}, {"id": 2, "name": None}, {"id": 1, "unit_id": None}])
+    assert [m["unit_id"] for m in r.json()["items"]] == [None]
+    assert [e["index"] for e in r.json()["errors"]] == [0, 1]
+
+    r = client.patch("/tasks/bulk", json=[{"id": 1, "title": None}, {"id": 1, "status": None}, {"id": 2, "priority": None}])
+    assert r.json()["items"] == []
+    assert [e["index"] for e in r.json()["errors"]] == [0, 1, 2]
+
+    assert client.get("/units/1").json()["name"] == "101"
+    assert client.get("/members/1").status_code == 200
+    assert client.get("/tasks/1").json()["title"]
+
+
+def test_bulk_update_fails_only_the_rows_that_lose_a_race(monkeypatch):
+    reset_demo_db()
+    # As if another writer took "102" between the pre-check and the UPDATE.
+    monkeypatch.setattr(crud, "_owners", lambda db, column, values: {})
+    r = client.patch("/units/bulk", json=[{"id": 1, "name": "102"}, {"id": 2, "name": "102b"}, {"id": 1}])
+    assert [u["name"] for u in r.json()["items"]] == ["102b", "101"]
+    assert [e["index"] for e in r.json()["errors"]] == [0]
+    assert "UNIQUE" in r.json()["errors"][0]["detail"]
+    assert [u["name"] for u in client.get("/units/").json()] == ["101", "102b"]
@@ -0,0 +1,82 @@
+from fastapi.testclient import TestClient
+
+from app.api import app, reset_demo_db
+from app.cache import MemoryBackend, RedisBackend, ResponseCache, response_cache
+from app.config import Settings
+
+reset_demo_db()
+
+client = TestClient(app)
+
+
+def test_repeat_reads_hit_cache_until_a_write():
+    reset_demo_db()
+    before = response_cache.stats()
+    first = client.get("/units/")
+    second = client.get("/units/")
+    assert first.json() == second.json()
+    stats = response_cache.stats()
+    assert stats["misses"] == before["misses"] + 1
+    assert stats["hits"] == before["hits"] + 1
+
+    client.post("/units/", json={"name": "C1"})
+    r = client.get("/units/")
+    assert "C1" in [u["name"] for u in r.json()]
+    assert response_cache.stats()["misses"] == before["misses"] + 2
+    assert client.get("/metrics/cache").json()["hits"] >= 1
+
+
+def test_expanded_tasks_see_member_changes():
+    reset_demo_db()
+    r = client.get("/tasks/1", params={"expand": "assignee"})
+    assert r.json()["assignee"]["name"] == "Alice"
+    client.put("/members/1", json={"name": "Alicia", "email": "alice@example.com", "unit_id": 1})
+    r = client.get("/tasks/1", params={"expand": "assignee"})
+    assert r.json()["assignee"]["name"] == "Alicia"
+
+
+def test_etag_returns_not_modified():
+    r = client.get("/tasks/")
+    etag = r.headers["ETag"]
+    r = client.get("/tasks/", headers={"If-None-Match": etag})
+    assert r.status_code == 304 and r.content == b""
+
+    client.post("/tasks/", json={"title": "New chore"})
+    r = client.get("/tasks/", headers={"If-None-Match": etag})
+    assert r.status_code == 200 and r.headers["ETag"] != etag
+
+
+def test_memory_backend_lru_and_ttl():
+    backend = MemoryBackend(maxsize=2)
+    cache = ResponseCache(backend, ttl=30)
+    backend.set("a", b"1", 30)
+    backend.set("b", b"2", 30)
+    assert backend.get("a") == b"1"
+    backend.set("c", b"3", 30)  # evicts "b", the least recently used
+    assert backend.get("b") is None and backend.get("a") == b"1"
+    assert cache.stats()["evictions"] == 1
+
+    backend.set("d", b"4", -1)
+    assert backend.get("d") is None
+
+
+def test_cache_is_shared_by_default_when_redis_is_configured(monkeypatch):
+    monkeypatch.delenv("CACHE_BACKEND", raising=False)
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    assert Settings.from_env().cache_backend == "memory"
+    monkeypatch.setenv("REDIS_URL", "redis://cache:6379/0")
+    assert Settings.from_env().cache_backend == "redis"
+    monkeypatch.setenv("CACHE_BACKEND", "none")
+    assert Settings.from_env().cache_backend == "none"
+
+
+def test_unreachable_backend_fails_open(monkeypatch):
+    reset_demo_db()
+    monkeypatch.setattr(response_cache, "backend", RedisBackend("redis://127.0.0.1:1/0"))
+    errors = response_cache.stats()["errors"]
+    assert client.get("/units/").status_code == 200
+    r = client.post("/units/", json={"name": "301"}, headers={"Idempotency-Key": "cache-down-1"})
+    assert r.status_code == 200
+    assert client.post("/units/", json={"name": "301"}, headers={"Idempotency-Key": "cache-down-1"}).status_code == 200
+    assert [unit["name"] for unit in client.get("/units/").json()].count("301") == 1
+    assert response_cache.stats()["errors"] > errors
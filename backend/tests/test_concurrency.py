@@ -0,0 +1,125 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, select
+
+from app import aggregates, crud, models, schemas
+from app.api import app, reset_demo_db
+from app.concurrency import PreconditionFailed, parse_if_match
+from app.db import SessionLocal, engine
+
+reset_demo_db()
+
+client = TestClient(app)
+
+
+def test_parse_if_match():
+    assert parse_if_match(None) is None
+    assert parse_if_match("*") is None
+    assert parse_if_match('"3", "4"') == {3, 4}
+    assert parse_if_match('W/"3"') == frozenset()
+    assert parse_if_match('"a1b2"') == frozenset()
+
+
+def test_update_is_one_conditional_write():
+    reset_demo_db()
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.split()[0])
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        with SessionLocal() as db:
+            db.info["tenant_id"] = models.DEFAULT_TENANT  # scoped like a request's session
+            row = crud.update_unit(db, 1, schemas.UnitUpdate(name="101A"), versions=frozenset([1]))
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    # The INSERTs queue the outbox event and log the change history.
+    assert statements == ["UPDATE", "INSERT", "INSERT"]
+    assert (row.name, row.version) == ("101A", 2)
+
+
+def test_if_match_guards_task_patch():
+    reset_demo_db()
+    r = client.get("/tasks/1")
+    assert r.headers["ETag"] == '"1"'
+
+    r = client.patch("/tasks/1", json={"title": "Paint stairs"}, headers={"If-Match": '"1"'})
+    assert r.status_code == 200
+    assert r.headers["ETag"] == '"2"'
+    assert r.json()["title"] == "Paint stairs" and r.json()["version"] == 2
+    assert r.json()["status"] == "todo"  # fields left out are kept
+
+    r = client.patch("/tasks/1", json={"title": "Paint attic"}, headers={"If-Match": '"1"'})
+    assert r.status_code == 412
+    assert "at version 2" in r.json()["detail"]
+    r = client.patch("/tasks/1", json={"status": "done"}, headers={"If-Match": 'W/"2"'})
+    assert r.status_code == 412
+    r = client.get("/tasks/1")
+    assert r.json()["title"] == "Paint stairs" and r.json()["status"] == "todo"
+    assert r.headers["ETag"] == '"2"'
+    assert client.get("/tasks/1", headers={"If-None-Match": '"2"'}).status_code == 304
+
+    r = client.patch("/tasks/1", json={"status": "done"}, headers={"If-Match": "*"})
+    assert r.status_code == 200 and r.json()["version"] == 3
+    assert client.patch("/tasks/1", json={"status": None}).status_code == 422
+    assert client.patch("/tasks/999", json={"title": "Ghost"}).json() is None
+    assert client.patch("/tasks/999", json={"title": "Ghost"}, headers={"If-Match": '"1"'}).status_code == 412
+
+
+def test_put_honours_if_match():
+    reset_demo_db()
+    r = client.put("/members/1", json={"name": "Alicia", "email": "alice@example.com", "unit_id": 1},
+                   headers={"If-Match": '"1"'})
+    assert r.status_code == 200 and r.headers["ETag"] == '"2"'
+    r = client.put("/members/1", json={"name": "Ali", "email": "alice@example.com", "unit_id": 1},
+                   headers={"If-Match": '"1"'})
+    assert r.status_code == 412
+    assert client.get("/members/1").json()["name"] == "Alicia"
+    assert client.get("/search", params={"q": "alicia"}).json()["members"][0]["id"] == 1
+
+
+def test_every_write_path_bumps_the_version():
+    reset_demo_db()
+    client.patch("/tasks/bulk", json=[{"id": 1, "priority": "high"}, {"id": 2}])
+    client.patch("/tasks/reorder", json={"task_id": 2, "before_id": 1})
+    with SessionLocal() as db:
+        crud.rebalance_lane(db, 1)
+    versions = {task["id"]: task["version"] for task in client.get("/tasks/").json()}
+    # 1: bulk, rebalance; 2: reorder, rebalance (the bulk item changed nothing).
+    assert versions == {1: 3, 2: 3}
+    client.delete("/lanes/1")
+    assert [task["version"] for task in client.get("/tasks/").json()] == [4, 4]
+
+
+def test_concurrent_edits_with_the_same_version_conflict():
+    reset_demo_db()
+    r = client.post("/tasks/bulk", json=[{"title": f"Race {i}"} for i in range(100)])
+    ids = [task["id"] for task in r.json()["items"]]
+
+    def edit(submission):
+        task_id, patch = submission
+        with SessionLocal() as db:
+            try:
+                crud.update_task(db, task_id, schemas.TaskPatch(**patch), versions=frozenset([1]))
+                return "applied"
+            except PreconditionFailed:
+                return "conflict"
+
+    # Two writers per task, both holding version 1; half of them also move the counts.
+    submissions = []
+    for n, task_id in enumerate(ids):
+        counted = {"status": "in_progress"} if n % 2 else {}
+        submissions += [(task_id, {"title": f"A {n}", **counted}), (task_id, {"title": f"B {n}", "priority": "low"})]
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        outcomes = Counter(pool.map(edit, submissions))
+    assert outcomes == {"applied": 100, "conflict": 100}
+
+    with SessionLocal() as db:
+        assert set(db.scalars(select(models.Task.version).where(models.Task.id.in_(ids)))) == {2}
+        live = sorted(db.execute(select(models.TaskCount.__table__)).all())
+        aggregates.recompute(db)
+        assert sorted(db.execute(select(models.TaskCount.__table__)).all()) == live
+        db.rollback()
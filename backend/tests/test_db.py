@@ -0,0 +1,60 @@
+import threading
+
+from fastapi.testclient import TestClient
+from sqlalchemy import exc, text
+
+from app.api import app, reset_demo_db
+from app.config import Settings
+from app.db import create_db_engine, engine_options, PoolMetrics, pool_status
+
+reset_demo_db()
+
+client = TestClient(app)
+
+
+def test_postgres_engine_options():
+    config = Settings(database_url="", pg_statement_timeout_ms=2000, pg_prepare_threshold=0)
+    options = engine_options("postgresql+psycopg://u@db/coop", config, PoolMetrics())
+    assert options["pool_size"] == 5 and options["pool_pre_ping"]
+    assert options["connect_args"] == {"options": "-c statement_timeout=2000", "prepare_threshold": None}
+
+    options = engine_options("postgresql+asyncpg://u@db/coop", config, PoolMetrics(), is_async=True)
+    assert options["connect_args"] == {
+        "server_settings": {"statement_timeout": "2000"},
+        "statement_cache_size": 0,
+    }
+
+
+def test_sqlite_pragmas_and_pool_metrics(tmp_path):
+    config = Settings(database_url="", db_pool_size=1, db_max_overflow=0, db_pool_timeout=1)
+    db_engine = create_db_engine(f"sqlite:///{tmp_path}/pool.db", config)
+    with db_engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        stats = pool_status(db_engine)
+        assert stats["checked_out"] == 1 and stats["size"] == 1
+
+        # the only connection is taken, so a second checkout times out
+        errors = []
+        def checkout():
+            try:
+                db_engine.connect()
+            except exc.TimeoutError as e:
+                errors.append(e)
+        worker = threading.Thread(target=checkout)
+        worker.start()
+        worker.join()
+        assert errors
+
+    stats = pool_status(db_engine)
+    assert stats["timeouts"] == 1
+    assert stats["checkouts"] == 1
+    assert stats["wait_seconds_max"] >= 1
+    assert stats["checked_out"] == 0
+
+
+def test_pool_metrics_endpoint():
+    client.get("/units/")
+    r = client.get("/metrics/pool")
+    assert r.status_code == 200
+    assert r.json()["checkouts"] >= 1
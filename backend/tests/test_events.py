@@ -0,0 +1,149 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.api import app, reset_demo_db
+from app import events
+from app.events import EventHub, MemoryBroker, RESYNC
+
+reset_demo_db()
+
+
+def test_websocket_receives_coalesced_task_changes():
+    reset_demo_db()
+    with TestClient(app) as client:
+        with client.websocket_connect("/ws?topics=tasks") as ws:
+            task_id = client.get("/tasks/").json()[0]["id"]
+            client.delete(f"/tasks/{task_id}")
+            client.post("/units/", json={"name": "W1"})  # not subscribed
+            created = client.post("/tasks/bulk", json=[{"title": "A"}, {"title": "B"}]).json()["items"]
+
+            seen = {"created": set(), "deleted": set()}
+            while not ({c["id"] for c in created} <= seen["created"] and task_id in seen["deleted"]):
+                message = json.loads(ws.receive_text())
+                assert message["topic"] == "tasks.updated"
+                seen["created"].update(message["created"])
+                seen["deleted"].update(message["deleted"])
+
+
+def test_subscribers_only_see_their_own_cooperative():
+    reset_demo_db()
+    with TestClient(app) as client:
+        other = str(client.post("/cooperatives/", json={"name": "Elm Court"}).json()["id"])
+        with client.websocket_connect("/ws?topics=tasks") as first, \
+                client.websocket_connect("/ws?topics=tasks", headers={"X-Cooperative-Id": other}) as second, \
+                client.websocket_connect(f"/ws?topics=tasks&cooperative_id={other}") as browser:
+            mine = client.post("/tasks/", json={"title": "Mine"}).json()["id"]
+            theirs = client.post("/tasks/", json={"title": "Theirs"}, headers={"X-Cooperative-Id": other}).json()["id"]
+
+            assert json.loads(first.receive_text())["created"] == [mine]
+            for ws in (second, browser):
+                message = json.loads(ws.receive_text())
+                assert message["tenant_id"] == int(other) and message["created"] == [theirs]
+
+    with pytest.raises(WebSocketDisconnect) as excinfo:
+        with TestClient(app).websocket_connect("/ws", headers={"X-Cooperative-Id": "999"}):
+            pass
+    assert excinfo.value.code == 1008
+
+
+def test_unknown_topic_is_rejected():
+    client = TestClient(app)
+    with pytest.raises(WebSocketDisconnect) as excinfo:
+        with client.websocket_connect("/ws?topics=votes"):
+            pass
+    assert excinfo.value.code == 1008
+
+
+def test_changes_within_window_are_coalesced():
+    async def scenario():
+        hub = EventHub(MemoryBroker(), flush_interval=60)
+        await hub.ensure_started()
+        subscriber = hub.subscribe({"tasks.updated"}, 1)
+        hub.publish(1, "tasks", "create", [1])
+        hub.publish(1, "tasks", "update", [1, 2])
+        hub.publish(1, "tasks", "delete", [3])
+        hub.publish(1, "tasks", "update", [3])
+        await hub.flush()
+        message = json.loads(subscriber.queue.get_nowait())
+        assert message == {"topic": "tasks.updated", "tenant_id": 1, "created": [1], "updated": [2, 3], "deleted": []}
+        assert subscriber.queue.empty()
+
+    asyncio.run(scenario())
+
+
+def test_slow_subscriber_gets_resync_instead_of_backlog():
+    async def scenario():
+        hub = EventHub(MemoryBroker(), flush_interval=0, queue_size=2)
+        await hub.ensure_started()
+        slow = hub.subscribe({"tasks.updated"}, 1)
+        for task_id in range(5):
+            hub.publish(1, "tasks", "update", [task_id])
+            await hub.flush()
+        assert slow.queue.qsize() <= 2
+        drained = [slow.queue.get_nowait() for _ in range(slow.queue.qsize())]
+        assert RESYNC in drained
+        assert hub.stats()["dropped"] >= 2
+
+    asyncio.run(scenario())
+
+
+class FlakyPubSub:
+    """Delivers ``messages``, then drops the connection, or hangs if ``last``."""
+
+    def __init__(self, messages: list[str], last: bool):
+        self.messages = messages
+        self.last = last
+
+    async def subscribe(self, channel):
+        pass
+
+    async def listen(self):
+        for data in self.messages:
+            yield {"type": "message", "data": data.encode()}
+        if self.last:
+            await asyncio.Event().wait()
+        raise ConnectionError("connection reset")
+
+    async def aclose(self):
+        pass
+
+
+def test_redis_broker_reconnects_and_asks_for_a_resync(monkeypatch):
+    monkeypatch.setattr(events, "RECONNECT_MIN", 0)
+    before = json.dumps({"topic": "tasks.updated", "tenant_id": 1, "created": [1], "updated": [], "deleted": []})
+    after = json.dumps({"topic": "tasks.updated", "tenant_id": 1, "created": [2], "updated": [], "deleted": []})
+    connections = iter([FlakyPubSub([after], last=True)])
+
+    async def scenario():
+        broker = events.RedisBroker("redis://unused")
+        broker._redis = type("FakeRedis", (), {"pubsub": lambda self: next(connections)})()
+        broker._pubsub = FlakyPubSub([before], last=False)
+        hub = EventHub(broker)
+        subscriber = hub.subscribe({"tasks.updated"}, 1)
+        listening = asyncio.create_task(broker._listen(hub._deliver, hub._resync))
+        while subscriber.queue.qsize() < 3:
+            await asyncio.sleep(0.01)
+        listening.cancel()
+        assert [subscriber.queue.get_nowait() for _ in range(3)] == [before, RESYNC, after]
+
+    asyncio.run(scenario())
+
+
+def test_failed_publish_is_logged_not_raised(caplog):
+    class DownBroker(MemoryBroker):
+        async def publish(self, message):
+            raise ConnectionError("redis is down")
+
+    async def scenario():
+        hub = EventHub(DownBroker(), flush_interval=60)
+        await hub.ensure_started()
+        hub.publish(1, "tasks", "update", [1])
+        hub.publish(2, "units", "update", [1])
+        await hub.flush()
+
+    asyncio.run(scenario())
+    assert caplog.text.count("could not publish") == 2
@@ -0,0 +1,70 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.api import app, reset_demo_db
+from app.cache import response_cache
+from app.db import engine
+
+reset_demo_db()
+
+client = TestClient(app)
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __enter__(self):
+        event.listen(engine, "before_cursor_execute", self.bump)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine, "before_cursor_execute", self.bump)
+
+    def bump(self, *args):
+        self.count += 1
+
+
+def statements_for(path, **params):
+    response_cache.invalidate("units", "members", "tasks")
+    with StatementCounter() as counter:
+        r = client.get(path, params=params)
+        assert r.status_code == 200
+    return counter.count, r.json()
+
+
+def test_expanded_payloads():
+    reset_demo_db()
+    _, tasks = statements_for("/tasks/", expand="assignee.unit")
+    assert tasks[0]["assignee"]["name"] == "Alice"
+    assert tasks[0]["assignee"]["unit"]["name"] == "101"
+
+    _, tasks = statements_for("/tasks/")
+    assert "assignee" not in tasks[0]
+
+    _, member = statements_for("/members/1", expand="unit,tasks")
+    assert member["unit"]["name"] == "101"
+    assert [t["title"] for t in member["tasks"]] == ["Paint hallway"]
+
+    _, units = statements_for("/units/", expand="members")
+    assert [m["name"] for m in units[0]["members"]] == ["Alice"]
+
+    assert client.get("/tasks/", params={"expand": "unit"}).status_code == 400
+
+
+def test_statement_count_does_not_grow_with_rows():
+    small = {
+        path: statements_for(path, expand=expand)[0]
+        for path, expand in [("/tasks/", "assignee.unit"), ("/members/", "unit,tasks"), ("/units/", "members")]
+    }
+
+    units = client.post("/units/bulk", json=[{"name": f"N{i}"} for i in range(20)]).json()["items"]
+    members = client.post("/members/bulk", json=[
+        {"name": f"M{i}", "email": f"m{i}@example.com", "unit_id": units[i]["id"]} for i in range(20)
+    ]).json()["items"]
+    client.post("/tasks/bulk", json=[{"title": f"T{i}", "assignee_id": members[i]["id"]} for i in range(20)])
+
+    for path, expand in [("/tasks/", "assignee.unit"), ("/members/", "unit,tasks"), ("/units/", "members")]:
+        count, rows = statements_for(path, expand=expand)
+        assert len(rows) > 20
+        assert count == small[path], path
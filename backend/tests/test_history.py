@@ -0,0 +1,135 @@
+import datetime
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert, select
+
+from app import aggregates, crud, history, models, tenancy
+from app.api import app, reset_demo_db
+from app.db import SessionLocal, engine
+
+reset_demo_db()
+
+client = TestClient(app)
+
+
+def test_row_history_has_field_level_changes():
+    reset_demo_db()
+    actor = {history.HEADER: "alice"}
+    task = client.post("/tasks/", json={"title": "Paint fence", "lane_id": 1}, headers=actor).json()
+    client.patch(f"/tasks/{task['id']}", json={"status": "done", "due_date": "2026-05-01"})
+    client.delete(f"/tasks/{task['id']}", headers=actor)
+
+    created, updated, deleted = client.get(f"/history/tasks/{task['id']}").json()
+    assert (created["op"], created["actor"], created["previous"]) == ("create", "alice", None)
+    assert created["fields"] == {
+        "title": "Paint fence", "status": "todo", "priority": "medium", "due_date": None,
+        "assignee_id": None, "lane_id": 1, "sort_index": 3072.0,
+    }
+    assert (updated["op"], updated["actor"]) == ("update", None)
+    assert updated["fields"] == {"status": "done", "due_date": "2026-05-01"}
+    assert updated["previous"] == {"status": "todo", "due_date": None}
+    assert (deleted["op"], deleted["fields"]) == ("delete", None)
+    assert deleted["previous"]["status"] == "done" and deleted["previous"]["title"] == "Paint fence"
+
+
+def test_history_by_time_range_is_paged():
+    reset_demo_db()
+    with SessionLocal() as db:
+        db.execute(insert(models.Change.__table__), [
+            {"entity": "members", "entity_id": 1, "op": "update", "fields": f'{{"name":"Alice {day}"}}',
+             "changed_at": datetime.datetime(2026, 3, day)}
+            for day in range(1, 6)
+        ])
+        db.commit()
+    r = client.get("/history/members", params={"since": "2026-03-02T00:00:00", "until": "2026-03-05", "limit": 2})
+    assert [c["fields"]["name"] for c in r.json()] == ["Alice 2", "Alice 3"]
+    r = client.get("/history/members", params={
+        "since": "2026-03-02T00:00:00", "until": "2026-03-05", "limit": 2, "cursor": r.headers["X-Next-Cursor"],
+    })
+    assert [c["fields"]["name"] for c in r.json()] == ["Alice 4"]
+    assert "X-Next-Cursor" not in r.headers
+    newest = client.get("/history/members", params={"sort": "-changed_at", "limit": 1}).json()
+    assert newest[0]["fields"]["name"] == "Alice 5"
+    assert client.get("/history/units").json() == []
+    assert client.get("/history/votes").status_code == 422
+
+    other = {tenancy.HEADER: str(client.post("/cooperatives/", json={"name": "Oak Row"}).json()["id"])}
+    assert client.get("/history/members", headers=other).json() == []
+
+
+def test_failed_write_leaves_no_history():
+    reset_demo_db()
+    r = client.put("/units/1", json={"name": "101A"}, headers={"If-Match": '"7"'})
+    assert r.status_code == 412
+    assert client.get("/history/units/1").json() == []
+
+
+def test_soft_delete_touches_only_the_row():
+    reset_demo_db()
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.split()[0])
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        with SessionLocal() as db:
+            db.info["tenant_id"] = models.DEFAULT_TENANT  # scoped like a request's session
+            assert crud.delete_member(db, 1).name == "Alice"
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    # The member, the search index, the outbox and the history; Alice's tasks
+    # are not looked up.
+    assert statements == ["UPDATE", "DELETE", "INSERT", "INSERT"]
+
+    assert client.get("/members/1").json() is None
+    assert [m["id"] for m in client.get("/members/").json()] == [2]
+    assert client.get("/search", params={"q": "alice", "type": "members"}).json()["members"] == []
+    assert client.get("/tasks/1").json()["assignee_id"] == 1
+    assert client.delete("/members/1").json() is None
+    # The email is free again, and ballots from the deleted member are refused.
+    assert client.post("/members/", json={"name": "Alice", "email": "alice@example.com"}).status_code == 200
+    proposal = client.post("/proposals/", json={"title": "New boiler"}).json()
+    assert client.post(f"/proposals/{proposal['id']}/votes", json={"member_id": 1, "choice": "yes"}).status_code == 400
+    with SessionLocal() as db:
+        deleted = db.scalars(
+            select(models.Member).where(models.Member.id == 1).execution_options(include_deleted=True)
+        ).one()
+        assert deleted.deleted_at is not None and deleted.version == 2
+
+
+def test_deleted_tasks_leave_the_counts():
+    reset_demo_db()
+    client.delete("/tasks/1")
+    client.request("DELETE", "/tasks/bulk", json={"ids": [2]})
+    assert client.get("/metrics/dashboard").json()["tasks"]["total"] == 0
+    with SessionLocal() as db:
+        aggregates.recompute(db)
+        db.commit()
+    assert client.get("/metrics/dashboard").json()["tasks"]["total"] == 0
+    assert [c["op"] for c in client.get("/history/tasks", params={"sort": "-changed_at"}).json()] == ["delete"] * 2
+
+
+def test_retention_drops_whole_months():
+    reset_demo_db()
+    with SessionLocal() as db:
+        db.execute(insert(models.Change.__table__), [
+            {"entity": "units", "entity_id": 1, "op": "update", "changed_at": datetime.datetime(2026, month, 15)}
+            for month in (1, 2, 3, 4)
+        ])
+        assert history.maintain(db, datetime.date(2026, 4, 20), retention_months=0) == 0
+        assert history.maintain(db, datetime.date(2026, 4, 20), retention_months=2) == 2
+        assert db.scalars(select(models.Change.changed_at)).all() == [
+            datetime.datetime(2026, 3, 15), datetime.datetime(2026, 4, 15),
+        ]
+
+
+def test_partition_statements():
+    statements = history.partition_statements(datetime.date(2025, 11, 3), datetime.date(2026, 1, 9))
+    months = [s.split()[5] for s in statements if "PARTITION OF changes FOR VALUES" in s]
+    assert months == [f"changes_y{y}m{m:02d}" for y, m in ((2025, 11), (2025, 12), (2026, 1), (2026, 2), (2026, 3))]
+    assert "ALTER TABLE changes ADD PRIMARY KEY (id, changed_at)" in statements
+    assert history.month_partitions(datetime.date(2026, 12, 31), 1) == [
+        "CREATE TABLE IF NOT EXISTS changes_y2026m12 PARTITION OF changes "
+        "FOR VALUES FROM ('2026-12-01') TO ('2027-01-01')"
+    ]
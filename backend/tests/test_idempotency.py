@@ -0,0 +1,72 @@
+import datetime
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from app import idempotency, models
+from app.api import app, reset_demo_db
+from app.db import SessionLocal
+
+reset_demo_db()
+
+client = TestClient(app)
+
+
+def task_count():
+    with SessionLocal() as db:
+        return db.scalar(select(func.count()).select_from(models.Task))
+
+
+def test_retry_replays_the_first_response():
+    reset_demo_db()
+    headers = {"Idempotency-Key": "create-1"}
+    first = client.post("/tasks/", json={"title": "Order paint"}, headers=headers)
+    retry = client.post("/tasks/", json={"title": "Order paint"}, headers=headers)
+    assert first.status_code == retry.status_code == 200
+    assert retry.content == first.content
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert task_count() == 3
+
+    # A new key is a new request.
+    client.post("/tasks/", json={"title": "Order paint"}, headers={"Idempotency-Key": "create-2"})
+    assert task_count() == 4
+
+
+def test_retried_patch_is_not_applied_twice():
+    reset_demo_db()
+    headers = {"Idempotency-Key": "patch-1", "If-Match": '"1"'}
+    first = client.patch("/tasks/1", json={"status": "done"}, headers=headers)
+    retry = client.patch("/tasks/1", json={"status": "done"}, headers=headers)
+    assert first.status_code == retry.status_code == 200
+    assert retry.headers["ETag"] == '"2"'  # not a 412 for the version the first attempt used up
+    assert client.get("/tasks/1").json()["version"] == 2
+
+
+def test_key_reused_for_another_request_is_rejected():
+    reset_demo_db()
+    client.post("/units/", json={"name": "201"}, headers={"Idempotency-Key": "unit-1"})
+    r = client.post("/units/", json={"name": "202"}, headers={"Idempotency-Key": "unit-1"})
+    assert r.status_code == 422
+    assert client.post("/units/", json={"name": "202"}, headers={"Idempotency-Key": ""}).status_code == 400
+
+
+def test_request_in_progress_gets_409():
+    reset_demo_db()
+    body = b'{"title":"Slow"}'
+    scope = {"method": "POST", "path": "/tasks/", "query_string": b""}
+    assert idempotency.claim("busy-1", idempotency.fingerprint(scope, body), ttl=60) is None
+    r = client.post("/tasks/", content=body, headers={"Idempotency-Key": "busy-1", "Content-Type": "application/json"})
+    assert r.status_code == 409 and r.headers["Retry-After"] == "1"
+    assert task_count() == 2
+
+
+def test_expired_keys_are_purged_and_reclaimed():
+    reset_demo_db()
+    client.post("/tasks/", json={"title": "Once"}, headers={"Idempotency-Key": "old-1"})
+    with SessionLocal() as db:
+        later = models.utcnow() + datetime.timedelta(seconds=120)
+        assert idempotency.purge(db, ttl=60, now=later) == 1
+        db.commit()
+    client.post("/tasks/", json={"title": "Once"}, headers={"Idempotency-Key": "old-1"})
+    assert task_count() == 4
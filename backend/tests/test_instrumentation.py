@@ -0,0 +1,78 @@
+import dataclasses
+import logging
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.api import create_app, reset_demo_db
+from app.cache import response_cache
+from app.config import settings
+from app.db import engine
+from app.instrumentation import RequestStats, _current, registry
+
+reset_demo_db()
+
+client = TestClient(create_app(dataclasses.replace(settings, instrumentation=True)))
+
+
+def test_server_timing_reports_sql_count():
+    response_cache.invalidate("tasks")
+    response = client.get("/tasks/1")
+    assert response.status_code == 200
+    timing = response.headers["server-timing"]
+    assert timing.startswith("app;dur=")
+    assert 'desc="1 queries"' in timing
+
+
+def test_metrics_are_labelled_by_route_template():
+    response_cache.invalidate("tasks")
+    client.get("/tasks/2")
+    client.get("/no-such-route")
+    body = client.get("/metrics").text
+    assert '# TYPE tc_http_request_duration_seconds histogram' in body
+    assert 'tc_http_requests_total{method="GET",route="/tasks/{task_id}",status="200"}' in body
+    assert 'route="unmatched",status="404"' in body
+    assert 'route="/tasks/2"' not in body
+    statements = next(line for line in body.splitlines()
+                      if line.startswith('tc_db_statements_total{method="GET",route="/tasks/{task_id}"}'))
+    assert int(statements.rsplit(" ", 1)[1]) >= 1
+
+
+def test_slow_queries_are_logged_with_params_and_route(caplog):
+    before = registry.slow_queries
+    token = _current.set(RequestStats({"route": SimpleNamespace(path="/tasks/")}, slow_query_ms=1))
+    try:
+        with caplog.at_level(logging.WARNING, logger="app.sql.slow"), engine.connect() as conn:
+            # Counting to 300k in a recursive CTE takes well over a millisecond.
+            conn.execute(text(
+                "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < :top) SELECT count(*) FROM n"
+            ), {"top": 300000}).scalar()
+    finally:
+        _current.reset(token)
+    assert registry.slow_queries == before + 1
+    [record] = caplog.records
+    message = record.getMessage()
+    assert message.startswith("slow query ")
+    assert "on /tasks/: WITH RECURSIVE" in message
+    assert "300000" in message
+
+
+def test_failed_statements_leave_no_start_time_behind():
+    token = _current.set(RequestStats({}, slow_query_ms=0))
+    try:
+        with engine.connect() as conn:
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM no_such_table"))
+            assert conn.info["query_started"] == []
+            conn.execute(text("SELECT 1"))
+            assert conn.info["query_started"] == []
+    finally:
+        _current.reset(token)
+
+
+def test_disabled_by_default():
+    plain = TestClient(create_app(dataclasses.replace(settings, instrumentation=False)))
+    assert "server-timing" not in plain.get("/units/").headers
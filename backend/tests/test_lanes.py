@@ -0,0 +1,115 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.api import app, reset_demo_db
+from app.db import engine
+from app.ordering import STEP
+
+reset_demo_db()
+
+client = TestClient(app)
+
+
+def lane_order(lane_id):
+    tasks = client.get("/tasks/", params={"lane_id": lane_id, "sort": "sort_index"}).json()
+    return [t["title"] for t in tasks]
+
+
+def make_lane(name, titles):
+    lane_id = client.post("/lanes/", json={"name": name}).json()["id"]
+    r = client.post("/tasks/bulk", json=[{"title": title, "lane_id": lane_id} for title in titles])
+    return lane_id, {t["title"]: t["id"] for t in r.json()["items"]}
+
+
+def test_lane_crud_and_default_lanes():
+    reset_demo_db()
+    assert [l["name"] for l in client.get("/lanes/").json()] == ["Backlog", "In Progress", "Done"]
+    lane = client.post("/lanes/", json={"name": "Review"}).json()
+    assert lane["sort_index"] > 3 * STEP
+    r = client.put(f"/lanes/{lane['id']}", json={"name": "Review", "sort_index": 1500.0})
+    assert [l["name"] for l in client.get("/lanes/").json()] == ["Backlog", "Review", "In Progress", "Done"]
+
+    task = client.post("/tasks/", json={"title": "Wax floor", "lane_id": lane["id"]}).json()
+    assert task["sort_index"] == STEP
+    assert client.delete(f"/lanes/{lane['id']}").json()["name"] == "Review"
+    assert client.get(f"/tasks/{task['id']}").json()["lane_id"] is None
+
+
+def test_reorder_within_and_across_lanes():
+    lane_id, ids = make_lane("Board A", ["a", "b", "c", "d"])
+    other_id, other = make_lane("Board B", ["x", "y"])
+
+    r = client.patch("/tasks/reorder", json={"task_id": ids["d"], "before_id": ids["a"], "after_id": ids["b"]})
+    assert r.status_code == 200
+    assert lane_order(lane_id) == ["a", "d", "b", "c"]
+
+    client.patch("/tasks/reorder", json={"task_id": ids["c"], "after_id": ids["a"]})
+    assert lane_order(lane_id) == ["c", "a", "d", "b"]
+
+    client.patch("/tasks/reorder", json={"task_id": ids["a"], "lane_id": other_id, "before_id": other["x"]})
+    assert lane_order(lane_id) == ["c", "d", "b"]
+    assert lane_order(other_id) == ["x", "a", "y"]
+
+    client.patch("/tasks/reorder", json={"task_id": ids["c"]})
+    assert lane_order(lane_id) == ["d", "b", "c"]
+
+
+def test_reorder_rejects_illegal_neighbours():
+    lane_id, ids = make_lane("Board C", ["a", "b", "c"])
+    other_id, other = make_lane("Board D", ["x"])
+    for move in (
+        {"task_id": ids["a"], "before_id": ids["a"]},
+        {"task_id": ids["a"], "before_id": ids["b"], "after_id": ids["b"]},
+        {"task_id": ids["c"], "before_id": ids["b"], "after_id": ids["a"]},
+        {"task_id": ids["a"], "before_id": other["x"]},
+        {"task_id": ids["a"], "lane_id": 99999},
+        {"task_id": 99999},
+    ):
+        r = client.patch("/tasks/reorder", json=move)
+        assert r.status_code == 400, move
+    assert lane_order(lane_id) == ["a", "b", "c"]
+
+
+def test_reorder_writes_one_row():
+    lane_id, ids = make_lane("Board E", [f"t{i}" for i in range(50)])
+    updates = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE"):
+            updates.append(parameters)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        client.patch("/tasks/reorder", json={"task_id": ids["t49"], "before_id": ids["t0"]})
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert len(updates) == 1 and not isinstance(updates[0], list)
+    assert lane_order(lane_id)[:3] == ["t0", "t49", "t1"]
+
+
+def test_dense_lane_is_rebalanced():
+    lane_id, ids = make_lane("Board F", ["a", "b", "c", "d"])
+    # Keep inserting between "a" and whatever was last moved after it; the
+    # gap halves every time until the lane is respaced.
+    mover, neighbour = ids["c"], ids["b"]
+    for _ in range(40):
+        client.patch("/tasks/reorder", json={"task_id": mover, "before_id": ids["a"], "after_id": neighbour})
+        mover, neighbour = neighbour, mover
+    tasks = client.get("/tasks/", params={"lane_id": lane_id, "sort": "sort_index"}).json()
+    gaps = [b["sort_index"] - a["sort_index"] for a, b in zip(tasks, tasks[1:])]
+    assert min(gaps) > 1e-3
+    assert tasks[0]["title"] == "a" and tasks[-1]["title"] == "d"
+
+
+def test_batch_reorder():
+    lane_id, ids = make_lane("Board G", ["a", "b", "c"])
+    r = client.patch("/tasks/reorder/batch", json=[
+        {"task_id": ids["c"], "after_id": ids["a"]},
+        {"task_id": ids["a"], "before_id": ids["a"]},
+        {"task_id": ids["b"], "before_id": ids["c"]},
+        {"before_id": ids["c"]},
+    ])
+    body = r.json()
+    assert [t["id"] for t in body["items"]] == [ids["c"], ids["b"]]
+    assert [e["index"] for e in body["errors"]] == [1, 3]
+    assert lane_order(lane_id) == ["c", "b", "a"]
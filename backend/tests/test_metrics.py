@@ -0,0 +1,82 @@
+import datetime
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app import aggregates, models
+from app.api import app, reset_demo_db
+from app.cache import response_cache
+from app.db import SessionLocal
+
+reset_demo_db()
+
+client = TestClient(app)
+
+TODAY = models.utcnow().date()
+YESTERDAY = (TODAY - datetime.timedelta(days=1)).isoformat()
+NEXT_WEEK = (TODAY + datetime.timedelta(days=7)).isoformat()
+
+
+def counters():
+    with SessionLocal() as db:
+        counts = {
+            (row.assignee_id, row.status, row.priority): row.count
+            for row in db.execute(select(models.TaskCount)).scalars() if row.count
+        }
+        due = {
+            (row.assignee_id, row.due_date): row.count
+            for row in db.execute(select(models.TaskDueCount)).scalars() if row.count
+        }
+    return counts, due
+
+
+def test_counters_follow_every_write_path():
+    reset_demo_db()
+    one = client.post("/tasks/", json={"title": "Late", "assignee_id": 1, "due_date": YESTERDAY}).json()
+    created = client.post("/tasks/bulk", json=[
+        {"title": "Soon", "assignee_id": 2, "due_date": NEXT_WEEK, "priority": "high"},
+        {"title": "Overdue", "assignee_id": 2, "due_date": YESTERDAY},
+        {"title": "Loose"},
+    ]).json()["items"]
+    client.patch("/tasks/bulk", json=[
+        {"id": created[0]["id"], "status": "done"},
+        {"id": created[2]["id"], "assignee_id": 1, "due_date": YESTERDAY},
+    ])
+    client.delete(f"/tasks/{one['id']}")
+    client.request("DELETE", "/tasks/bulk", json={"ids": [created[1]["id"]]})
+
+    incremental = counters()
+    with SessionLocal() as db:
+        aggregates.recompute(db)
+        db.commit()
+    assert incremental == counters()
+
+
+def test_dashboard_and_scorecards():
+    reset_demo_db()
+    client.post("/tasks/bulk", json=[
+        {"title": "Late", "assignee_id": 1, "due_date": YESTERDAY, "priority": "high"},
+        {"title": "Later", "assignee_id": 1, "due_date": NEXT_WEEK},
+        {"title": "Finished late", "assignee_id": 2, "due_date": YESTERDAY, "status": "done"},
+        {"title": "Loose", "due_date": YESTERDAY},
+    ])
+    response_cache.invalidate("tasks")
+
+    tasks = client.get("/metrics/dashboard").json()["tasks"]
+    assert tasks["total"] == 6 and tasks["open"] == 5 and tasks["overdue"] == 2
+    assert tasks["by_status"] == {"todo": 5, "in_progress": 0, "done": 1}
+    assert tasks["by_priority"] == {"low": 0, "medium": 5, "high": 1}
+
+    cards = client.get("/metrics/scorecards").json()
+    alice, bob, unassigned = cards
+    assert (alice["name"], alice["total"], alice["open"], alice["overdue"]) == ("Alice", 3, 3, 1)
+    assert (bob["name"], bob["total"], bob["open"], bob["overdue"]) == ("Bob", 2, 1, 0)
+    assert unassigned["member_id"] is None and unassigned["overdue"] == 1
+
+    units = client.get("/metrics/scorecards", params={"group": "unit"}).json()
+    assert [(u["name"], u["total"]) for u in units] == [("101", 3), ("102", 2), (None, 0)]
+
+    # Cached until the next task write.
+    assert client.get("/metrics/dashboard").json()["tasks"]["total"] == 6
+    client.post("/tasks/", json={"title": "One more"})
+    assert client.get("/metrics/dashboard").json()["tasks"]["total"] == 7
@@ -0,0 +1,131 @@
+from celery import Celery
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, select
+
+from app import crud, models, outbox
+from app.api import app, reset_demo_db
+from app.db import SessionLocal
+
+reset_demo_db()
+
+client = TestClient(app)
+
+
+def pending() -> list[tuple]:
+    with SessionLocal() as db:
+        event = models.OutboxEvent
+        return db.execute(select(event.entity, event.entity_id, event.op).order_by(event.id)).all()
+
+
+def clear() -> None:
+    reset_demo_db()
+    with SessionLocal() as db:
+        db.execute(delete(models.OutboxEvent))
+        db.commit()
+
+
+def test_writes_queue_events_in_their_transaction():
+    clear()
+    task = client.post("/tasks/", json={"title": "Clean gutters"}).json()
+    client.patch("/tasks/bulk", json=[{"id": 1, "status": "done"}, {"id": 2, "status": "done"}])
+    client.delete("/lanes/1")
+    assert pending() == [
+        ("tasks", task["id"], "create"),
+        ("tasks", 1, "update"),
+        ("tasks", 2, "update"),
+        ("lanes", 1, "delete"),
+        ("tasks", 1, "update"),
+        ("tasks", 2, "update"),
+    ]
+
+    # A write that fails or rolls back queues nothing.
+    clear()
+    assert client.put("/units/1", json={"name": "X"}, headers={"If-Match": '"7"'}).status_code == 412
+    r = client.post("/units/bulk", json=[{"name": "101"}])
+    assert r.json()["items"] == []
+    assert pending() == []
+
+
+def test_relay_coalesces_per_entity():
+    clear()
+    created = client.post("/tasks/", json={"title": "Order salt"}).json()["id"]
+    client.patch(f"/tasks/{created}", json={"title": "Order road salt"})
+    client.patch("/tasks/1", json={"priority": "high"})
+    client.patch("/tasks/1", json={"priority": "low"})
+    doomed = client.post("/tasks/", json={"title": "Typo"}).json()["id"]
+    client.delete(f"/tasks/{doomed}")
+    client.put("/members/1", json={"name": "Alice B", "email": "alice@example.com"})
+
+    dispatcher = outbox.MemoryDispatcher()
+    relay = outbox.Relay(dispatcher, batch_size=100)
+    assert relay.drain(SessionLocal) == 7
+    assert dispatcher.batches == [[
+        {"entity": "tasks", "tenant_id": 1, "created": [created], "updated": [1], "deleted": [doomed]},
+        {"entity": "members", "tenant_id": 1, "created": [], "updated": [1], "deleted": []},
+    ]]
+    stats = relay.metrics.snapshot()
+    assert (stats["batches"], stats["events"], stats["messages"], stats["coalesced"]) == (1, 7, 2, 3)
+    assert pending() == []
+
+
+def test_relay_batches_and_keeps_events_when_dispatch_fails():
+    clear()
+    client.post("/units/bulk", json=[{"name": f"U{i}"} for i in range(5)])
+
+    class Down:
+        def send(self, messages):
+            raise ConnectionError("broker unavailable")
+
+    failing = outbox.Relay(Down(), batch_size=2)
+    try:
+        failing.drain(SessionLocal)
+    except ConnectionError:
+        pass
+    assert failing.metrics.failures == 1
+    assert len(pending()) == 5
+
+    dispatcher = outbox.MemoryDispatcher()
+    relay = outbox.Relay(dispatcher, batch_size=2)
+    assert relay.drain(SessionLocal) == 5
+    assert [len(batch[0]["created"]) for batch in dispatcher.batches] == [2, 2, 1]
+    assert client.get("/metrics/outbox").json()["pending"] == 0
+
+
+def test_handlers_run_for_their_entity():
+    clear()
+    seen = []
+    outbox.handler("members")(seen.append)
+    try:
+        client.post("/members/", json={"name": "Dana", "email": "dana@example.com"})
+        client.post("/units/", json={"name": "103"})
+        outbox.Relay(outbox.MemoryDispatcher()).drain(SessionLocal)
+    finally:
+        outbox.HANDLERS.pop("members")
+    assert [message["created"] for message in seen] == [[3]]
+
+
+def test_celery_dispatch_is_one_message_per_batch():
+    clear()
+    client.post("/tasks/bulk", json=[{"title": f"Task {i}"} for i in range(3)])
+    celery = Celery("outbox-test", broker="memory://")
+    outbox.Relay(outbox.CeleryDispatcher(celery)).drain(SessionLocal)
+    with celery.connection_for_read() as connection:
+        queue = connection.SimpleQueue("celery")
+        message = queue.get(timeout=1)
+        message.ack()
+        assert queue.qsize() == 0
+    assert message.headers["task"] == outbox.TASK
+    (batch,), _, _ = message.payload
+    assert [(m["entity"], m["created"]) for m in batch] == [("tasks", [3, 4, 5])]
+
+
+def test_background_writes_are_queued_for_the_rows_cooperative():
+    clear()
+    other = {"X-Cooperative-Id": str(client.post("/cooperatives/", json={"name": "Elm Yard"}).json()["id"])}
+    lane = client.post("/lanes/", json={"name": "Backlog"}, headers=other).json()["id"]
+    task = client.post("/tasks/", json={"title": "Salt the steps", "lane_id": lane}, headers=other).json()["id"]
+    crud.rebalance_lane_job(lane)  # no cooperative in the session, as in Celery
+    with SessionLocal() as db:
+        event = models.OutboxEvent
+        last = db.execute(select(event.tenant_id, event.entity_id, event.op).order_by(event.id.desc())).first()
+    assert tuple(last) == (int(other["X-Cooperative-Id"]), task, "update")
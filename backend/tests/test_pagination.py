@@ -0,0 +1,63 @@
+from fastapi.testclient import TestClient
+
+from app.api import app, reset_demo_db
+
+reset_demo_db()
+
+client = TestClient(app)
+
+
+def walk(path, **params):
+    seen = []
+    cursor = None
+    while True:
+        query = dict(params, limit=3)
+        if cursor:
+            query["cursor"] = cursor
+        r = client.get(path, params=query)
+        assert r.status_code == 200
+        seen.extend(r.json())
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            return seen
+
+
+def test_task_cursor_pages_cover_all_rows_in_sort_order():
+    r = client.post('/members/', json={'name': 'Pat', 'email': 'pat@example.com'})
+    member_id = r.json()['id']
+    for i in range(8):
+        due = f'2026-01-{(i % 4) + 1:02d}' if i % 3 else None
+        client.post('/tasks/', json={
+            'title': f'Chore {i}', 'due_date': due, 'assignee_id': member_id,
+            'status': 'done' if i % 2 else 'todo',
+        })
+
+    all_tasks = client.get('/tasks/', params={'limit': 1000}).json()
+    paged = walk('/tasks/')
+    assert [t['id'] for t in paged] == [t['id'] for t in all_tasks]
+
+    paged = walk('/tasks/', sort='-due_date', assignee_id=member_id)
+    assert len(paged) == 8
+    dated = [t['due_date'] for t in paged if t['due_date']]
+    assert dated == sorted(dated, reverse=True)
+    # undated tasks come last
+    assert all(t['due_date'] is None for t in paged[len(dated):])
+
+    paged = walk('/tasks/', status='done', due_from='2026-01-02', due_to='2026-01-03', sort='due_date')
+    assert paged and all(t['status'] == 'done' for t in paged)
+    assert all('2026-01-02' <= t['due_date'] <= '2026-01-03' for t in paged)
+
+
+def test_members_and_units_cursor_by_name():
+    names = [u['name'] for u in walk('/units/', sort='name')]
+    assert names == sorted(names)
+    members = walk('/members/', sort='-name')
+    assert [m['name'] for m in members] == sorted((m['name'] for m in members), reverse=True)
+
+
+def test_invalid_cursor_and_sort_are_rejected():
+    assert client.get('/tasks/', params={'cursor': 'not-a-cursor'}).status_code == 400
+    assert client.get('/tasks/', params={'sort': 'assignee'}).status_code == 400
+    r = client.get('/tasks/', params={'limit': 1})
+    cursor = r.headers['X-Next-Cursor']
+    assert client.get('/tasks/', params={'cursor': cursor, 'sort': 'title'}).status_code == 400
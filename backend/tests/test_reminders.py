@@ -0,0 +1,143 @@
+import asyncio
+import dataclasses
+import datetime
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.api import app, reset_demo_db
+from app.config import settings
+from app.db import SessionLocal, engine
+from app.reminders import due_pages, sweep
+
+reset_demo_db()
+
+client = TestClient(app)
+
+TODAY = datetime.date(2026, 6, 1)
+
+
+class SMTPStandIn:
+    """Just enough of an SMTP server to accept (or refuse) messages."""
+
+    def __init__(self, refuse=()):
+        self.refuse = set(refuse)
+        self.messages = []
+        self.sessions = 0
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def handle(self, reader, writer):
+        self.sessions += 1
+        writer.write(b"220 stand-in ESMTP\r\n")
+        recipient = None
+        while line := await reader.readline():
+            verb, _, arg = line.decode().strip().partition(" ")
+            verb = verb.upper()
+            if verb == "RCPT":
+                recipient = arg.split(":", 1)[1].strip("<> ")
+                writer.write(b"550 no such user\r\n" if recipient in self.refuse else b"250 OK\r\n")
+            elif verb == "DATA":
+                writer.write(b"354 go ahead\r\n")
+                await writer.drain()
+                body = []
+                while (chunk := await reader.readline()) != b".\r\n":
+                    body.append(chunk)
+                self.messages.append((recipient, b"".join(body).decode()))
+                writer.write(b"250 queued\r\n")
+            elif verb == "QUIT":
+                writer.write(b"221 bye\r\n")
+                await writer.drain()
+                break
+            else:
+                writer.write(b"250 OK\r\n")
+            await writer.drain()
+        writer.close()
+
+
+def run_sweep(relay, **overrides):
+    async def scenario():
+        port = await relay.start()
+        config = dataclasses.replace(
+            settings, smtp_host="127.0.0.1", smtp_port=port, smtp_connections=2, **overrides
+        )
+        try:
+            return await sweep(config=config, today=TODAY)
+        finally:
+            relay.server.close()
+
+    return asyncio.run(scenario())
+
+
+def test_sweep_batches_per_member_and_is_idempotent():
+    reset_demo_db()
+    tomorrow, later = "2026-06-02", "2026-06-20"
+    r = client.post("/tasks/bulk", json=[
+        {"title": "Sweep", "assignee_id": 1, "due_date": tomorrow},
+        {"title": "Mop", "assignee_id": 1, "due_date": "2026-06-01"},
+        {"title": "Polish", "assignee_id": 1, "due_date": tomorrow, "status": "in_progress"},
+        {"title": "Dust", "assignee_id": 2, "due_date": tomorrow},
+        {"title": "Done already", "assignee_id": 1, "due_date": tomorrow, "status": "done"},
+        {"title": "Not yet", "assignee_id": 1, "due_date": later},
+        {"title": "Nobody", "due_date": tomorrow},
+    ])
+    ids = [t["id"] for t in r.json()["items"]]
+
+    relay = SMTPStandIn(refuse={"bob@example.com"})
+    result = run_sweep(relay)
+    assert (result.sent, result.failed, result.tasks) == (1, 1, 3)
+    assert relay.sessions <= 2
+    [(recipient, body)] = relay.messages
+    assert recipient == "alice@example.com"
+    assert "3 tasks are due soon" in body
+    assert all(title in body for title in ("Sweep", "Mop", "Polish"))
+
+    # Alice is not mailed twice; Bob's refused reminder is retried.
+    relay = SMTPStandIn()
+    result = run_sweep(relay)
+    assert [recipient for recipient, _ in relay.messages] == ["bob@example.com"]
+    assert run_sweep(SMTPStandIn()).sent == 0
+
+    # Moving a due date re-arms the reminder.
+    client.patch("/tasks/bulk", json=[{"id": ids[0], "due_date": "2026-06-01"}])
+    relay = SMTPStandIn()
+    run_sweep(relay)
+    [(recipient, body)] = relay.messages
+    assert recipient == "alice@example.com" and "Sweep" in body and "Mop" not in body
+
+
+def test_sweep_pages_through_large_windows():
+    reset_demo_db()
+    client.post("/tasks/bulk", json=[
+        {"title": f"Chore {i}", "assignee_id": 1 + i % 2, "due_date": "2026-06-02"} for i in range(25)
+    ])
+    relay = SMTPStandIn()
+    result = run_sweep(relay, reminder_batch_size=10)
+    assert result.tasks == 25 and result.failed == 0
+    assert result.sent == len(relay.messages) == 2  # one per member, across all three pages
+    bodies = dict(relay.messages)
+    assert "13 tasks are due soon" in bodies["alice@example.com"]
+    assert "12 tasks are due soon" in bodies["bob@example.com"]
+    assert relay.sessions <= 2
+
+
+def test_sweep_pages_use_the_index_across_cooperatives():
+    if engine.dialect.name != "sqlite":
+        return
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        with SessionLocal() as db:
+            list(due_pages(db, TODAY, TODAY + datetime.timedelta(days=7), 10))
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    statement, parameters = statements[0]
+    with engine.connect() as conn:
+        plan = " ".join(row[3] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters))
+    assert "USING INDEX ix_tasks_status_due_date_id" in plan
@@ -0,0 +1,91 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app import search
+from app.api import app, reset_demo_db
+from app.db import SessionLocal
+
+reset_demo_db()
+
+client = TestClient(app)
+
+
+def hits(q, **params):
+    body = client.get("/search", params={"q": q, **params}).json()
+    return {table: [hit["label"] for hit in found] for table, found in body.items()}
+
+
+def fts_rows():
+    with SessionLocal() as db:
+        return {
+            table: sorted(db.execute(text(f"SELECT rowid, * FROM {table}_fts")).all())
+            for table in search.SEARCHABLE
+        }
+
+
+def test_ranked_full_text_search():
+    reset_demo_db()
+    client.post("/tasks/bulk", json=[
+        {"title": "Kitchen sink drips"},
+        {"title": "Sink sink sink"},
+        {"title": "Sinkhole in the parking lot"},
+    ])
+    found = hits("sink", type="tasks")["tasks"]
+    assert found[0] == "Sink sink sink"
+    assert set(found) == {"Sink sink sink", "Fix sink", "Kitchen sink drips"}
+    assert hits("kitchen SINK")["tasks"] == ["Kitchen sink drips"]
+    assert hits("sink", mode="prefix")["tasks"][-1] == "Sinkhole in the parking lot"
+    assert hits("sink", type="members") == {"members": []}
+
+
+def test_prefix_mode_for_member_picker():
+    reset_demo_db()
+    client.post("/members/", json={"name": "Hélène Tremblay", "email": "helene@example.com"})
+    client.post("/members/", json={"name": "Alain Smith", "email": "alain@example.com"})
+    assert sorted(hits("al", type="members", mode="prefix")["members"]) == ["Alain Smith", "Alice"]
+    assert hits("al sm", type="members", mode="prefix")["members"] == ["Alain Smith"]
+    assert hits("hele", type="members", mode="prefix")["members"] == ["Hélène Tremblay"]
+    assert hits("tremblay", type="members")["members"] == ["Hélène Tremblay"]
+
+
+def test_query_syntax_is_not_interpreted():
+    reset_demo_db()
+    for q in ('sink OR paint', '"sink', 'sink*', 'title:sink', 'NEAR(sink paint)'):
+        assert client.get("/search", params={"q": q}).status_code == 200, q
+    assert hits("sink OR paint")["tasks"] == []
+    assert client.get("/search", params={"q": "?!"}).status_code == 400
+
+
+def test_index_follows_every_write_path():
+    reset_demo_db()
+    task = client.post("/tasks/", json={"title": "Replace boiler"}).json()
+    created = client.post("/tasks/bulk", json=[{"title": "Clean gutters"}, {"title": "Mow lawn"}]).json()["items"]
+    assert hits("boiler")["tasks"] == ["Replace boiler"]
+
+    client.patch("/tasks/bulk", json=[{"id": created[0]["id"], "title": "Clean chimney"}])
+    assert hits("gutters")["tasks"] == [] and hits("chimney")["tasks"] == ["Clean chimney"]
+    client.delete(f"/tasks/{task['id']}")
+    client.request("DELETE", "/tasks/bulk", json={"ids": [created[1]["id"]]})
+    assert hits("boiler")["tasks"] == [] and hits("lawn")["tasks"] == []
+
+    client.put("/members/1", json={"name": "Alicia", "email": "alicia@example.com"})
+    assert hits("alicia")["members"] == ["Alicia"] and hits("alice")["members"] == []
+    client.patch("/members/bulk", json=[{"id": 2, "name": "Robert"}])
+    client.delete("/members/1")
+    assert hits("alicia")["members"] == [] and hits("robert")["members"] == ["Robert"]
+
+    incremental = fts_rows()
+    with SessionLocal() as db:
+        search.rebuild(db)
+        db.commit()
+    assert incremental == fts_rows()
+
+
+def test_broad_query_returns_newest_matches_unranked(monkeypatch):
+    reset_demo_db()
+    monkeypatch.setattr(search, "RANK_LIMIT", 2)
+    client.post("/tasks/bulk", json=[{"title": "Sink one"}, {"title": "Sink two"}])
+    body = client.get("/search", params={"q": "sink", "type": "tasks", "limit": 2}).json()
+    assert [hit["label"] for hit in body["tasks"]] == ["Sink two", "Sink one"]
+    assert {hit["score"] for hit in body["tasks"]} == {None}
+    assert client.get("/search", params={"q": "two", "type": "tasks"}).json()["tasks"][0]["score"] > 0
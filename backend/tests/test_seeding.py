@@ -0,0 +1,116 @@
+from dataclasses import replace
+
+from sqlalchemy import event, func, select, text
+from sqlalchemy.orm import Session
+
+from app import aggregates, models, seeding, tenancy
+from app.api import reset_demo_db
+from app.db import Base, SessionLocal, create_db_engine, engine
+
+SPEC = replace(seeding.PRESETS["tiny"], cooperatives=2)
+
+
+def generated(tmp_path, name: str, spec: seeding.Dataset):
+    db_engine = create_db_engine(f"sqlite:///{tmp_path}/{name}.db")
+    Base.metadata.create_all(bind=db_engine)
+    with Session(bind=db_engine) as db:
+        seeding.generate(db, spec)
+    return db_engine
+
+
+def tasks(db_engine) -> list:
+    with Session(bind=db_engine) as db:
+        return db.execute(select(*tenancy.columns(models.Task)).order_by(models.Task.id)).all()
+
+
+def test_generate_is_deterministic_for_a_seed(tmp_path):
+    first = tasks(generated(tmp_path, "a", SPEC))
+    assert first == tasks(generated(tmp_path, "b", SPEC))
+    assert first != tasks(generated(tmp_path, "c", replace(SPEC, seed=1)))
+
+
+def test_generate_fills_every_cooperative_consistently(tmp_path):
+    db_engine = generated(tmp_path, "g", SPEC)
+    with Session(bind=db_engine) as db:
+        for tenant in (1, 2):
+            counts = {
+                model.__tablename__: db.scalar(select(func.count()).select_from(model).where(model.tenant_id == tenant))
+                for model in (models.Unit, models.Member, models.Lane, models.Task, models.Proposal)
+            }
+            assert counts == {"units": 5, "members": 20, "lanes": 3, "tasks": 200, "proposals": 5}
+        # Every reference stays inside the row's own cooperative.
+        assignee = models.Member.__table__.alias()
+        lane = models.Lane.__table__.alias()
+        crossed = db.scalar(
+            select(func.count()).select_from(models.Task)
+            .join(lane, lane.c.id == models.Task.lane_id)
+            .outerjoin(assignee, assignee.c.id == models.Task.assignee_id)
+            .where((lane.c.tenant_id != models.Task.tenant_id) | (assignee.c.tenant_id != models.Task.tenant_id))
+        )
+        assert crossed == 0
+        assert db.scalar(text("SELECT count(*) FROM tasks_fts")) == 400
+        tenancy.use(db, "2")
+        card = aggregates.dashboard(db, SPEC.today)["tasks"]
+        assert card["total"] == 200
+        aggregates.recompute(db)
+        assert aggregates.dashboard(db, SPEC.today)["tasks"] == card
+
+
+def test_distribution_parameters(tmp_path):
+    spec = replace(SPEC, cooperatives=1, status_weights=(0, 0, 1), assigned=0, due=0)
+    with Session(bind=generated(tmp_path, "d", spec)) as db:
+        rows = db.execute(select(models.Task.status, models.Task.assignee_id, models.Task.due_date)).all()
+    assert set(rows) == {(models.TaskStatus.done, None, None)}
+
+
+def test_truncate_restarts_ids(tmp_path):
+    db_engine = generated(tmp_path, "t", SPEC)
+    with Session(bind=db_engine) as db:
+        seeding.truncate(db)
+        db.commit()
+        assert db.scalar(select(func.count()).select_from(models.Task)) == 0
+        assert db.scalar(text("SELECT count(*) FROM tasks_fts")) == 0
+        db.add(models.Cooperative(name="Fresh"))
+        db.commit()
+        assert db.scalar(select(models.Cooperative.id)) == 1
+
+
+def test_demo_reset_restores_without_ddl():
+    reset_demo_db()
+    with SessionLocal() as db:
+        db.add(models.Unit(name="999"))
+        db.execute(text("DELETE FROM tasks"))
+        db.commit()
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        reset_demo_db()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert statements == []
+    with SessionLocal() as db:
+        assert db.scalars(select(models.Unit.name).order_by(models.Unit.id)).all() == ["101", "102"]
+        assert db.scalars(select(models.Task.title).order_by(models.Task.id)).all() == ["Paint hallway", "Fix sink"]
+        assert db.scalar(text("SELECT count(*) FROM tasks_fts")) == 2
+
+
+def test_demo_reset_survives_dropped_tables():
+    reset_demo_db()
+    Base.metadata.drop_all(bind=engine)
+    reset_demo_db()
+    with SessionLocal() as db:
+        assert db.scalars(select(models.Unit.name).order_by(models.Unit.id)).all() == ["101", "102"]
+
+
+def test_snapshot_file_round_trip(tmp_path):
+    db_engine = generated(tmp_path, "s", SPEC)
+    seeding.snapshot(db_engine, str(tmp_path / "snap.db")).close()
+    with Session(bind=db_engine) as db:
+        seeding.truncate(db)
+        db.commit()
+    seeding.restore(db_engine, str(tmp_path / "snap.db"))
+    assert len(tasks(db_engine)) == 400
@@ -0,0 +1,80 @@
+import dataclasses
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import fast_rows
+from app.api import app, reset_demo_db
+from app.cache import response_cache
+
+reset_demo_db()
+
+client = TestClient(app)
+
+URLS = [
+    "/units/",
+    "/members/?sort=-name",
+    "/tasks/",
+    "/tasks/?sort=due_date&limit=3",
+    "/tasks/?sort=-sort_index&status=todo",
+    "/tasks/?expand=assignee.unit",
+]
+
+
+@pytest.fixture
+def fast(monkeypatch):
+    monkeypatch.setattr(fast_rows, "settings", dataclasses.replace(fast_rows.settings, fast_serialization=True))
+
+
+def fetch(url):
+    response_cache.invalidate("units", "members", "tasks")
+    r = client.get(url)
+    return r.content, r.headers.get("X-Next-Cursor")
+
+
+def seed():
+    reset_demo_db()
+    client.post("/members/", json={"name": "Zoë Côté ☃", "email": "zoe@example.com", "unit_id": 2})
+    client.post("/tasks/bulk", json=[
+        {"title": "Tiny key", "sort_index": 1e-7, "lane_id": 1, "due_date": "2030-01-31", "priority": "high"},
+        {"title": "Fraction", "sort_index": 0.1, "lane_id": 2, "assignee_id": 3},
+        {"title": "Big key", "sort_index": 12345678901.5, "status": "done"},
+        {"title": "Quote \"and\" backslash \\", "due_date": "2030-01-01"},
+    ])
+
+
+def test_fast_path_produces_identical_bytes(monkeypatch):
+    seed()
+    expected = [fetch(url) for url in URLS]
+    monkeypatch.setattr(fast_rows, "settings", dataclasses.replace(fast_rows.settings, fast_serialization=True))
+    assert [fetch(url) for url in URLS] == expected
+    monkeypatch.setattr(fast_rows, "orjson", None)
+    assert [fetch(url) for url in URLS] == expected
+
+
+def walk(url):
+    pages, next_url = [], url
+    while next_url:
+        body, cursor = fetch(next_url)
+        pages.append(body)
+        next_url = cursor and f"{url}&cursor={cursor}"
+    return pages
+
+
+def test_cursor_pages_match(monkeypatch):
+    seed()
+    expected = walk("/tasks/?sort=-title&limit=2")
+    monkeypatch.setattr(fast_rows, "settings", dataclasses.replace(fast_rows.settings, fast_serialization=True))
+    assert walk("/tasks/?sort=-title&limit=2") == expected
+    assert b"".join(expected).count(b'"id"') == 6
+
+
+def test_fast_path_reads_plain_rows(fast):
+    from app import crud
+    from app.db import SessionLocal
+
+    seed()
+    with SessionLocal() as db:
+        rows = crud.get_tasks(db, limit=2, plain=fast_rows.use_for(frozenset()))
+        assert not fast_rows.use_for(frozenset({"assignee"}))
+    assert rows[0]._fields == fast_rows.FIELDS["tasks"]
@@ -0,0 +1,49 @@
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Generous bounds: these catch a regression to import-time DB work or a heavy
+# eager import, not normal machine-to-machine variance.
+IMPORT_BUDGET_S = 5.0
+FIRST_REQUEST_BUDGET_S = 8.0
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from app.api import app
+imported = time.perf_counter() - start
+status = None
+if sys.argv[1] == "request":
+    from fastapi.testclient import TestClient
+    with TestClient(app) as client:
+        status = client.get("/units/").status_code
+print(json.dumps({"import_s": imported, "first_request_s": time.perf_counter() - start, "status": status}))
+"""
+
+
+def run(args, database_url):
+    env = dict(os.environ, DATABASE_URL=database_url)
+    result = subprocess.run(
+        [sys.executable, *args], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def test_import_does_not_touch_the_database(tmp_path):
+    # SQLite cannot create a file in a missing directory, so any connection
+    # attempt during import would fail.
+    out = json.loads(run(["-c", PROBE, "import"], f"sqlite:///{tmp_path}/missing/app.db"))
+    assert out["import_s"] < IMPORT_BUDGET_S
+
+
+def test_cli_init_and_time_to_first_request(tmp_path):
+    url = f"sqlite:///{tmp_path}/app.db"
+    run(["-m", "app.cli", "init-db", "--seed"], url)
+    out = json.loads(run(["-c", PROBE, "request"], url))
+    assert out["status"] == 200
+    assert out["import_s"] < IMPORT_BUDGET_S
+    assert out["first_request_s"] < FIRST_REQUEST_BUDGET_S
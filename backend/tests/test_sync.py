@@ -0,0 +1,117 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+
+from app import crud, models, sync, tenancy
+from app.api import app, reset_demo_db
+from app.db import SessionLocal
+
+reset_demo_db()
+
+client = TestClient(app)
+
+
+def pull(token: str | None = None, **params) -> dict:
+    r = client.get("/sync", params={"token": token, **params} if token else params)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def rows(body: dict, entity: str) -> dict:
+    columns = body[entity]["columns"]
+    return {row[columns.index("id")]: dict(zip(columns, row)) for row in body[entity]["rows"]}
+
+
+def test_full_sync_then_deltas():
+    reset_demo_db()
+    full = pull()
+    assert [task["title"] for task in rows(full, "tasks").values()] == ["Paint hallway", "Fix sink"]
+    assert [lane["name"] for lane in rows(full, "lanes").values()] == ["Backlog", "In Progress", "Done"]
+    assert pull(full["token"])["tasks"] == {"columns": full["tasks"]["columns"], "rows": [], "deleted": []}
+
+    created = client.post("/tasks/", json={"title": "Clean gutters", "lane_id": 1}).json()
+    for status in ("in_progress", "done"):
+        client.patch("/tasks/1", json={"status": status})
+    client.delete("/tasks/2")
+    client.delete("/lanes/3")
+    client.put("/units/1", json={"name": "101A"})
+
+    changes = pull(full["token"])
+    assert rows(changes, "tasks") == {
+        1: {**rows(full, "tasks")[1], "status": "done", "version": 3},
+        created["id"]: {**created},
+    }
+    assert changes["tasks"]["deleted"] == [2]
+    assert changes["lanes"] == {"columns": full["lanes"]["columns"], "rows": [], "deleted": [3]}
+    assert list(rows(changes, "units")) == [1] and changes["members"]["rows"] == []
+    assert int(changes["token"]) > int(full["token"])
+    assert pull(changes["token"], entities="tasks") == {
+        "token": changes["token"], "tasks": {"columns": full["tasks"]["columns"], "rows": [], "deleted": []},
+    }
+
+
+def test_deltas_stay_in_the_cooperative():
+    reset_demo_db()
+    token = pull()["token"]
+    other = {tenancy.HEADER: str(client.post("/cooperatives/", json={"name": "Elm Yard"}).json()["id"])}
+    client.post("/tasks/", json={"title": "Salt the steps"}, headers=other)
+    assert pull(token)["tasks"]["rows"] == []
+    full = client.get("/sync", headers=other).json()
+    assert [task["title"] for task in rows(full, "tasks").values()] == ["Salt the steps"]
+
+
+def test_background_writes_reach_the_rows_cooperative():
+    reset_demo_db()
+    other = {tenancy.HEADER: str(client.post("/cooperatives/", json={"name": "Elm Yard"}).json()["id"])}
+    lane = client.post("/lanes/", json={"name": "Backlog"}, headers=other).json()["id"]
+    task = client.post("/tasks/", json={"title": "Salt the steps", "lane_id": lane}, headers=other).json()["id"]
+    mine, theirs = pull()["token"], client.get("/sync", headers=other).json()["token"]
+
+    crud.rebalance_lane_job(lane)  # a session without a cooperative, as in Celery
+
+    changes = client.get("/sync", params={"token": theirs}, headers=other).json()
+    assert list(rows(changes, "tasks")) == [task]
+    assert pull(mine)["tasks"] == {"columns": changes["tasks"]["columns"], "rows": [], "deleted": []}
+    entries = client.get(f"/history/tasks/{task}", headers=other).json()
+    assert [entry["op"] for entry in entries] == ["create", "update"]
+    assert "sort_index" in entries[-1]["fields"]
+
+
+def test_stale_and_bad_tokens():
+    reset_demo_db()
+    client.post("/units/", json={"name": "201"})
+    token = pull()["token"]
+    assert client.get("/sync", params={"token": "abc"}).status_code == 400
+    assert client.get("/sync", params={"entities": "votes"}).status_code == 400
+    # A token from before the retained history, or from before a reset.
+    client.post("/units/", json={"name": "202"})
+    client.post("/units/", json={"name": "203"})
+    with SessionLocal() as db:
+        db.execute(delete(models.Change).where(models.Change.id <= int(token) + 1))
+        db.commit()
+    assert client.get("/sync", params={"token": token}).status_code == 410
+    reset_demo_db()
+    assert client.get("/sync", params={"token": token}).status_code == 410
+
+
+def test_compression_follows_accept_encoding():
+    reset_demo_db()
+    client.post("/tasks/bulk", json=[{"title": f"Inspect flat {n}"} for n in range(60)])
+    plain = client.get("/sync", headers={"Accept-Encoding": "identity"})
+    zipped = client.get("/sync", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in plain.headers and zipped.headers["Content-Encoding"] == "gzip"
+    assert zipped.headers["Vary"] == "Accept-Encoding"
+    assert zipped.json() == plain.json()
+    assert zipped.num_bytes_downloaded * 5 < plain.num_bytes_downloaded
+    assert sync.accepted_encoding("gzip;q=0, deflate") is None
+    # Small bodies are not worth compressing.
+    assert "Content-Encoding" not in client.get("/sync", params={"entities": "units"}).headers
+
+
+def test_brotli_when_accepted():
+    pytest.importorskip("brotli")
+    reset_demo_db()
+    client.post("/tasks/bulk", json=[{"title": f"Inspect flat {n}"} for n in range(60)])
+    r = client.get("/sync", headers={"Accept-Encoding": "gzip, br"})
+    assert r.headers["Content-Encoding"] == "br"
+    assert len(rows(r.json(), "tasks")) == 62
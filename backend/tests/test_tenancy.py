@@ -0,0 +1,166 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import event, select
+
+from app import aggregates, crud, models, schemas, tenancy
+from app.api import app, reset_demo_db
+from app.db import SessionLocal, engine
+
+reset_demo_db()
+
+client = TestClient(app)
+
+
+def cooperative(name: str) -> dict:
+    """A new cooperative and the header that selects it."""
+    created = client.post("/cooperatives/", json={"name": name}).json()
+    return {tenancy.HEADER: str(created["id"])}
+
+
+def test_rows_are_invisible_to_other_cooperatives():
+    reset_demo_db()
+    other = cooperative("Maple Street")
+    unit = client.post("/units/", json={"name": "A1"}, headers=other).json()
+    member = client.post("/members/", json={"name": "Dana", "email": "dana@example.com"}, headers=other).json()
+    task = client.post("/tasks/", json={"title": "Shovel the walk", "assignee_id": member["id"]}, headers=other).json()
+
+    assert [u["name"] for u in client.get("/units/", headers=other).json()] == ["A1"]
+    assert [t["title"] for t in client.get("/tasks/", headers=other).json()] == ["Shovel the walk"]
+    assert [u["name"] for u in client.get("/units/").json()] == ["101", "102"]
+    assert "Shovel the walk" not in [t["title"] for t in client.get("/tasks/").json()]
+
+    # Ids of another cooperative's rows behave as if they did not exist.
+    assert client.get(f"/units/{unit['id']}").json() is None
+    assert client.put(f"/units/{unit['id']}", json={"name": "stolen"}).json() is None
+    assert client.patch(f"/tasks/{task['id']}", json={"title": "stolen"}).json() is None
+    assert client.delete(f"/tasks/{task['id']}").json() is None
+    r = client.patch("/tasks/bulk", json=[{"id": task["id"], "status": "done"}])
+    assert r.json()["errors"] == [{"index": 0, "detail": f"id {task['id']} does not exist"}]
+    r = client.request("DELETE", "/members/bulk", json={"ids": [member["id"]]})
+    assert r.json()["deleted"] == []
+    assert client.get(f"/tasks/{task['id']}", headers=other).json()["title"] == "Shovel the walk"
+
+
+def test_single_writes_cannot_point_at_other_cooperatives_rows():
+    reset_demo_db()
+    other = cooperative("Aspen Walk")
+    unit = client.post("/units/", json={"name": "A1"}, headers=other).json()["id"]
+    member = client.post("/members/", json={"name": "Dana", "email": "dana@example.com"}, headers=other).json()["id"]
+    lane = client.post("/lanes/", json={"name": "Backlog"}, headers=other).json()["id"]
+
+    for method, path, body in [
+        ("POST", "/tasks/", {"title": "Shovel", "assignee_id": member}),
+        ("POST", "/tasks/", {"title": "Shovel", "lane_id": lane}),
+        ("PATCH", "/tasks/1", {"assignee_id": member}),
+        ("POST", "/members/", {"name": "Eve", "email": "eve@example.com", "unit_id": unit}),
+        ("PUT", "/members/1", {"name": "Alice", "email": "alice@example.com", "unit_id": unit}),
+    ]:
+        r = client.request(method, path, json=body)
+        assert r.status_code == 400, (method, path)
+        assert r.json()["detail"].endswith(" does not exist")
+    task = client.get("/tasks/1").json()
+    assert task["assignee_id"] != member and task["lane_id"] != lane
+    assert client.get("/members/1").json()["unit_id"] != unit
+    assert client.post("/tasks/", json={"title": "Shovel", "lane_id": lane}, headers=other).status_code == 200
+
+
+def test_unique_names_are_per_cooperative():
+    reset_demo_db()
+    other = cooperative("Birch Court")
+    assert client.post("/units/", json={"name": "101"}, headers=other).status_code == 200
+    r = client.post("/members/bulk", json=[{"name": "Alice", "email": "alice@example.com"}], headers=other)
+    assert r.json()["errors"] == []
+    r = client.post("/members/bulk", json=[{"name": "Alice", "email": "alice@example.com"}])
+    assert r.json()["errors"] == [{"index": 0, "detail": "email 'alice@example.com' already exists"}]
+
+
+def test_writes_are_stamped_with_the_cooperative():
+    reset_demo_db()
+    other = cooperative("Cedar Row")
+    tenant_id = int(other[tenancy.HEADER])
+    client.post("/tasks/", json={"title": "One"}, headers=other)
+    client.post("/tasks/bulk", json=[{"title": "Two"}], headers=other)
+    client.post("/proposals/", json={"title": "New boiler", "quorum": 1}, headers=other)
+    with SessionLocal() as db:
+        titles = db.scalars(select(models.Task.title).where(models.Task.tenant_id == tenant_id)).all()
+        proposals = db.scalars(select(models.Proposal.tenant_id).where(models.Proposal.title == "New boiler")).all()
+    assert sorted(titles) == ["One", "Two"]
+    assert proposals == [tenant_id]
+
+
+def test_search_dashboard_and_cache_are_per_cooperative():
+    reset_demo_db()
+    other = cooperative("Dogwood Lane")
+    client.post("/tasks/", json={"title": "Fix sink in laundry", "status": "done"}, headers=other)
+
+    assert [hit["label"] for hit in client.get("/search", params={"q": "sink"}).json()["tasks"]] == ["Fix sink"]
+    found = client.get("/search", params={"q": "sink"}, headers=other).json()["tasks"]
+    assert [hit["label"] for hit in found] == ["Fix sink in laundry"]
+    # Tenant tokens are not searchable words.
+    assert client.get("/search", params={"q": "t1"}).json()["tasks"] == []
+
+    assert client.get("/metrics/dashboard").json()["tasks"]["total"] == 2
+    card = client.get("/metrics/dashboard", headers=other).json()["tasks"]
+    assert (card["total"], card["by_status"]["done"]) == (1, 1)
+
+    with SessionLocal() as db:
+        aggregates.recompute(db)
+        db.commit()
+    assert client.get("/metrics/dashboard", headers=other).json()["tasks"]["total"] == 1
+
+
+def test_ballots_only_from_members_of_the_proposals_cooperative():
+    reset_demo_db()
+    other = cooperative("Elm Terrace")
+    proposal = client.post("/proposals/", json={"title": "Paint", "quorum": 1}, headers=other).json()
+    r = client.post(f"/proposals/{proposal['id']}/votes", json={"member_id": 1, "choice": "yes"}, headers=other)
+    assert r.status_code == 400
+    r = client.post(f"/proposals/{proposal['id']}/votes", json={"member_id": 1, "choice": "yes"})
+    assert r.status_code == 404
+
+
+def test_export_is_per_cooperative():
+    reset_demo_db()
+    other = cooperative("Fir Gardens")
+    client.post("/units/", json={"name": "B2"}, headers=other)
+    lines = client.get("/export/units", params={"format": "csv"}, headers=other).text.splitlines()
+    assert lines[0] == "id,name,updated_at,version"
+    assert len(lines) == 2 and ",B2," in lines[1]
+    assert ",B2," not in client.get("/export/units", params={"format": "csv"}).text
+
+
+def test_unknown_or_malformed_cooperative():
+    reset_demo_db()
+    assert client.get("/units/", headers={tenancy.HEADER: "999"}).status_code == 404
+    assert client.get("/units/", headers={tenancy.HEADER: "abc"}).status_code == 400
+
+
+def test_scoped_list_query_leads_with_tenant():
+    reset_demo_db()
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with SessionLocal() as db:
+        tenancy.use(db, None)
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            crud.get_tasks(db, status=models.TaskStatus.todo)
+            crud.update_unit(db, 1, schemas.UnitUpdate(name="101A"))
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+    scoped = [statement for statement in statements if not statement.startswith("INSERT")]
+    assert scoped and all("tenant_id = ?" in statement for statement in scoped)
+
+
+def test_partition_ddl():
+    statements = tenancy.partition_statements(4)
+    assert statements[1].endswith("PARTITION BY HASH (tenant_id)")
+    assert "FOR VALUES WITH (MODULUS 4, REMAINDER 3)" in statements[5]
+    assert "ALTER TABLE tasks ADD PRIMARY KEY (tenant_id, id)" in statements
+    assert statements.index("ALTER SEQUENCE tasks_id_seq OWNED BY tasks.id") < statements.index(
+        "DROP TABLE tasks_unpartitioned"
+    )
+    assert any("ix_tasks_tenant_id_due_date_id" in statement for statement in statements)
+    assert any("FOREIGN KEY(assignee_id) REFERENCES members (id)" in statement for statement in statements)
+    assert statements[-1].startswith("CREATE INDEX ix_tasks_search")
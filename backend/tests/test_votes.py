@@ -0,0 +1,98 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, func, select
+
+from app import models, vote_service
+from app.api import app, reset_demo_db
+from app.db import SessionLocal, engine
+
+reset_demo_db()
+
+client = TestClient(app)
+
+
+def test_ballot_lifecycle():
+    reset_demo_db()
+    proposal = client.post("/proposals/", json={"title": "Repaint the hall", "quorum": 2}).json()
+    votes = f"/proposals/{proposal['id']}/votes"
+
+    r = client.post(votes, json={"member_id": 1, "choice": "yes"})
+    assert r.status_code == 201
+    assert r.json()["yes"] == 1 and not r.json()["quorum_reached"]
+    assert client.post(votes, json={"member_id": 1, "choice": "no"}).status_code == 409
+    assert client.post(votes, json={"member_id": 999, "choice": "no"}).status_code == 400
+    assert client.post("/proposals/999/votes", json={"member_id": 1, "choice": "no"}).status_code == 404
+    assert client.post(votes, json={"member_id": 2, "choice": "maybe"}).status_code == 422
+
+    results = client.post(votes, json={"member_id": 2, "choice": "abstain"}).json()
+    assert (results["ballots"], results["quorum_reached"], results["open"]) == (2, True, True)
+
+    closed = client.post(f"/proposals/{proposal['id']}/close").json()
+    assert (closed["open"], closed["outcome"]) == (False, "passed")
+    assert client.post(votes, json={"member_id": 1, "choice": "no"}).status_code == 409
+    assert client.get(f"/proposals/{proposal['id']}/results").json() == closed
+
+
+def test_deadline_closes_voting():
+    reset_demo_db()
+    proposal = client.post("/proposals/", json={"title": "Late", "closes_at": "2000-01-01T00:00:00Z"}).json()
+    r = client.post(f"/proposals/{proposal['id']}/votes", json={"member_id": 1, "choice": "yes"})
+    assert r.status_code == 409
+    assert client.get(f"/proposals/{proposal['id']}/results").json()["outcome"] == "no_quorum"
+
+
+def test_ballot_is_two_writes_and_no_reads():
+    reset_demo_db()
+    proposal_id = client.post("/proposals/", json={"title": "Budget"}).json()["id"]
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.split()[0])
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        with SessionLocal() as db:
+            db.info["tenant_id"] = models.DEFAULT_TENANT  # scoped like a request's session
+            vote_service.cast_vote(db, proposal_id, 1, models.VoteChoice.yes)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert statements == ["INSERT", "UPDATE", "INSERT"]  # the last one queues the outbox event
+
+
+def test_concurrent_ballots_are_tallied_exactly():
+    reset_demo_db()
+    voters = 2000
+    r = client.post("/members/bulk", json=[
+        {"name": f"Voter {i}", "email": f"voter{i}@example.com"} for i in range(voters)
+    ])
+    member_ids = [m["id"] for m in r.json()["items"]]
+    proposal_id = client.post("/proposals/", json={"title": "General assembly", "quorum": 1500}).json()["id"]
+    choices = list(models.VoteChoice)
+
+    def ballot(submission):
+        member_id, choice = submission
+        with SessionLocal() as db:
+            try:
+                vote_service.cast_vote(db, proposal_id, member_id, choice)
+                return "accepted"
+            except vote_service.DuplicateVote:
+                return "duplicate"
+
+    # Every member submits twice at once, with different choices.
+    submissions = [(m, choices[(m + k) % 3]) for m in member_ids for k in range(2)]
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        outcomes = Counter(pool.map(ballot, submissions))
+    assert outcomes == {"accepted": voters, "duplicate": voters}
+
+    with SessionLocal() as db:
+        stored = dict(db.execute(
+            select(models.Vote.choice, func.count()).where(models.Vote.proposal_id == proposal_id)
+            .group_by(models.Vote.choice)
+        ).all())
+        live = vote_service.get_results(db, proposal_id)
+        assert live == vote_service.recount(db, proposal_id)
+    assert sum(stored.values()) == voters
+    assert (live["yes"], live["no"], live["abstain"]) == tuple(stored.get(c, 0) for c in choices)
+    assert live["ballots"] == voters and live["quorum_reached"]
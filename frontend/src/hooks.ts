@@ -1,13 +1,41 @@
 import { useQuery } from '@tanstack/react-query';
 import { Task } from './KanbanBoard';
 
+interface SyncTable {
+  columns: string[];
+  rows: unknown[][];
+  deleted: number[];
+}
+
+// The tasks received so far and the token that asks `/sync` for only what
+// changed since; the first call, and any after a 410, fetch everything.
+let token: string | null = null;
+const known = new Map<number, Task>();
+
+async function syncTasks(): Promise<Task[]> {
+  const params = new URLSearchParams({ entities: 'tasks' });
+  if (token) params.set('token', token);
+  const res = await fetch(`/sync?${params}`);
+  if (res.status === 410 && token) {
+    token = null;
+    return syncTasks();
+  }
+  if (!res.ok) throw new Error('Failed to fetch tasks');
+  const body: { token: string; tasks: SyncTable } = await res.json();
+  if (!token) known.clear();
+  const { columns, rows, deleted } = body.tasks;
+  for (const row of rows) {
+    const task = Object.fromEntries(columns.map((name, i) => [name, row[i]])) as unknown as Task;
+    known.set(task.id, task);
+  }
+  for (const id of deleted) known.delete(id);
+  token = body.token;
+  return [...known.values()].sort((a, b) => a.id - b.id);
+}
+
 export function useTasks() {
   return useQuery<Task[]>({
     queryKey: ['tasks'],
-    queryFn: async () => {
-      const res = await fetch('/tasks/');
-      if (!res.ok) throw new Error('Failed to fetch tasks');
-      return res.json();
-    }
+    queryFn: syncTasks
   });
 }